@@ -1,28 +1,203 @@
 # audit.py
 # Central audit logging helper
+#
+# log_action() only queues the entry (with its timestamp) and returns.
+# A background thread writes everything queued in one transaction every
+# FLUSH_INTERVAL seconds, or sooner once FLUSH_THRESHOLD entries are
+# waiting. flush_audit() writes the queue right away; it runs before the
+# Audit Logs page reads and when the app exits, so nothing is lost on a
+# clean shutdown. log_actions() records a whole batch (e.g. an import)
+# and writes it at once, in one transaction.
+#
+# A locked database only delays the entries until the next flush. An
+# entry SQLite refuses outright (a value it cannot bind, a constraint)
+# is set aside in `rejected` so the rest of the log keeps flowing.
 
+import atexit
+import queue
 import sqlite3
+import threading
 from datetime import datetime
-from db import DB_PATH
+from db import db_session
 
+FLUSH_INTERVAL = 1.0      # seconds
+FLUSH_THRESHOLD = 50      # entries
 
-def log_action(username, action, note=None):
-    try:
-        conn = sqlite3.connect(DB_PATH, timeout=5)
-        cur = conn.cursor()
-
-        cur.execute("""
-            INSERT INTO logs (username, action, note, datetime)
-            VALUES (?, ?, ?, ?)
-        """, (
+INSERT_SQL = """
+    INSERT INTO logs (username, action, note, datetime)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+class AuditWriter:
+    def __init__(self, interval=FLUSH_INTERVAL, threshold=FLUSH_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+
+        self._queue = queue.SimpleQueue()
+        self._pending = []                  # taken from the queue, not yet written
+        self.rejected = []                  # (entry, error) SQLite refused
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def log(self, username, action, note=None):
+        self._queue.put((
             username,
             action,
             note,
             datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         ))
 
-        conn.commit()
-        conn.close()
+        self._ensure_started()
+        if self._queue.qsize() >= self.threshold:
+            self._wake.set()
+
+    def log_many(self, username, action, notes):
+        """
+        Queues one entry per note, all with the same timestamp, and
+        writes them in a single flush. Returns how many were written.
+        """
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._write_lock:
+            self._pending.extend((username, action, note, stamp) for note in notes)
+
+        self._ensure_started()
+        return self.flush()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="audit-writer",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the writer alive; the entries are still pending
+                print("AUDIT LOG FAILED:", e)
+
+    def flush(self):
+        """
+        Writes every queued entry in one transaction.
+        Returns how many were written. If the database is busy the
+        entries are kept and retried on the next flush.
+        """
+        with self._write_lock:
+            while True:
+                try:
+                    self._pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not self._pending:
+                return 0
+
+            try:
+                with db_session() as conn:
+                    conn.executemany(INSERT_SQL, self._pending)
+            except sqlite3.OperationalError as e:
+                print("AUDIT LOG FAILED:", e)
+                return 0
+            except sqlite3.Error as e:
+                # Some entry is bad: write them one at a time instead
+                print("AUDIT LOG FAILED:", e)
+                return self._write_each()
+
+            written = len(self._pending)
+            self._pending = []
+            return written
+
+    def _write_each(self):
+        # Under _write_lock. Busy entries stay pending, refused ones
+        # move to `rejected`.
+        entries, self._pending = self._pending, []
+        written = 0
+        for entry in entries:
+            try:
+                with db_session() as conn:
+                    conn.execute(INSERT_SQL, entry)
+                written += 1
+            except sqlite3.OperationalError:
+                self._pending.append(entry)
+            except sqlite3.Error as e:
+                print("AUDIT ENTRY REJECTED:", entry, e)
+                self.rejected.append((entry, str(e)))
+        return written
+
+    def stop(self):
+        """
+        Stops the background thread and writes whatever is left.
+        Logging again afterwards starts a new thread.
+        """
+        with self._start_lock:
+            thread = self._thread
+            if thread is not None:
+                self._stopping.set()
+                self._wake.set()
+                thread.join()
+                self._thread = None
+                self._stopping.clear()
+
+        self.flush()
+        if self._pending:
+            print(f"AUDIT LOG FAILED: {len(self._pending)} entries not written")
+
+
+_writer = AuditWriter()
+atexit.register(_writer.stop)
+
+
+def log_action(username, action, note=None):
+    _writer.log(username, action, note)
+
+
+def log_actions(username, action, notes):
+    return _writer.log_many(username, action, notes)
+
+
+def flush_audit():
+    return _writer.flush()
+
+
+def log_filters(user=None, action=None, text=None):
+    """
+    (where, params) selecting the logs by `user`, whose action contains
+    `action`, and whose note contains `text`. Empty filters are left
+    out; values are always bound, never pasted into the SQL.
+    """
+    clauses = []
+    params = []
+
+    if user:
+        clauses.append("username = ?")
+        params.append(user)
+
+    for column, value in (("action", action), ("note", text)):
+        if value:
+            clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+            params.append("%" + _escape_like(value) + "%")
+
+    return " AND ".join(clauses) or "1 = 1", params
+
+
+def _escape_like(value):
+    # So "%" and "_" typed in a filter match themselves
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 
-    except sqlite3.OperationalError as e:
-        print("AUDIT LOG FAILED:", e)
+def shutdown_audit():
+    _writer.stop()
@@ -0,0 +1,186 @@
+# bench_client_ids.py
+# Compares name-keyed truck_saloks (schema version 6) with the integer
+# truck_id of migration 7: file size, and the joins / lookups the pages
+# and reports run.
+#
+# Builds a version 6 database, copies it, migrates the copy, then
+# VACUUMs both so the sizes compare like for like.
+# Runs against a scratch database (never molintas_full.db):
+#   python bench_client_ids.py [saloks] [trucks]
+
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from init_db import create_tables
+from migrations import MIGRATIONS, apply_migration
+
+OWNERS = [
+    "Dela Cruz", "Santos", "Reyes", "Bautista", "Villanueva",
+    "Mendoza", "Garcia", "Fernandez", "Aquino", "Ramos"
+]
+
+START = "2025-03-01"
+END = "2025-03-31"
+
+# (label, name-keyed SQL, id-keyed SQL, params)
+QUERIES = [
+    ("charges by client type (join)", """
+        SELECT c.type, SUM(s.drums * s.price)
+        FROM truck_saloks s
+        JOIN clients c ON c.name = s.truck
+        GROUP BY c.type
+    """, """
+        SELECT c.type, SUM(s.drums * s.price)
+        FROM truck_saloks s
+        JOIN clients c ON c.id = s.truck_id
+        GROUP BY c.type
+    """, ()),
+    ("month per truck with names", """
+        SELECT truck, SUM(drums * price)
+        FROM truck_saloks
+        WHERE date BETWEEN ? AND ?
+        GROUP BY truck
+        ORDER BY truck
+    """, """
+        SELECT c.name, t.charges
+        FROM (
+            SELECT truck_id, SUM(drums * price) AS charges
+            FROM truck_saloks
+            WHERE date BETWEEN ? AND ?
+            GROUP BY truck_id
+        ) t
+        JOIN clients c ON c.id = t.truck_id
+        ORDER BY c.name
+    """, (START, END)),
+    ("one truck's saloks (Trucks page)", """
+        SELECT truck, drums, price, date, time
+        FROM truck_saloks
+        WHERE date BETWEEN ? AND ? AND truck = ?
+        ORDER BY date DESC, time DESC
+    """, """
+        SELECT c.name, s.drums, s.price, s.date, s.time
+        FROM truck_saloks s
+        JOIN clients c ON c.id = s.truck_id
+        WHERE s.date BETWEEN ? AND ? AND s.truck_id = ?
+        ORDER BY s.date DESC, s.time DESC
+    """, ("2025-01-01", "2025-12-31")),
+]
+
+
+def migrate_to(conn, version):
+    for number, description, steps in MIGRATIONS:
+        if number <= version:
+            apply_migration(conn, number, description, steps)
+
+
+def build_v6(path, saloks, trucks, seed=1):
+    conn = sqlite3.connect(path)
+    create_tables(conn)
+    migrate_to(conn, 6)
+
+    rng = random.Random(seed)
+    names = [f"{rng.choice(OWNERS)} Water Hauling {i:04d}" for i in range(trucks)]
+    conn.executemany(
+        "INSERT INTO clients (name, type, status) VALUES (?, 'truck', 'Active')",
+        [(n,) for n in names]
+    )
+
+    first = date(2023, 1, 1)
+    conn.executemany(
+        "INSERT INTO truck_saloks (truck, drums, price, date, time) VALUES (?, ?, 7, ?, '08:00:00')",
+        (
+            (rng.choice(names), rng.randint(1, 10),
+             (first + timedelta(days=rng.randrange(1000))).strftime("%Y-%m-%d"))
+            for _ in range(saloks)
+        )
+    )
+    conn.commit()
+    conn.close()
+    return names
+
+
+def table_sizes(conn):
+    # dbstat is optional in SQLite builds
+    try:
+        rows = conn.execute("""
+            SELECT name, SUM(pgsize) FROM dbstat
+            WHERE name LIKE '%truck_saloks%'
+            GROUP BY name
+        """).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return dict(rows)
+
+
+def best_ms(conn, sql, params, runs=5):
+    conn.execute(sql, params).fetchall()        # warm the cache
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    saloks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    trucks = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        by_name = Path(tmp) / "names.db"
+        by_id = Path(tmp) / "ids.db"
+
+        started = time.perf_counter()
+        names = build_v6(by_name, saloks, trucks)
+        print(f"Built {saloks} saloks / {trucks} trucks in {time.perf_counter() - started:.1f} s")
+
+        shutil.copy(by_name, by_id)
+        conn = sqlite3.connect(by_id)
+        started = time.perf_counter()
+        migrate_to(conn, 7)
+        print(f"Migration 7 took {time.perf_counter() - started:.1f} s")
+        conn.close()
+
+        one_truck = names[0]
+        conns = {}
+        for label, path in (("names", by_name), ("ids", by_id)):
+            conn = sqlite3.connect(path)
+            conn.execute("VACUUM")
+            conns[label] = conn
+
+        truck_id = conns["ids"].execute(
+            "SELECT id FROM clients WHERE name = ?", (one_truck,)
+        ).fetchone()[0]
+
+        print()
+        print(f"{'file size':<34} {os.path.getsize(by_name) / 1e6:9.1f} MB  -> {os.path.getsize(by_id) / 1e6:9.1f} MB")
+        old_sizes = table_sizes(conns["names"])
+        new_sizes = table_sizes(conns["ids"])
+        for old, new in zip(sorted(old_sizes), sorted(new_sizes)):
+            print(f"  {old:<32} {old_sizes[old] / 1e6:9.1f} MB  -> {new_sizes[new] / 1e6:9.1f} MB  ({new})")
+
+        print()
+        print(f"{'query (best / median)':<34} {'names':>20}  {'ids':>20}")
+        for label, name_sql, id_sql, params in QUERIES:
+            if label.startswith("one truck"):
+                name_params, id_params = params + (one_truck,), params + (truck_id,)
+            else:
+                name_params = id_params = params
+            nb, nm = best_ms(conns["names"], name_sql, name_params)
+            ib, im = best_ms(conns["ids"], id_sql, id_params)
+            print(f"{label:<34} {nb:8.1f} / {nm:8.1f} ms  {ib:8.1f} / {im:8.1f} ms")
+
+        for conn in conns.values():
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# bench_connections.py
+# Compares click-to-refresh latency of the old per-call sqlite3.connect
+# against the pooled connections in db.py.
+#
+# Runs against a scratch database (never molintas_full.db):
+#   python bench_connections.py [clients] [clicks]
+
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from db import ConnectionPool
+from init_db import init_db
+
+
+def build_db(path, clients):
+    init_db(path)
+    conn = sqlite3.connect(path)
+    today = datetime.now().strftime("%Y-%m-%d")
+    conn.executemany("""
+        INSERT INTO clients
+        (name, type, billing_type, usage, bill, date, status, payment_status)
+        VALUES (?, ?, ?, 10, 37000, ?, 'Active', 'Unpaid')
+    """, (
+        (
+            f"Client {i:06d}",
+            "household" if i % 2 else "apartment",
+            "Residential" if i % 5 else "Commercial",
+            today
+        )
+        for i in range(clients)
+    ))
+    conn.commit()
+    conn.close()
+
+
+# =========================
+# "Add Usage" click
+# =========================
+# Same statements BillingPage.add_usage runs, including the
+# compute_charge settings lookup, the audit insert and the
+# load_clients / show_details / load_payment_history refresh.
+
+def add_usage_click(session, client_id, name):
+    with session() as conn:
+        client = conn.execute(
+            "SELECT type, usage, bill, billing_type FROM clients WHERE id = ?",
+            (client_id,)
+        ).fetchone()
+
+    with session() as conn:
+        rate = conn.execute(
+            "SELECT value FROM settings WHERE key = 'RES_RATE'"
+        ).fetchone()[0]
+
+    with session() as conn:
+        conn.execute(
+            "UPDATE clients SET usage = ?, bill = ?, payment_status = 'Unpaid' WHERE id = ?",
+            (client[1] + 1, client[2] + round(rate * 100), client_id)
+        )
+        conn.commit()
+
+    with session() as conn:
+        conn.execute(
+            "INSERT INTO logs (username, action, note, datetime) VALUES (?, ?, ?, ?)",
+            ("SYSTEM", "Added usage", name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        )
+        conn.commit()
+
+    with session() as conn:
+        conn.execute("""
+            SELECT * FROM clients
+            WHERE type IN ('household', 'apartment')
+            AND status = 'Active'
+            ORDER BY name
+        """).fetchall()
+
+    with session() as conn:
+        conn.execute("SELECT * FROM clients WHERE id = ?", (client_id,)).fetchone()
+
+    with session() as conn:
+        conn.execute(
+            "SELECT amount, date, note FROM payments WHERE client_id = ? ORDER BY date DESC",
+            (client_id,)
+        ).fetchall()
+
+
+def legacy_session(path):
+    # What db.get_db_conn used to do on every call
+    class Legacy:
+        def __enter__(self):
+            self.conn = sqlite3.connect(path, timeout=5)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA busy_timeout = 5000;")
+            return self.conn
+
+        def __exit__(self, *exc):
+            self.conn.close()
+
+    return Legacy
+
+
+def run(label, session, clicks, clients):
+    timings = []
+    for i in range(clicks):
+        n = (i * 7919) % clients
+        start = time.perf_counter()
+        add_usage_click(session, n + 1, f"Client {n:06d}")
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<10} mean {statistics.mean(timings):8.2f} ms   "
+        f"p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms"
+    )
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    clicks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_db(path, clients)
+
+        print(f"Add Usage click, {clients} clients, {clicks} clicks")
+        run("before", legacy_session(path), clicks, clients)
+
+        pool = ConnectionPool(path)
+        run("after", pool.session, clicks, clients)
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
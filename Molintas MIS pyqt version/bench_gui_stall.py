@@ -0,0 +1,125 @@
+# bench_gui_stall.py
+# Measures how long the GUI thread stays blocked while clicking
+# through the pages.
+#
+# A 5 ms heartbeat timer runs on the GUI thread; any gap longer than
+# that is time the event loop could not repaint or take input.
+# Runs offscreen against a scratch database (never molintas_full.db):
+#   python bench_gui_stall.py [clients] [rows]
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import db
+from init_db import init_db
+
+HEARTBEAT_MS = 5
+
+
+def build_db(path, clients, rows):
+    init_db(path)
+    conn = sqlite3.connect(path)
+    today = date.today()
+
+    def day(i):
+        return (today - timedelta(days=i % 1500)).strftime("%Y-%m-%d")
+
+    conn.executemany("""
+        INSERT INTO clients (name, type, billing_type, usage, bill, date, status, payment_status)
+        VALUES (?, ?, ?, 10, 37000, ?, 'Active', 'Unpaid')
+    """, (
+        (f"Client {i:06d}", "truck" if i % 100 == 0 else "household",
+         None if i % 100 == 0 else "Residential", day(i))
+        for i in range(clients)
+    ))
+    # Client i gets id i + 1 in the empty table
+    conn.executemany("""
+        INSERT INTO payments (client_id, client_type, amount, date, note)
+        SELECT id, type, 10000, ?, 'Payment received' FROM clients WHERE id = ?
+    """, ((day(i), random.randrange(clients) + 1) for i in range(rows)))
+    conn.executemany(
+        "INSERT INTO truck_saloks (truck_id, drums, price, date, time) VALUES (?, ?, 700, ?, '08:00:00')",
+        ((random.randrange(0, clients, 100) + 1, 5, day(i)) for i in range(rows))
+    )
+    conn.executemany(
+        "INSERT INTO logs (username, action, note, datetime) VALUES ('SYSTEM', 'Added usage', NULL, ?)",
+        ((day(i) + " 08:00:00",) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    tmp = tempfile.TemporaryDirectory()
+    path = Path(tmp.name) / "stall.db"
+    build_db(path, clients, rows)
+
+    # Point the app at the scratch database
+    db.DB_PATH = path
+    db._pool = db.ConnectionPool(path)
+
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from dashboard import DashboardWindow
+    from query_runner import get_runner
+
+    app = QApplication(sys.argv)
+    gaps = []
+    last = [time.perf_counter()]
+
+    def beat():
+        now = time.perf_counter()
+        gaps.append((now - last[0]) * 1000 - HEARTBEAT_MS)
+        last[0] = now
+
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(beat)
+    heartbeat.start(HEARTBEAT_MS)
+
+    window = DashboardWindow("admin", "admin", None)
+
+    # Rapid tab switching plus every report period
+    clicks = []
+    for _ in range(3):
+        for name in ["Dashboard", "Clients", "Billing", "Truck Salok", "Reports", "Audit Logs"]:
+            clicks.append(window.sidebar_buttons[name].click)
+    reports = window.page("Reports")
+    clicks += [reports.set_weekly, reports.set_monthly, reports.set_quarterly, reports.set_annual]
+
+    def next_click():
+        if clicks:
+            clicks.pop(0)()
+            QTimer.singleShot(50, next_click)
+        else:
+            get_runner().wait()
+            QTimer.singleShot(200, app.quit)
+
+    QTimer.singleShot(100, next_click)
+    app.exec()
+
+    gaps.sort()
+    stalls = [g for g in gaps if g > 50]
+    print(f"{clients} clients, {rows} rows per table")
+    print(f"heartbeats: {len(gaps)}")
+    print(f"p50 stall {gaps[len(gaps) // 2]:7.1f} ms")
+    print(f"p99 stall {gaps[int(len(gaps) * 0.99)]:7.1f} ms")
+    print(f"max stall {gaps[-1]:7.1f} ms")
+    print(f"stalls over 50 ms: {len(stalls)}")
+
+    db.close_db()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_services.py
+# pytest-benchmark suite for the core services (no GUI)
+#
+# Times the calls behind the busiest buttons (Add Usage, Record
+# Payment, Add Salok, the truck summary, every report period) against a
+# scratch database from datagen.py (never molintas_full.db):
+#
+#   python -m pytest bench_services.py
+#   MOLINTAS_BENCH_HOUSEHOLDS=20000 MOLINTAS_BENCH_TRUCKS=300 python -m pytest bench_services.py
+#   python -m pytest bench_services.py --benchmark-compare   (against a --benchmark-autosave run)
+#
+# Writes go to the same database, so results include the triggers that
+# maintain the ledgers and rollups.
+
+import itertools
+import os
+
+import pytest
+
+from core import open_services
+from datagen import DEFAULTS, generate
+
+# datagen volumes, each overridable as MOLINTAS_BENCH_<NAME>
+VOLUMES = {
+    name: type(default)(os.environ.get(f"MOLINTAS_BENCH_{name.upper()}", default))
+    for name, default in DEFAULTS.items()
+}
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "services.db"
+    generate(path, **VOLUMES)
+
+    services = open_services(path)
+    with services.pool.session() as conn:
+        client_ids = [r[0] for r in conn.execute(
+            "SELECT id FROM clients WHERE type <> 'truck' AND billing_type IS NOT NULL"
+        )]
+        truck_ids = [r[0] for r in conn.execute("SELECT id FROM clients WHERE type = 'truck'")]
+
+    yield services, client_ids, truck_ids
+    services.pool.close_all()
+
+
+def test_add_usage(benchmark, dataset):
+    services, client_ids, _ = dataset
+    clients = itertools.cycle(client_ids)
+    benchmark(lambda: services.billing.add_usage(next(clients), 2.5))
+
+
+def test_record_payment(benchmark, dataset):
+    services, client_ids, _ = dataset
+    # One centavo, so no bill runs out during the run
+    client_id = client_ids[0]
+    services.billing.add_usage(client_id, 10000)
+    benchmark(lambda: services.billing.record_payment(client_id, 1))
+
+
+def test_add_salok(benchmark, dataset):
+    services, _, truck_ids = dataset
+    trucks = itertools.cycle(truck_ids)
+    benchmark(lambda: services.trucks.add_salok(next(trucks), 5))
+
+
+def test_truck_balance(benchmark, dataset):
+    services, _, truck_ids = dataset
+    benchmark(services.trucks.balance, truck_ids[0])
+
+
+def test_payment_history(benchmark, dataset):
+    services, client_ids, _ = dataset
+    benchmark(services.billing.payment_history, client_ids[0])
+
+
+def test_compute_charge(benchmark, dataset):
+    services, _, _ = dataset
+    benchmark(services.billing.compute_charge, "Residential", 12.5, "2025-03-01 08:00:00")
+
+
+@pytest.mark.parametrize("mode", ["daily", "weekly", "monthly", "quarterly", "annual"])
+def test_report(benchmark, dataset, mode):
+    services, _, _ = dataset
+    benchmark(services.reports.build, mode)
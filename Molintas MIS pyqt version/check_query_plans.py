@@ -0,0 +1,172 @@
+# check_query_plans.py
+# Runs EXPLAIN QUERY PLAN for every query the pages use and fails
+# if any of them falls back to a full table scan, or if an export has
+# to sort its rows before the first one can be written.
+#
+# Uses a scratch database built by init_db (never molintas_full.db):
+#   python check_query_plans.py
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import summary
+import truck_ledger
+from audit import log_filters
+import rates
+from core import billing, clients, exports, trucks
+import rollups
+import usage_ledger
+from init_db import init_db
+
+D = "2025-01-01"
+
+# (where it runs, SQL, params)
+PAGE_QUERIES = [
+    ("ClientsPage.load_clients (residential)", clients.RESIDENTIAL_SQL, ()),
+    ("ClientsPage.load_clients (trucks)", clients.TRUCKS_SQL, ()),
+    ("ClientService.get", "SELECT * FROM clients WHERE id = ?", (1,)),
+
+    ("BillingPage.load_clients", clients.BILLABLE_SQL, ()),
+    ("BillingService.payment_history", billing.PAYMENT_HISTORY_SQL, (1,)),
+    ("clients.name_index (imports)", clients.CLIENTS_BY_NAME_SQL, ()),
+    ("PaymentService._posted (payments)",
+     "SELECT reference FROM payments WHERE reference IN (?, ?)", ("a", "b")),
+    ("PaymentService._posted (truck payments)",
+     "SELECT reference FROM truck_payments WHERE reference IN (?, ?)", ("a", "b")),
+    ("SettingsService._load", "SELECT key, value FROM settings", ()),
+    ("SettingsService._load (schedule)", rates.SCHEDULE_SQL, ()),
+    ("rates.rate_at", rates.RATE_AT_SQL, ("RES_RATE", D)),
+
+    ("ClientService.trucks", """
+        SELECT id, name FROM clients
+        WHERE type = 'truck'
+        ORDER BY name
+    """, ()),
+    ("TrucksPage.load_logs (all trucks)", *trucks.TruckService().logs_query(D, D)),
+    ("TrucksPage.load_logs (one truck)", *trucks.TruckService().logs_query(D, D, 1)),
+    ("TruckService.balance", """
+        SELECT charges, payments, last_activity
+        FROM truck_balances
+        WHERE truck_id = ?
+    """, (1,)),
+
+    ("summary.get_dashboard_summary (clients)", summary.CLIENT_COUNTS_SQL, ()),
+    ("summary.get_dashboard_summary (money)", summary.MONEY_SQL,
+     {"today": D, "month_start": D, "month_end": D}),
+    ("summary.get_dashboard_summary (cache key)",
+     "SELECT name, version FROM table_versions WHERE name IN (?, ?, ?)",
+     summary.WATCHED_TABLES),
+
+    ("truck_ledger.get_truck_totals", truck_ledger.RANGE_TOTALS_SQL,
+     {"start": D, "end": D}),
+    ("ReportService.truck_report (rollup)", rollups.TRUCK_TOTALS_SQL, (D, D)),
+    ("ReportService.billing_report (rollup)", rollups.PERIOD_TOTALS_SQL, (D, D)),
+    ("ReportService.billing_report (by type)", rollups.CLIENT_TYPE_TOTALS_SQL, (D, D)),
+    ("usage_ledger.get_usage_totals", usage_ledger.PERIOD_SQL, (D, D)),
+    ("usage_ledger.get_client_usage", usage_ledger.CLIENT_EVENTS_SQL, (1, D, D)),
+
+    ("AuditLogModel.fetch_batch (first page)", """
+        SELECT id, datetime, username, action, note
+        FROM logs
+        WHERE datetime BETWEEN ? AND ?
+        AND 1 = 1
+        ORDER BY datetime DESC, id DESC
+        LIMIT ?
+    """, (D, D, 200)),
+    ("AuditLogModel.fetch_batch (next page, user filter)", """
+        SELECT id, datetime, username, action, note
+        FROM logs
+        WHERE datetime BETWEEN ? AND ?
+        AND username = ?
+        AND (datetime < ? OR id < ?)
+        ORDER BY datetime DESC, id DESC
+        LIMIT ?
+    """, (D, D, "x", D, 1, 200)),
+]
+
+# Exports read every row, but must stream them in index order: a
+# "USE TEMP B-TREE" sort would hold the whole result before writing
+EXPORT_QUERIES = [
+    *[(f"ExportService.export_table ({name})", t.sql, ())
+      for name, t in exports.TABLES.items()],
+    ("ExportService.export_saloks (one truck)", *trucks.TruckService().logs_query(D, D, 1)),
+    ("ExportService.export_logs (user, action, text)",
+     exports.LOGS_VIEW_SQL.format(where=log_filters("x", "x", "x")[0]),
+     (D, D, *log_filters("x", "x", "x")[1])),
+]
+
+# Queries that read a whole table by design. They are reported but do
+# not fail the check; each one is waiting on its own rework.
+KNOWN_FULL_SCANS = {
+    # One row per truck in truck_balances (only runs on a cache miss)
+    "summary.get_dashboard_summary (money)",
+    # A handful of rows, read once per process and after each change
+    "SettingsService._load",
+    # Every client once per import, to match names in memory
+    "clients.name_index (imports)",
+}
+
+
+def full_scans(conn, sql, params):
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    details = [row[3] for row in plan]
+
+    # "SEARCH t USING INDEX ..." and "SCAN t USING INDEX ..." are fine,
+    # a bare "SCAN t" reads every row of the table. "SCAN (subquery-N)"
+    # and scans of a named subquery ("CO-ROUTINE t") read rows the
+    # subquery already produced, not a table.
+    subqueries = {
+        d.split(" ", 1)[1] for d in details if d.startswith("CO-ROUTINE ")
+    }
+    bad = [
+        d for d in details
+        if d.startswith("SCAN ") and "USING" not in d
+        and d != "SCAN CONSTANT ROW"
+        and not d.startswith("SCAN (subquery")
+        and d.split(" ", 1)[1] not in subqueries
+    ]
+    return details, bad
+
+
+def check(db_path):
+    conn = sqlite3.connect(db_path)
+    failures = 0
+
+    for where, sql, params in PAGE_QUERIES + EXPORT_QUERIES:
+        details, bad = full_scans(conn, sql, params)
+        if (where, sql, params) in EXPORT_QUERIES:
+            bad += [d for d in details if d.startswith("USE TEMP B-TREE")]
+
+        if not bad:
+            status = "ok"
+        elif where in KNOWN_FULL_SCANS:
+            status = "known"
+        else:
+            status = "FULL SCAN"
+            failures += 1
+
+        print(f"[{status:>9}] {where}")
+        for d in details:
+            print(f"            {d}")
+
+    conn.close()
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "plans.db"
+        init_db(path)
+        failures = check(path)
+
+    print()
+    if failures:
+        print(f"{failures} page queries need an index.")
+        sys.exit(1)
+    print("No unexpected full table scans.")
+
+
+if __name__ == "__main__":
+    main()
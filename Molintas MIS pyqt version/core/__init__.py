@@ -0,0 +1,63 @@
+# core
+# Business rules behind the pages, without Qt
+#
+# The pages read input, call a service and show the result or the
+# ServiceError message. The same calls can be scripted, batched or
+# benchmarked with no QApplication:
+#
+#   ClientService   add / edit / delete clients, active status
+#   BillingService  usage and payments for household / apartment clients
+#   TruckService    saloks, truck payments, balances
+#   PaymentService  a file of client and truck payments, posted at once
+#   ExportService   tables and filtered views to CSV / XLSX, streamed
+#   ReportService   period report text
+#
+# By default a service uses the app's database (db.db_session), the
+# cached rates (settings_service) and the audit log. open_services()
+# points them all at another database file, e.g. a generated one:
+#
+#   services = open_services("scratch.db")
+#   services.billing.add_usage(client_id, 12.5)
+#   services.pool.close_all()
+
+from collections import namedtuple
+
+from db import ConnectionPool
+from rates import RateSchedule
+from core.service import ServiceError
+from core.clients import ClientService
+from core.billing import BillingService
+from core.trucks import TruckService
+from core.payments import PaymentService
+from core.exports import ExportService
+from core.reports import ReportService
+
+Services = namedtuple("Services", "clients billing trucks payments reports exports pool")
+
+
+def open_services(path, audit=None):
+    """
+    Services on the database at `path`, with its own connection pool
+    and rate schedule (read once, now). Nothing is audited unless an
+    `audit` callable is given.
+    """
+    pool = ConnectionPool(path)
+    with pool.session() as conn:
+        schedule = RateSchedule.load(conn)
+
+    return Services(
+        clients=ClientService(pool.session, audit),
+        billing=BillingService(pool.session, audit, schedule),
+        trucks=TruckService(pool.session, audit, schedule),
+        payments=PaymentService(pool.session, audit),
+        reports=ReportService(pool.session, audit),
+        exports=ExportService(pool.session, audit),
+        pool=pool,
+    )
+
+
+__all__ = [
+    "ServiceError", "ClientService", "BillingService", "TruckService",
+    "PaymentService", "ReportService", "ExportService", "Services",
+    "open_services",
+]
@@ -0,0 +1,203 @@
+# core/billing.py
+# Household / apartment billing (Billing page): usage, payments, charges
+#
+# Amounts are integer centavos (see money.py); `when` is a
+# 'YYYY-MM-DD HH:MM:SS' timestamp, default now.
+
+import math
+from datetime import date
+
+from money import charge, fmt
+from rates import now, rate_key
+from usage_ledger import record_usage, record_usage_batch
+from core.clients import name_index
+from core.imports import ImportResult, parse_day, read_table
+from core.service import RatedService, ServiceError
+
+READING_COLUMNS = ("client", "usage")       # optional: date (YYYY-MM-DD)
+
+PAYMENT_HISTORY_SQL = """
+    SELECT amount, date, note
+    FROM payments
+    WHERE client_id = ?
+    ORDER BY date DESC
+"""
+
+
+class BillingService(RatedService):
+    def rate_for(self, billing_type, when=None):
+        # Centavos per m³ in effect at `when`
+        return self.rates.rate_at(rate_key(billing_type), when)
+
+    def compute_charge(self, billing_type, usage, when=None):
+        return charge(usage, self.rate_for(billing_type, when))
+
+    def add_usage(self, client_id, usage, when=None, note=None):
+        """
+        Bills `usage` m³ at the rate in effect at `when`. Returns the
+        charge.
+        """
+        # nan / inf would only fail later, inside money.charge
+        if not (math.isfinite(usage) and usage > 0):
+            raise ServiceError("Invalid Input", "Enter a valid usage amount.")
+
+        created_at = when or now()
+
+        with self.session() as conn:
+            client = conn.execute("""
+                SELECT name, type, billing_type
+                FROM clients
+                WHERE id = ?
+            """, (client_id,)).fetchone()
+
+            if not client or client["type"].lower() == "truck" or not client["billing_type"]:
+                raise ServiceError(
+                    "Invalid Client",
+                    "Truck clients are billed through Truck Salok."
+                )
+
+            rate = self.rate_for(client["billing_type"], created_at)
+
+            # Appends to usage_events and updates the client's totals
+            added = record_usage(conn, client_id, usage, rate, note, created_at)
+
+        self.log("Added usage", f"{client['name']}: +{usage} m³ ({fmt(added)})")
+        return added
+
+    def record_payment(self, client_id, amount, when=None, note="Payment received"):
+        """
+        Records a payment of `amount` towards the client's bill, which
+        it may not exceed. Returns the remaining bill.
+        """
+        if amount <= 0:
+            raise ServiceError("Invalid Input", "Enter a valid payment amount.")
+
+        paid_on = (when or now())[:10]
+
+        with self.session() as conn:
+            client = conn.execute(
+                "SELECT name, type, bill FROM clients WHERE id = ?", (client_id,)
+            ).fetchone()
+
+            if not client:
+                raise ServiceError("Select Client", "The client no longer exists.")
+
+            if amount > client["bill"]:
+                raise ServiceError(
+                    "Invalid Payment",
+                    "Payment cannot exceed the current bill."
+                )
+
+            conn.execute("""
+                INSERT INTO payments (client_id, client_type, amount, date, note)
+                VALUES (?, ?, ?, ?, ?)
+            """, (client_id, client["type"], amount, paid_on, note))
+
+            # Centavos, so a bill paid in full is exactly 0
+            new_bill = client["bill"] - amount
+            payment_status = "Paid" if new_bill == 0 else "Unpaid"
+
+            conn.execute("""
+                UPDATE clients
+                SET bill = ?, payment_status = ?
+                WHERE id = ?
+            """, (new_bill, payment_status, client_id))
+
+        self.log("Recorded payment", f"{client['name']}: {fmt(amount)}")
+        return new_bill
+
+    # -------------------------------------------------
+    # Bulk meter readings
+    # -------------------------------------------------
+    def import_readings(self, path):
+        """
+        Bills a CSV / XLSX of meter readings (columns client, usage and
+        optionally date). See add_readings.
+        """
+        return self.add_readings(read_table(path, READING_COLUMNS), source=str(path))
+
+    def add_readings(self, rows, source="grid"):
+        """
+        Bills many readings at once. `rows` are (line, {"client": name,
+        "usage": m³, "date": 'YYYY-MM-DD' or ""}).
+
+        Every row is checked first. If any is rejected nothing is
+        billed, so the corrected file can simply be imported again;
+        otherwise all readings go in one transaction with one batched
+        audit write. Readings without a date are billed now; all rates
+        come from one look at the schedule. Returns an ImportResult.
+        """
+        result = ImportResult(source)
+        stamp = now()
+        rates = {}
+
+        with self.session() as conn:
+            clients = name_index(conn)
+
+            readings, notes, seen = [], [], {}
+            for line, row in rows:
+                client = clients.get(row.get("client", "").casefold())
+                message = self._check_reading(client, row, seen, line)
+                if message:
+                    result.error(line, message)
+                    continue
+
+                seen[client["id"]] = line
+                usage = float(row["usage"])
+                created_at = f"{row['date'][:10]} 00:00:00" if row.get("date") else stamp
+
+                key = (rate_key(client["billing_type"]), created_at)
+                if key not in rates:
+                    rates[key] = self.rates.rate_at(*key)
+
+                readings.append((client["id"], usage, rates[key], created_at))
+                notes.append(client["name"])
+
+            if result.errors or not readings:
+                return result.finish()
+
+            charges = record_usage_batch(conn, readings)
+
+        result.applied = len(readings)
+        result.total = sum(charges)
+
+        self.log_many("Added usage", [
+            f"{name}: +{usage} m³ ({fmt(amount)})"
+            for name, (_, usage, _, _), amount in zip(notes, readings, charges)
+        ])
+        self.log("Imported usage", f"{result.applied} readings from {source} ({fmt(result.total)})")
+        return result.finish()
+
+    def _check_reading(self, client, row, seen, line):
+        # The message for a row that cannot be billed, else None
+        if client is None:
+            return f"unknown client '{row.get('client', '')}'"
+        if client["type"] == "truck":
+            return f"{client['name']} is a truck (billed through Truck Salok)"
+        if not client["billing_type"]:
+            return f"{client['name']} has no billing type"
+        if client["status"] != "Active":
+            return f"{client['name']} is {client['status']}"
+        if client["id"] in seen:
+            return f"{client['name']} already has a reading on line {seen[client['id']]}"
+
+        try:
+            usage = float(row.get("usage", ""))
+        except ValueError:
+            usage = math.nan
+        if not (math.isfinite(usage) and usage > 0):
+            return f"usage '{row.get('usage', '')}' is not a positive number"
+
+        if row.get("date"):
+            try:
+                day = parse_day(row["date"][:10])
+            except ValueError:
+                return f"date '{row['date']}' is not YYYY-MM-DD"
+            if day > date.today():
+                return f"date {row['date']} is in the future"
+
+        return None
+
+    def payment_history(self, client_id):
+        with self.session() as conn:
+            return conn.execute(PAYMENT_HISTORY_SQL, (client_id,)).fetchall()
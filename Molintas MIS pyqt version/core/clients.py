@@ -0,0 +1,124 @@
+# core/clients.py
+# Client records (Clients page)
+
+import sqlite3
+
+from core.service import Service, ServiceError
+
+# Page lists; the table models read them lazily
+RESIDENTIAL_SQL = """
+    SELECT * FROM clients
+    WHERE type IN ('household', 'apartment')
+    ORDER BY name
+"""
+
+TRUCKS_SQL = """
+    SELECT * FROM clients
+    WHERE type = 'truck'
+    ORDER BY name
+"""
+
+# Billing page: only active clients can be billed
+BILLABLE_SQL = """
+    SELECT * FROM clients
+    WHERE type IN ('household', 'apartment')
+    AND status = 'Active'
+    ORDER BY name
+"""
+
+
+# Every client once, for matching import rows by name
+CLIENTS_BY_NAME_SQL = """
+    SELECT id, name, type, billing_type, status, bill
+    FROM clients
+"""
+
+
+def name_index(conn):
+    """
+    {name.casefold(): client row} of every client, so a whole import
+    file is matched with one query.
+    """
+    return {r["name"].casefold(): r for r in conn.execute(CLIENTS_BY_NAME_SQL)}
+
+
+class ClientService(Service):
+    def get(self, client_id):
+        with self.session() as conn:
+            return conn.execute(
+                "SELECT * FROM clients WHERE id = ?", (client_id,)
+            ).fetchone()
+
+    def trucks(self):
+        """
+        [(id, name), ...] of every truck client, by name.
+        """
+        with self.session() as conn:
+            return conn.execute("""
+                SELECT id, name FROM clients
+                WHERE type = 'truck'
+                ORDER BY name
+            """).fetchall()
+
+    def add(self, name, type, billing_type=None, address=None, contact=None):
+        """
+        Adds an active client with no usage or bill. Trucks have no
+        billing type. Returns the new client id.
+        """
+        billing_type = None if type == "truck" else billing_type
+
+        try:
+            with self.session() as conn:
+                client_id = conn.execute("""
+                    INSERT INTO clients
+                    (name, type, usage, bill, date, status, payment_status, address, contact, billing_type)
+                    VALUES (?, ?, 0, 0, NULL, 'Active', 'Unpaid', ?, ?, ?)
+                """, (name, type, address, contact, billing_type)).lastrowid
+        except sqlite3.IntegrityError:
+            raise ServiceError("Error", "Client name already exists.") from None
+
+        self.log("Added client", name)
+        return client_id
+
+    def update(self, client_id, type, billing_type=None, address=None, contact=None):
+        billing_type = None if type == "truck" else billing_type
+
+        with self.session() as conn:
+            client = self._require(conn, client_id)
+            conn.execute("""
+                UPDATE clients
+                SET type=?, billing_type=?, address=?, contact=?
+                WHERE id=?
+            """, (type, billing_type, address, contact, client_id))
+
+        self.log("Edited client", client["name"])
+
+    def delete(self, client_id):
+        with self.session() as conn:
+            client = self._require(conn, client_id)
+            # Payment triggers take them off the daily rollups
+            conn.execute("DELETE FROM payments WHERE client_id=?", (client_id,))
+            conn.execute("DELETE FROM clients WHERE id=?", (client_id,))
+
+        self.log("Deleted client", client["name"])
+
+    def toggle_status(self, client_id):
+        """
+        Active <-> Inactive. Returns the new status.
+        """
+        with self.session() as conn:
+            client = self._require(conn, client_id)
+            current = client["status"]
+            new = "Inactive" if current == "Active" else "Active"
+            conn.execute("UPDATE clients SET status=? WHERE id=?", (new, client_id))
+
+        self.log("Changed client status", f"{client['name']}: {current} → {new}")
+        return new
+
+    def _require(self, conn, client_id):
+        client = conn.execute(
+            "SELECT name, status FROM clients WHERE id = ?", (client_id,)
+        ).fetchone()
+        if not client:
+            raise ServiceError("Select Client", "The client no longer exists.")
+        return client
@@ -0,0 +1,213 @@
+# core/exports.py
+# Exporting tables and filtered views to CSV or XLSX
+#
+# Rows are read from the cursor CHUNK at a time and written as they
+# come, so exporting millions of saloks holds one chunk in memory, not
+# the result. Every query here is ordered by an index, so SQLite
+# streams it too instead of sorting it first (check_query_plans).
+# Money columns are written as peso numbers, not "₱" text.
+#
+# The file is written next to the target as <name>.part and renamed
+# when complete, so a failed or interrupted export leaves no half file.
+
+import csv
+import os
+import time
+from collections import namedtuple
+from operator import itemgetter
+from pathlib import Path
+
+from audit import log_filters
+from money import to_pesos
+from core.service import Service, ServiceError
+
+# Rows per fetchmany()
+CHUNK = 2000
+
+# Rows per worksheet, header included (Excel's limit); longer exports
+# continue on "<title> (2)", ...
+XLSX_MAX_ROWS = 1048576
+
+ExportResult = namedtuple("ExportResult", "path rows seconds")
+
+
+def _pesos(key):
+    return lambda row: to_pesos(row[key])
+
+
+# columns: list of (header, value), value being a column name or a
+# function taking the sqlite3.Row (as in pages.table_model)
+CLIENT_COLUMNS = [
+    ("ID", "id"), ("Name", "name"), ("Type", "type"),
+    ("Billing Type", "billing_type"), ("Usage (m³)", "usage"),
+    ("Bill (₱)", _pesos("bill")), ("Last Updated", "date"),
+    ("Status", "status"), ("Payment Status", "payment_status"),
+    ("Address", "address"), ("Contact", "contact"),
+]
+
+PAYMENT_COLUMNS = [
+    ("ID", "id"), ("Client", "client"), ("Amount (₱)", _pesos("amount")),
+    ("Date", "date"), ("Note", "note"), ("Reference", "reference"),
+]
+
+# Same columns as core.trucks.LOGS_SQL, so the Truck Salok view exports
+# with these too
+SALOK_COLUMNS = [
+    ("Truck", "truck"), ("Drums", "drums"),
+    ("Price / Drum (₱)", _pesos("price")),
+    ("Total (₱)", lambda r: to_pesos(r["drums"] * r["price"])),
+    ("Date", "date"), ("Time", "time"),
+]
+
+LOG_COLUMNS = [
+    ("Date & Time", "datetime"), ("Username", "username"),
+    ("Action", "action"), ("Note", "note"),
+]
+
+Export = namedtuple("Export", "title sql columns")
+
+# Whole tables: clients by name, the rest oldest first
+TABLES = {
+    "clients": Export("Clients", """
+        SELECT * FROM clients
+        ORDER BY name
+    """, CLIENT_COLUMNS),
+    "payments": Export("Payments", """
+        SELECT p.id, COALESCE(c.name, 'Deleted client #' || p.client_id) AS client,
+               p.amount, p.date, p.note, p.reference
+        FROM payments p
+        LEFT JOIN clients c ON c.id = p.client_id
+        ORDER BY p.date, p.id
+    """, PAYMENT_COLUMNS),
+    "truck_payments": Export("Truck Payments", """
+        SELECT p.id, COALESCE(c.name, 'Deleted truck #' || p.truck_id) AS client,
+               p.amount, p.date, p.note, p.reference
+        FROM truck_payments p
+        LEFT JOIN clients c ON c.id = p.truck_id
+        ORDER BY p.date, p.id
+    """, PAYMENT_COLUMNS),
+    "saloks": Export("Saloks", """
+        SELECT COALESCE(c.name, 'Deleted truck #' || s.truck_id) AS truck,
+               s.drums, s.price, s.date, s.time
+        FROM truck_saloks s
+        LEFT JOIN clients c ON c.id = s.truck_id
+        ORDER BY s.date, s.time
+    """, SALOK_COLUMNS),
+    "logs": Export("Audit Logs", """
+        SELECT datetime, username, action, note
+        FROM logs
+        ORDER BY datetime, id
+    """, LOG_COLUMNS),
+}
+
+# The Audit Logs page's filter, newest first like the page. {where}
+# only ever comes from audit.log_filters
+LOGS_VIEW_SQL = """
+    SELECT datetime, username, action, note
+    FROM logs
+    WHERE datetime BETWEEN ? AND ?
+    AND {where}
+    ORDER BY datetime DESC, id DESC
+"""
+
+
+class ExportService(Service):
+    def export_table(self, path, name):
+        """
+        Writes the whole table `name` (a TABLES key) to `path`.
+        Returns an ExportResult.
+        """
+        export = TABLES[name]
+        return self.export(path, export.title, export.sql, (), export.columns)
+
+    def export_saloks(self, path, sql, params):
+        # (sql, params) from TruckService.logs_query: the Truck Salok view
+        return self.export(path, "Saloks", sql, params, SALOK_COLUMNS)
+
+    def export_logs(self, path, start, end, user=None, action=None, text=None):
+        """
+        The audit log between 'YYYY-MM-DD HH:MM:SS' bounds, filtered
+        like the Audit Logs page (see audit.log_filters).
+        """
+        where, params = log_filters(user, action, text)
+        return self.export(
+            path, "Audit Logs", LOGS_VIEW_SQL.format(where=where),
+            [start, end, *params], LOG_COLUMNS
+        )
+
+    def export(self, path, title, sql, params, columns):
+        """
+        Streams the rows of `sql` to `path` (.csv or .xlsx), one
+        `columns` entry per column. Returns an ExportResult.
+        """
+        path = Path(path)
+        write = _WRITERS.get(path.suffix.lower())
+        if write is None:
+            raise ServiceError("Unsupported File", "Export to a .csv or .xlsx file.")
+
+        started = time.perf_counter()
+        part = path.with_name(path.name + ".part")
+        try:
+            with self.session() as conn:
+                cursor = conn.execute(sql, params)
+                rows = write(part, title, [h for h, _ in columns], _chunks(cursor, columns))
+            os.replace(part, path)
+        except BaseException:
+            part.unlink(missing_ok=True)
+            raise
+
+        self.log("Exported data", f"{title}: {rows} rows to {path.name}")
+        return ExportResult(str(path), rows, time.perf_counter() - started)
+
+
+def _chunks(cursor, columns):
+    # Up to CHUNK rows of cell values at a time, read from `cursor`
+    getters = [itemgetter(v) if isinstance(v, str) else v for _, v in columns]
+    while True:
+        batch = cursor.fetchmany(CHUNK)
+        if not batch:
+            return
+        yield [[get(row) for get in getters] for row in batch]
+
+
+def _write_csv(path, title, headers, chunks):
+    # utf-8-sig so Excel opens "₱" and "m³" correctly
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _write_xlsx(path, title, headers, chunks):
+    # openpyxl is only needed for spreadsheet exports
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ServiceError("Unsupported File", "Writing .xlsx files needs openpyxl; export to .csv instead.") from None
+
+    # write_only: rows go straight to the file instead of being kept
+    # as cells
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheets = None, XLSX_MAX_ROWS, 0
+    count = 0
+    for row in (row for rows in chunks for row in rows):
+        if sheet_rows == XLSX_MAX_ROWS:
+            sheets += 1
+            sheet = workbook.create_sheet(title if sheets == 1 else f"{title} ({sheets})")
+            sheet.append(headers)
+            sheet_rows = 1
+        sheet.append(row)
+        sheet_rows += 1
+        count += 1
+
+    if sheet is None:
+        workbook.create_sheet(title).append(headers)
+    workbook.save(path)
+    return count
+
+
+_WRITERS = {".csv": _write_csv, ".xlsx": _write_xlsx}
@@ -0,0 +1,120 @@
+# core/imports.py
+# Reading import files (CSV or XLSX) and reporting how an import went
+#
+# The first row holds the column names (any case). Every data row comes
+# back as (line number, {column: text}) so errors can point at the line
+# the user sees in their spreadsheet.
+
+import csv
+import time
+from datetime import date
+from pathlib import Path
+
+from core.service import ServiceError
+
+
+def read_table(path, required):
+    """
+    Yields (line, row) for every non-blank row of `path`. Raises
+    ServiceError for an unsupported file or a missing `required` column.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".csv":
+        rows = _csv_rows(path)
+    elif suffix == ".xlsx":
+        rows = _xlsx_rows(path)
+    else:
+        raise ServiceError("Unsupported File", "Choose a .csv or .xlsx file.")
+
+    header = next(rows, None)
+    columns = [str(c or "").strip().lower() for c in header or ()]
+    missing = [c for c in required if c not in columns]
+    if missing:
+        raise ServiceError(
+            "Missing Columns",
+            f"{path.name} needs the column(s): {', '.join(missing)}."
+        )
+
+    for line, values in enumerate(rows, start=2):
+        values = ["" if v is None else str(v).strip() for v in values]
+        if any(values):
+            yield line, dict(zip(columns, values))
+
+
+def parse_day(text):
+    """
+    The date of a 'YYYY-MM-DD' cell. Raises ValueError for anything
+    else, including the other ISO forms date.fromisoformat() takes
+    ("20250301", "2025-W10-1"): SQLite's date() does not read them.
+    """
+    day = date.fromisoformat(text)
+    if day.isoformat() != text:
+        raise ValueError(f"{text!r} is not YYYY-MM-DD")
+    return day
+
+
+def _csv_rows(path):
+    # utf-8-sig: Excel puts a BOM in front of CSVs it saves
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.reader(f)
+
+
+def _xlsx_rows(path):
+    # openpyxl is only needed for spreadsheet imports
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ServiceError("Unsupported File", "Reading .xlsx files needs openpyxl; save as .csv instead.") from None
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+class ImportResult:
+    """
+    What an import did: rows applied, the (line, message) of every
+    rejected row and of every row skipped as already done, the total
+    amount in centavos and how long it took.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.applied = 0
+        self.total = 0
+        self.errors = []
+        self.skipped = []
+        self._started = time.perf_counter()
+        self.seconds = 0.0
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def skip(self, line, message):
+        self.skipped.append((line, message))
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.applied / self.seconds if self.seconds else 0.0
+
+    def summary(self, max_errors=20):
+        lines = [
+            f"{self.applied} rows applied in {self.seconds:.2f} s "
+            f"({self.rows_per_second:,.0f} rows/s)"
+        ]
+        if self.skipped:
+            lines.append(f"{len(self.skipped)} rows skipped (already posted)")
+        if self.errors:
+            lines.append(f"{len(self.errors)} rows rejected:")
+            lines += [f"  line {line}: {message}" for line, message in self.errors[:max_errors]]
+            if len(self.errors) > max_errors:
+                lines.append(f"  ... and {len(self.errors) - max_errors} more")
+        return "\n".join(lines)
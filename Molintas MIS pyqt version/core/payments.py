@@ -0,0 +1,141 @@
+# core/payments.py
+# Posting a file of payments (collection sheets, bank / e-wallet
+# exports) for clients and trucks at once
+#
+# Columns: client (client or truck name), amount (₱), and optionally
+# date (YYYY-MM-DD, default today) and reference. A reference already
+# posted, or repeated in the file, is skipped, so the same export can
+# be imported again safely.
+
+from datetime import date
+
+from money import fmt, to_cents
+from core.clients import name_index
+from core.imports import ImportResult, parse_day, read_table
+from core.service import Service
+
+PAYMENT_COLUMNS = ("client", "amount")      # optional: date, reference
+
+# Bound parameters per IN (...) lookup, under SQLite's limit
+CHUNK = 500
+
+
+class PaymentService(Service):
+    def import_payments(self, path):
+        return self.add_payments(read_table(path, PAYMENT_COLUMNS), source=str(path))
+
+    def add_payments(self, rows, source="grid"):
+        """
+        Posts many payments at once. `rows` are (line, {"client": name,
+        "amount": ₱, "date": 'YYYY-MM-DD' or "", "reference": text}).
+
+        A client's payments may not add up to more than their bill
+        (trucks run a balance instead). If any row is rejected nothing
+        is posted; otherwise everything goes in one transaction with one
+        batched audit write. Returns an ImportResult.
+        """
+        rows = list(rows)
+        result = ImportResult(source)
+        today = date.today().strftime("%Y-%m-%d")
+
+        with self.session() as conn:
+            clients = name_index(conn)
+            posted = self._posted(conn, {row.get("reference") for _, row in rows} - {"", None})
+
+            paid = {}               # client_id -> total in this file
+            seen = {}               # reference -> line
+            client_rows, truck_rows = [], []
+
+            for line, row in rows:
+                reference = row.get("reference") or None
+                if reference in posted:
+                    result.skip(line, f"reference {reference} is already posted")
+                    continue
+                if reference in seen:
+                    result.skip(line, f"reference {reference} repeats line {seen[reference]}")
+                    continue
+
+                client = clients.get(row.get("client", "").casefold())
+                message, amount, day = self._check_payment(client, row, today)
+                if message is None and client["type"] != "truck":
+                    owed = client["bill"] - paid.get(client["id"], 0)
+                    if amount > owed:
+                        message = f"{client['name']}: {fmt(amount)} is more than the bill of {fmt(owed)}"
+                if message:
+                    result.error(line, message)
+                    continue
+
+                if reference:
+                    seen[reference] = line
+                if client["type"] == "truck":
+                    truck_rows.append((client["id"], amount, day, reference, client["name"]))
+                else:
+                    paid[client["id"]] = paid.get(client["id"], 0) + amount
+                    client_rows.append((client["id"], amount, day, reference, client["name"], client["type"]))
+
+            if result.errors or not (client_rows or truck_rows):
+                return result.finish()
+
+            conn.executemany("""
+                INSERT INTO payments (client_id, amount, date, note, reference, client_type)
+                VALUES (?, ?, ?, 'Payment received', ?, ?)
+            """, [(*r[:4], r[5]) for r in client_rows])
+
+            conn.executemany("""
+                INSERT INTO truck_payments (truck_id, amount, date, note, reference)
+                VALUES (?, ?, ?, 'Truck payment', ?)
+            """, [r[:4] for r in truck_rows])
+
+            # Centavos, so a bill paid in full is exactly 0
+            conn.executemany("""
+                UPDATE clients
+                SET bill = bill - ?,
+                    payment_status = CASE WHEN bill - ? = 0 THEN 'Paid' ELSE 'Unpaid' END
+                WHERE id = ?
+            """, [(total, total, client_id) for client_id, total in paid.items()])
+
+        result.applied = len(client_rows) + len(truck_rows)
+        result.total = sum(r[1] for r in client_rows + truck_rows)
+
+        if client_rows:
+            self.log_many("Recorded payment", [f"{r[4]}: {fmt(r[1])}" for r in client_rows])
+        if truck_rows:
+            self.log_many("Recorded truck payment", [f"{r[4]}: {fmt(r[1])}" for r in truck_rows])
+        self.log("Imported payments", f"{result.applied} payments from {source} ({fmt(result.total)})")
+        return result.finish()
+
+    def _check_payment(self, client, row, today):
+        # (message, amount, date); message is None for a good row
+        if client is None:
+            return f"unknown client or truck '{row.get('client', '')}'", None, None
+
+        try:
+            # Bank exports write 1,234.50 or ₱1,234.50
+            amount = to_cents(row.get("amount", "").replace(",", "").lstrip("₱"))
+        except ValueError:
+            amount = 0
+        if amount <= 0:
+            return f"amount '{row.get('amount', '')}' is not a positive amount", None, None
+
+        day = (row.get("date") or today)[:10]
+        try:
+            parse_day(day)
+        except ValueError:
+            return f"date '{row['date']}' is not YYYY-MM-DD", None, None
+        if day > today:
+            return f"date {day} is in the future", None, None
+
+        return None, amount, day
+
+    def _posted(self, conn, references):
+        # The references that either payments table already has
+        references = list(references)
+        posted = set()
+        for i in range(0, len(references), CHUNK):
+            chunk = references[i:i + CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for table in ("payments", "truck_payments"):
+                posted.update(r[0] for r in conn.execute(
+                    f"SELECT reference FROM {table} WHERE reference IN ({marks})", chunk
+                ))
+        return posted
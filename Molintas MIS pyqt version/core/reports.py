@@ -0,0 +1,87 @@
+# core/reports.py
+# Period report text (Reports page), read from the daily rollups
+#
+# Nothing here touches a widget, so the Reports page builds reports on
+# a query_runner worker thread.
+
+from money import fmt
+from periods import REPORT_MODES, period_range
+from rollups import get_period_totals, get_truck_totals, get_client_type_totals
+from core.service import Service
+
+SEPARATOR = "\n" + "=" * 50 + "\n\n"
+
+
+class ReportService(Service):
+    def build(self, mode, today=None):
+        """
+        Truck and client billing report for a Reports page mode
+        ("daily", "weekly", "monthly", "quarterly", "annual").
+        """
+        start, end = period_range(REPORT_MODES[mode], today)
+        label = mode.upper()
+        return (
+            self.truck_report(start, end, label)
+            + SEPARATOR
+            + self.billing_report(start, end, label)
+        )
+
+    # =========================
+    # Truck billing report (PER-TRUCK)
+    # =========================
+    def truck_report(self, start_date, end_date, label):
+        with self.session() as conn:
+            rows = get_truck_totals(conn, start_date, end_date)
+
+        total_charges = sum(r["charges"] for r in rows)
+        total_payments = sum(r["payments"] for r in rows)
+
+        text = f"🚚 TRUCK BILLING - {label} REPORT\n"
+        text += f"({start_date} to {end_date})\n"
+        text += "-" * 50 + "\n"
+
+        if total_charges == 0 and total_payments == 0:
+            return text + "No truck transactions for this period.\n"
+
+        text += f"Total Charges: {fmt(total_charges)}\n"
+        text += f"Total Payments: {fmt(total_payments)}\n"
+        text += f"Outstanding Balance: {fmt(total_charges - total_payments)}\n\n"
+
+        text += "Per Truck Breakdown:\n"
+        for r in rows:
+            bal = (r["charges"] or 0) - (r["payments"] or 0)
+            text += (
+                f"- {r['truck']}: "
+                f"Charges {fmt(r['charges'])}, "
+                f"Payments {fmt(r['payments'])}, "
+                f"Balance {fmt(bal)}\n"
+            )
+
+        return text
+
+    # =========================
+    # Client billing report
+    # =========================
+    def billing_report(self, start_date, end_date, label):
+        with self.session() as conn:
+            t = get_period_totals(conn, start_date, end_date)
+            types = get_client_type_totals(conn, start_date, end_date)
+
+        text = f"💧 CLIENT BILLING - {label} REPORT\n"
+        text += f"({start_date} to {end_date})\n"
+        text += "-" * 50 + "\n"
+        text += f"Usage Added: {t['usage_added']} m³\n"
+        text += f"Billing Added: {fmt(t['billing_added'])}\n"
+        text += f"Payments Collected: {fmt(t['collections'])}\n"
+
+        if types:
+            text += "\nBy Client Type:\n"
+            for r in types:
+                text += (
+                    f"- {r['type'].title()}: "
+                    f"Usage {r['usage_added']} m³, "
+                    f"Billing {fmt(r['billing_added'])}, "
+                    f"Collected {fmt(r['collections'])}\n"
+                )
+
+        return text
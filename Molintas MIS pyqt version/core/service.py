@@ -0,0 +1,54 @@
+# core/service.py
+# What every service shares: where the database is and where audit
+# entries go
+
+from audit import log_action, log_actions
+from db import db_session
+
+
+class ServiceError(ValueError):
+    """
+    A request the business rules refuse (bad amount, payment over the
+    bill, ...). str() is the message for the user, `title` the heading
+    the pages show it under.
+    """
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+class Service:
+    def __init__(self, session=None, audit=log_action):
+        # session: callable returning a db_session-style context manager
+        # audit:   log_action-style callable, or None to skip the log
+        self.session = session or db_session
+        self.audit = audit
+
+    def log(self, action, note=None):
+        if self.audit is not None:
+            self.audit("SYSTEM", action, note)
+
+    def log_many(self, action, notes):
+        # The app's audit log takes a batch in one write
+        if self.audit is log_action:
+            log_actions("SYSTEM", action, notes)
+        elif self.audit is not None:
+            for note in notes:
+                self.audit("SYSTEM", action, note)
+
+
+class RatedService(Service):
+    def __init__(self, session=None, audit=log_action, rates=None):
+        # rates: anything with rate_at(key, when) in centavos, e.g. a
+        # rates.RateSchedule; default is the app's cached settings
+        super().__init__(session, audit)
+        self._rates = rates
+
+    @property
+    def rates(self):
+        if self._rates is None:
+            # Qt (QObject) is only pulled in when the app's cache is used
+            from settings_service import get_settings
+            return get_settings()
+        return self._rates
@@ -0,0 +1,86 @@
+# core/trucks.py
+# Truck saloks, truck payments and balances (Truck Salok page)
+#
+# Amounts are integer centavos (see money.py); `when` is a
+# 'YYYY-MM-DD HH:MM:SS' timestamp, default now.
+
+from money import fmt
+from rates import now
+from truck_ledger import get_truck_balance
+from core.service import RatedService, ServiceError
+
+LOGS_SQL = """
+    SELECT COALESCE(c.name, 'Deleted truck #' || s.truck_id) AS truck,
+           s.drums, s.price, s.date, s.time
+    FROM truck_saloks s
+    LEFT JOIN clients c ON c.id = s.truck_id
+    WHERE s.date BETWEEN ? AND ?
+"""
+
+
+class TruckService(RatedService):
+    def price_at(self, when=None):
+        # Centavos per drum in effect at `when`
+        return self.rates.rate_at("PRICE_PER_DRUM", when)
+
+    def add_salok(self, truck_id, drums, when=None):
+        """
+        Records `drums` drums at the price in effect at `when`.
+        Returns the charge.
+        """
+        if drums <= 0:
+            raise ServiceError("Invalid Input", "Enter a valid number of drums.")
+
+        when = when or now()
+        price = self.price_at(when)
+
+        with self.session() as conn:
+            truck = self._require(conn, truck_id)
+            conn.execute("""
+                INSERT INTO truck_saloks (truck_id, drums, price, date, time)
+                VALUES (?, ?, ?, ?, ?)
+            """, (truck_id, drums, price, when[:10], when[11:]))
+
+        self.log("Added truck salok", f"{truck['name']}: {drums} drums ({fmt(drums * price)})")
+        return drums * price
+
+    def record_payment(self, truck_id, amount, when=None, note="Truck payment"):
+        if amount <= 0:
+            raise ServiceError("Invalid Input", "Enter a valid payment amount.")
+
+        with self.session() as conn:
+            truck = self._require(conn, truck_id)
+            conn.execute("""
+                INSERT INTO truck_payments (truck_id, amount, date, note)
+                VALUES (?, ?, ?, ?)
+            """, (truck_id, amount, (when or now())[:10], note))
+
+        self.log("Recorded truck payment", f"{truck['name']}: {fmt(amount)}")
+
+    def balance(self, truck_id):
+        """
+        (charges, payments, outstanding) for the truck, from the
+        trigger-maintained truck_balances row.
+        """
+        with self.session() as conn:
+            charges, payments, _ = get_truck_balance(conn, truck_id)
+        return charges, payments, charges - payments
+
+    def logs_query(self, start_date, end_date, truck_id=None):
+        """
+        (sql, params) listing saloks between two 'YYYY-MM-DD' dates,
+        newest first, for every truck or one.
+        """
+        sql, params = LOGS_SQL, [start_date, end_date]
+        if truck_id is not None:
+            sql += " AND s.truck_id = ?"
+            params.append(truck_id)
+        return sql + " ORDER BY s.date DESC, s.time DESC", params
+
+    def _require(self, conn, truck_id):
+        truck = conn.execute(
+            "SELECT name FROM clients WHERE id = ? AND type = 'truck'", (truck_id,)
+        ).fetchone()
+        if not truck:
+            raise ServiceError("Select Truck", "Please select a truck.")
+        return truck
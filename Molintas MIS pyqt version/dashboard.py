@@ -7,17 +7,33 @@ from PyQt6.QtWidgets import (
     QStackedWidget, QMessageBox, QFrame
 )
 from PyQt6.QtCore import Qt, pyqtSignal
-from datetime import date
-from db import get_db_conn
-
-from pages.clients import ClientsPage
-from pages.billing import BillingPage
-from pages.trucks import TrucksPage
-from pages.reports import ReportsPage
-from pages.settings import SettingsPage
-from pages.users import UsersPage
-from pages.audit_logs import AuditLogsPage   # ✅ ADD THIS
+import importlib
+from summary import get_dashboard_summary
+from query_runner import get_runner
+from startup_timing import timed, print_report
+import profiling
 from audit import log_action
+from money import fmt
+
+
+# ===================================================
+# Page registry
+# ===================================================
+# Sidebar name -> (module, class, admin only), in sidebar order.
+# A page's module is imported and the page built the first time it is
+# opened, so logging in only pays for the Dashboard page.
+
+PAGES = {
+    "Dashboard": (__name__, "DashboardSummaryPage", False),
+    "Clients": ("pages.clients", "ClientsPage", False),
+    "Billing": ("pages.billing", "BillingPage", False),
+    "Truck Salok": ("pages.trucks", "TrucksPage", False),
+    "Reports": ("pages.reports", "ReportsPage", False),
+    "Users": ("pages.users", "UsersPage", True),
+    "Audit Logs": ("pages.audit_logs", "AuditLogsPage", True),
+    "Settings": ("pages.settings", "SettingsPage", True),
+    "Performance": ("pages.performance", "PerformancePage", True),
+}
 
 
 # ===================================================
@@ -61,45 +77,18 @@ class DashboardWindow(QMainWindow):
         self.page_title.setStyleSheet("font-size: 18px; font-weight: bold;")
         content_layout.addWidget(self.page_title)
 
-        self.stack = QStackedWidget()
-
         # ================= Pages =================
-        self.page_dashboard = DashboardSummaryPage(self)
-        self.page_clients = ClientsPage()
-        self.page_billing = BillingPage()
-        self.page_trucks = TrucksPage()
-        self.page_reports = ReportsPage()
-        self.page_users = UsersPage()
-        self.page_audit_logs = AuditLogsPage()     # ✅ ADD THIS
-        self.page_settings = SettingsPage()
-
-        # Add pages to stack
-        self.stack.addWidget(self.page_dashboard)
-        self.stack.addWidget(self.page_clients)
-        self.stack.addWidget(self.page_billing)
-        self.stack.addWidget(self.page_trucks)
-        self.stack.addWidget(self.page_reports)
-        self.stack.addWidget(self.page_users)
-
-        if self.role == "admin":
-            self.stack.addWidget(self.page_audit_logs)   # ✅ ADD THIS
-            self.stack.addWidget(self.page_settings)
-
+        # Built on first visit, see page()
+        self.stack = QStackedWidget()
+        self.pages = {}           # name -> page
         content_layout.addWidget(self.stack)
 
         # ================= Sidebar Buttons =================
         self.sidebar_buttons = {}
 
-        self.add_btn(sidebar_layout, "Dashboard", self.page_dashboard)
-        self.add_btn(sidebar_layout, "Clients", self.page_clients)
-        self.add_btn(sidebar_layout, "Billing", self.page_billing)
-        self.add_btn(sidebar_layout, "Truck Salok", self.page_trucks)
-        self.add_btn(sidebar_layout, "Reports", self.page_reports)
-
-        if self.role == "admin":
-            self.add_btn(sidebar_layout, "Users", self.page_users)
-            self.add_btn(sidebar_layout, "Audit Logs", self.page_audit_logs)  # ✅ BUTTON
-            self.add_btn(sidebar_layout, "Settings", self.page_settings)
+        for name in PAGES:
+            if self.can_open(name):
+                self.add_btn(sidebar_layout, name)
 
         sidebar_layout.addStretch()
 
@@ -112,23 +101,58 @@ class DashboardWindow(QMainWindow):
         main_layout.addWidget(content_widget)
         self.setCentralWidget(main_widget)
 
-        self.switch_page("Dashboard", self.page_dashboard)
+        # Busy cursor while background queries are running
+        self.loading_channels = set()
+        get_runner().loading.connect(self.on_loading)
+
+        self.switch_page("Dashboard")
 
     # -------------------------------------------------
     # Sidebar helpers
     # -------------------------------------------------
-    def add_btn(self, layout, name, page):
+    def add_btn(self, layout, name):
         btn = QPushButton(name)
-        btn.clicked.connect(lambda: self.switch_page(name, page))
+        btn.clicked.connect(profiling.slot(lambda *_: self.switch_page(name), f"open {name}"))
         btn.setStyleSheet(self.btn_style(False))
         layout.addWidget(btn)
         self.sidebar_buttons[name] = btn
 
-    def switch_page(self, name, page):
+    def can_open(self, name):
+        return self.role == "admin" or not PAGES[name][2]
+
+    def page(self, name):
+        """
+        Returns the page called `name`, building it on first use.
+        """
+        page = self.pages.get(name)
+        if page is not None:
+            return page
+
+        if not self.can_open(name):
+            raise PermissionError(f"{name} is for admins only")
+
+        module_name, class_name, _ = PAGES[name]
+        with timed(f"page {name}"):
+            page_class = getattr(importlib.import_module(module_name), class_name)
+            page = page_class(self) if page_class is DashboardSummaryPage else page_class()
+
+        self.pages[name] = page
+        self.stack.addWidget(page)
+        return page
+
+    def switch_page(self, name):
+        # A page that was just built has loaded its data already
+        fresh = name not in self.pages
+        page = self.page(name)
+
         self.stack.setCurrentWidget(page)
         self.page_title.setText(f"Dashboard > {name}")
 
-        if hasattr(page, "refresh"):
+        if fresh:
+            # Pages opened after login get their own timing line
+            if self.isVisible():
+                print_report(f"{name} page")
+        elif hasattr(page, "refresh"):
             page.refresh()
         elif hasattr(page, "load_clients"):
             page.load_clients()
@@ -141,6 +165,17 @@ class DashboardWindow(QMainWindow):
         for k, b in self.sidebar_buttons.items():
             b.setStyleSheet(self.btn_style(k == name))
 
+    def on_loading(self, channel, loading):
+        if loading:
+            self.loading_channels.add(channel)
+        else:
+            self.loading_channels.discard(channel)
+
+        if self.loading_channels:
+            self.setCursor(Qt.CursorShape.BusyCursor)
+        else:
+            self.unsetCursor()
+
     def btn_style(self, active):
         return (
             "background-color:#83c5be;color:black;font-weight:bold;padding:10px;text-align:left;"
@@ -214,6 +249,8 @@ class DashboardSummaryPage(QWidget):
         self.cards["today"].clicked.connect(lambda: self.goto("Reports"))
         self.cards["month"].clicked.connect(lambda: self.goto("Reports"))
 
+        self.refresh()
+
     def make_card(self, title):
         frame = ClickableCard()
         frame.setCursor(Qt.CursorShape.PointingHandCursor)
@@ -231,75 +268,23 @@ class DashboardSummaryPage(QWidget):
         return frame
 
     def refresh(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-        today = date.today().strftime("%Y-%m-%d")
-
-        cur.execute("""
-            SELECT COUNT(*) FROM clients
-            WHERE payment_status='Unpaid'
-            AND status='Active'
-            AND type IN ('household','apartment')
-        """)
-        unpaid = cur.fetchone()[0]
-
-        cur.execute("""
-            SELECT COUNT(*) FROM clients
-            WHERE status='Active'
-            AND type IN ('household','apartment')
-        """)
-        active = cur.fetchone()[0]
-
-        cur.execute("""
-            SELECT COUNT(*) FROM clients
-            WHERE status='Inactive'
-            AND type IN ('household','apartment')
-        """)
-        inactive = cur.fetchone()[0]
-
-        cur.execute("SELECT COUNT(*) FROM clients WHERE type='truck'")
-        trucks_count = cur.fetchone()[0]
-
-        cur.execute("""
-            SELECT SUM(bill) FROM clients
-            WHERE payment_status='Unpaid'
-            AND status='Active'
-            AND type IN ('household','apartment')
-        """)
-        clients_money = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT SUM(drums * price) FROM truck_saloks")
-        trucks_money = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT SUM(amount) FROM payments WHERE date = ?", (today,))
-        today_money = cur.fetchone()[0] or 0
-
-        cur.execute("""
-            SELECT SUM(amount) FROM payments
-            WHERE strftime('%Y-%m', date) = strftime('%Y-%m', 'now')
-        """)
-        month_money = cur.fetchone()[0] or 0
-
-        conn.close()
-
-        self.cards["unpaid"].value_label.setText(str(unpaid))
-        self.cards["active"].value_label.setText(str(active))
-        self.cards["inactive"].value_label.setText(str(inactive))
-        self.cards["trucks_count"].value_label.setText(str(trucks_count))
-        self.cards["clients_money"].value_label.setText(f"{clients_money:.2f}")
-        self.cards["trucks_money"].value_label.setText(f"{trucks_money:.2f}")
-        self.cards["today"].value_label.setText(f"{today_money:.2f}")
-        self.cards["month"].value_label.setText(f"{month_money:.2f}")
+        # Cache hits come back almost at once; a miss no longer blocks
+        get_runner().submit(
+            "dashboard",
+            get_dashboard_summary,
+            on_result=self.show_summary
+        )
+
+    def show_summary(self, summary):
+        for key in ["unpaid", "active", "inactive", "trucks_count"]:
+            self.cards[key].value_label.setText(str(summary[key]))
+
+        # Centavos; the card titles already say (₱)
+        for key in ["clients_money", "trucks_money", "today", "month"]:
+            self.cards[key].value_label.setText(fmt(summary[key], symbol=""))
 
     def goto(self, page_name):
-        pages = {
-            "Clients": self.parent_dashboard.page_clients,
-            "Billing": self.parent_dashboard.page_billing,
-            "Truck Salok": self.parent_dashboard.page_trucks,
-            "Reports": self.parent_dashboard.page_reports,
-            "Audit Logs": self.parent_dashboard.page_audit_logs,
-        }
-        self.parent_dashboard.switch_page(page_name, pages[page_name])
+        self.parent_dashboard.switch_page(page_name)
 
     def card_style(self, color):
         return f"""
@@ -0,0 +1,304 @@
+# datagen.py
+# Synthetic data at production volumes, written to a scratch database
+#
+# Builds a fresh database (init_db, all migrations) and fills it with
+# years of history ending today:
+#   clients         households / apartments (some Commercial, a few
+#                   Inactive) and trucks
+#   usage_events    one meter reading per client per month, charged at
+#                   the rate in effect that day
+#   payments        most bills paid in full a few days later, some in part
+#   rate_schedule   one rate increase at the start of every year
+#   truck_saloks    every truck, every day, around `saloks_per_day`
+#   truck_payments  each truck settles most weeks on Saturday
+#   logs            around `logs_per_day` audit entries a day
+# The ledgers and rollups are kept by the triggers as rows go in, and
+# clients.usage / bill are rebuilt from the events at the end.
+#
+# Never writes to molintas_full.db:
+#   python datagen.py scratch.db
+#   python datagen.py scratch.db --households 20000 --trucks 300 --years 5 --force
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from db import DB_PATH
+from init_db import init_db
+from money import charge, to_pesos
+from rates import RATE_KEYS, RateSchedule, add_rate, default_rate, rate_key
+from usage_ledger import rebuild_clients
+
+SURNAMES = [
+    "Dela Cruz", "Santos", "Reyes", "Bautista", "Villanueva",
+    "Mendoza", "Garcia", "Fernandez", "Aquino", "Ramos",
+    "Castillo", "Navarro", "Torres", "Flores", "Gonzales"
+]
+
+# Average monthly m³ per reading
+AVERAGE_USAGE = {"household": 18, "apartment": 35}
+
+LOG_ACTIONS = [
+    "Added usage", "Recorded payment", "Added truck salok",
+    "Recorded truck payment", "Logged in"
+]
+
+DEFAULTS = {
+    "households": 2000,
+    "apartments": 400,
+    "trucks": 60,
+    "years": 3,
+    "saloks_per_day": 2,
+    "logs_per_day": 150,
+    "commercial": 0.1,          # share of billed clients on COM_RATE
+}
+
+READING_DAY = 25                # meter readings, each month
+
+
+def _day(d):
+    return d.strftime("%Y-%m-%d")
+
+
+def _clock(rng, first_hour=6, last_hour=18):
+    return f"{rng.randint(first_hour, last_hour - 1):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}"
+
+
+def _schedule_rates(conn, first, years):
+    # 5% more every year; the first year keeps the default rates
+    for key in RATE_KEYS:
+        base = default_rate(key)
+        for year in range(1, years):
+            add_rate(conn, key, round(base * 1.05 ** year),
+                     _day(first + timedelta(days=365 * year)) + " 00:00:00")
+
+    schedule = RateSchedule.load(conn)
+    conn.executemany(
+        "UPDATE settings SET value = ? WHERE key = ?",
+        [(float(to_pesos(schedule.rate_at(key))), key) for key in RATE_KEYS]
+    )
+    return schedule
+
+
+def _add_clients(conn, rng, households, apartments, trucks, commercial):
+    rows = []
+    for kind, count in (("household", households), ("apartment", apartments)):
+        for i in range(count):
+            rows.append((
+                f"{rng.choice(SURNAMES)} {kind.title()} {i:05d}",
+                kind,
+                "Commercial" if rng.random() < commercial else "Residential",
+                "Inactive" if rng.random() < 0.05 else "Active",
+                f"Purok {rng.randint(1, 12)}",
+                f"09{rng.randrange(10 ** 9):09d}",
+            ))
+    for i in range(trucks):
+        rows.append((
+            f"{rng.choice(SURNAMES)} Water Hauling {i:04d}",
+            "truck", None, "Active",
+            f"Purok {rng.randint(1, 12)}",
+            f"09{rng.randrange(10 ** 9):09d}",
+        ))
+
+    conn.executemany("""
+        INSERT INTO clients (name, type, billing_type, usage, bill, status, payment_status, address, contact)
+        VALUES (?, ?, ?, 0, 0, ?, 'Unpaid', ?, ?)
+    """, rows)
+
+    return conn.execute("SELECT id, type, billing_type FROM clients").fetchall()
+
+
+def _readings(first, last):
+    d = first.replace(day=READING_DAY)
+    if d < first:
+        d = (d + timedelta(days=31)).replace(day=READING_DAY)
+    while d <= last:
+        yield d
+        d = (d + timedelta(days=31)).replace(day=READING_DAY)
+
+
+def _add_billing(conn, rng, clients, schedule, first, last):
+    events, payments = [], []
+
+    for client_id, kind, billing_type in clients:
+        if kind == "truck":
+            continue
+
+        average = AVERAGE_USAGE[kind] * (2 if billing_type == "Commercial" else 1)
+        for d in _readings(first, last):
+            created_at = f"{_day(d)} {_clock(rng, 8, 17)}"
+            usage = round(max(1.0, rng.gauss(average, average * 0.3)), 2)
+            rate = schedule.rate_at(rate_key(billing_type), created_at)
+            amount = charge(usage, rate)
+            events.append((client_id, kind, usage, rate, amount, created_at))
+
+            # Never more than the reading's charge, so bills stay >= 0
+            paid_on = d + timedelta(days=rng.randint(1, 10))
+            roll = rng.random()
+            if paid_on > last or roll >= 0.95:
+                continue
+            if roll >= 0.85:
+                amount = amount * rng.randint(20, 80) // 100
+            payments.append((client_id, kind, amount, _day(paid_on)))
+
+    conn.executemany("""
+        INSERT INTO usage_events (client_id, client_type, usage, rate, charge, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, events)
+    conn.executemany(
+        "INSERT INTO payments (client_id, client_type, amount, date, note) VALUES (?, ?, ?, ?, 'Payment received')",
+        payments
+    )
+
+
+def _add_trucks(conn, rng, clients, schedule, first, last, saloks_per_day):
+    trucks = [client_id for client_id, kind, _ in clients if kind == "truck"]
+    week = dict.fromkeys(trucks, 0)
+    truck_payments = []
+
+    def saloks():
+        d = first
+        while d <= last:
+            for truck_id in trucks:
+                for _ in range(rng.randint(0, 2 * saloks_per_day)):
+                    drums = rng.randint(2, 12)
+                    clock = _clock(rng)
+                    price = schedule.rate_at("PRICE_PER_DRUM", f"{_day(d)} {clock}")
+                    week[truck_id] += drums * price
+                    yield truck_id, drums, price, _day(d), clock
+
+            # Saturday: most trucks settle the week, in full or nearly
+            if d.weekday() == 5:
+                for truck_id in trucks:
+                    if week[truck_id] and rng.random() < 0.9:
+                        truck_payments.append((
+                            truck_id,
+                            week[truck_id] * rng.randint(80, 100) // 100,
+                            _day(d)
+                        ))
+                    week[truck_id] = 0
+            d += timedelta(days=1)
+
+    conn.executemany(
+        "INSERT INTO truck_saloks (truck_id, drums, price, date, time) VALUES (?, ?, ?, ?, ?)",
+        saloks()
+    )
+    conn.executemany(
+        "INSERT INTO truck_payments (truck_id, amount, date, note) VALUES (?, ?, ?, 'Truck payment')",
+        truck_payments
+    )
+
+
+def _add_logs(conn, rng, first, last, logs_per_day):
+    def logs():
+        d = first
+        while d <= last:
+            for _ in range(rng.randint(logs_per_day // 2, logs_per_day * 3 // 2)):
+                yield (
+                    rng.choice(["admin", "staff", "SYSTEM"]),
+                    rng.choice(LOG_ACTIONS),
+                    None,
+                    f"{_day(d)} {_clock(rng, 7, 19)}"
+                )
+            d += timedelta(days=1)
+
+    conn.executemany(
+        "INSERT INTO logs (username, action, note, datetime) VALUES (?, ?, ?, ?)",
+        logs()
+    )
+
+
+def generate(path, households=2000, apartments=400, trucks=60, years=3,
+             saloks_per_day=2, logs_per_day=150, commercial=0.1,
+             seed=1, today=None):
+    """
+    Builds a new database at `path` holding `years` of history up to
+    `today`. The same arguments and seed give the same rows.
+    Returns {table: row count}.
+    """
+    path = Path(path)
+    if path.resolve() == Path(DB_PATH).resolve():
+        raise ValueError("datagen never writes to the live database")
+    if path.exists():
+        raise FileExistsError(f"{path} already exists")
+
+    rng = random.Random(seed)
+    last = today or date.today()
+    first = last - timedelta(days=365 * years - 1)
+
+    init_db(path)
+    conn = sqlite3.connect(path)
+    try:
+        schedule = _schedule_rates(conn, first, years)
+        clients = _add_clients(conn, rng, households, apartments, trucks, commercial)
+        _add_billing(conn, rng, clients, schedule, first, last)
+        _add_trucks(conn, rng, clients, schedule, first, last, saloks_per_day)
+        _add_logs(conn, rng, first, last, logs_per_day)
+
+        rebuild_clients(conn)
+        conn.execute("""
+            UPDATE clients
+            SET payment_status = CASE WHEN bill = 0 THEN 'Paid' ELSE 'Unpaid' END
+            WHERE type <> 'truck'
+        """)
+        conn.commit()
+        conn.execute("ANALYZE")
+
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("clients", "usage_events", "payments",
+                          "truck_saloks", "truck_payments", "logs")
+        }
+    finally:
+        conn.close()
+
+
+def add_volume_arguments(parser):
+    # Shared with load_test.py
+    parser.add_argument("--households", type=int, default=DEFAULTS["households"])
+    parser.add_argument("--apartments", type=int, default=DEFAULTS["apartments"])
+    parser.add_argument("--trucks", type=int, default=DEFAULTS["trucks"])
+    parser.add_argument("--years", type=int, default=DEFAULTS["years"])
+    parser.add_argument("--saloks-per-day", type=int, default=DEFAULTS["saloks_per_day"],
+                        help="average saloks per truck per day")
+    parser.add_argument("--logs-per-day", type=int, default=DEFAULTS["logs_per_day"])
+    parser.add_argument("--commercial", type=float, default=DEFAULTS["commercial"],
+                        help="share of billed clients on the commercial rate")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def volumes(args):
+    return {name: getattr(args, name) for name in DEFAULTS} | {"seed": args.seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a scratch database with synthetic data.")
+    parser.add_argument("path", help="database to create (never molintas_full.db)")
+    parser.add_argument("--force", action="store_true", help="replace the file if it exists")
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if args.force and path.exists() and path.resolve() != Path(DB_PATH).resolve():
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    started = time.perf_counter()
+    try:
+        counts = generate(path, **volumes(args))
+    except (ValueError, FileExistsError) as e:
+        print(e)
+        sys.exit(1)
+
+    for table, rows in counts.items():
+        print(f"{table:<16} {rows:>10,}")
+    print(f"Generated {path} in {time.perf_counter() - started:.1f} s "
+          f"({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
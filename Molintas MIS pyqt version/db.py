@@ -2,21 +2,299 @@
 # Handles all database-related functions
 
 import hashlib
+import os
 
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from queue import LifoQueue, Empty, Full
+
+import profiling
+from migrations import migrate
 
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "molintas_full.db"
 
+# How many idle connections we keep around for reuse.
+# The GUI thread normally needs one; the rest are for worker threads.
+POOL_SIZE = 4
+
+
+# =========================
+# PRAGMA profile
+# =========================
+# Applied once to every connection we open (pool and init_db).
+# WAL lets the counter keep reading while another workstation writes.
+#
+# Any entry can be overridden without code changes, e.g.
+#   MOLINTAS_PRAGMAS="journal_mode=DELETE,cache_size=-8000"
+# (WAL needs all users on the same machine; use DELETE if the
+# database file sits on a network share.)
+PRAGMA_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",          # safe with WAL, far fewer fsyncs
+    "cache_size": -16000,             # negative = KiB, so ~16 MB
+    "mmap_size": 64 * 1024 * 1024,    # 64 MB memory-mapped reads
+    "temp_store": "MEMORY",
+    "wal_autocheckpoint": 1000,       # pages, checkpoint after ~4 MB of WAL
+}
+
+# Checkpoint run when the app closes the pool.
+# TRUNCATE folds the WAL back into molintas_full.db and empties it,
+# so the .db file alone is a complete copy (backups rely on this).
+CHECKPOINT_ON_CLOSE = "TRUNCATE"
+
+
+def get_pragma_profile():
+    profile = dict(PRAGMA_PROFILE)
+
+    override = os.environ.get("MOLINTAS_PRAGMAS", "")
+    for item in override.split(","):
+        if "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        profile[key.strip()] = value.strip()
+
+    return profile
+
+
+def apply_pragmas(conn, profile=None):
+    if profile is None:
+        profile = get_pragma_profile()
+
+    for key, value in profile.items():
+        conn.execute(f"PRAGMA {key} = {value};")
+
+
+def checkpoint(conn, mode="PASSIVE"):
+    """
+    Copies WAL pages back into the main database file.
+    Returns (busy, wal_pages, checkpointed_pages).
+    """
+    return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone())
+
+
+# =========================
+# Pooled connection
+# =========================
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that goes back to the pool on close()
+    instead of being thrown away, so old-style code like
+
+        conn = get_db_conn()
+        ...
+        conn.close()
+
+    keeps working without paying for a new connect every time.
+    """
+
+    pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            sqlite3.Connection.close(self)
+
+    def close_for_real(self):
+        sqlite3.Connection.close(self)
+
+
+class TracingConnection(PooledConnection):
+    """
+    Used instead of PooledConnection when profiling is on
+    (MOLINTAS_PROFILE=1): every statement goes through a
+    profiling.TracingCursor, which records its SQL, rows and time.
+    """
+
+    def cursor(self, factory=profiling.TracingCursor):
+        return super().cursor(factory)
+
+    # sqlite3's own shortcuts skip cursor(), so route them through it
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# =========================
+# Connection pool
+# =========================
+class ConnectionPool:
+    """
+    Small, thread-aware pool of long-lived SQLite connections.
+
+    - PRAGMAs are applied once when a connection is opened
+    - session() reuses the same connection for nested calls on one
+      thread, so a click that touches the database several times only
+      borrows one connection
+    - idle connections are kept (up to `size`) for the next caller
+    """
+
+    def __init__(self, path, size=POOL_SIZE, timeout=5):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = LifoQueue(maxsize=size)
+        self._local = threading.local()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            factory=TracingConnection if profiling.enabled() else PooledConnection
+        )
+        conn.pool = self
+        conn.row_factory = sqlite3.Row
+
+        # Allow SQLite to wait if database is busy
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)};")
+        apply_pragmas(conn)
+
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            return self._open()
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            conn.close_for_real()
+
+    @contextmanager
+    def session(self):
+        """
+        Borrow a connection for the current thread.
+        Commits when the outermost block finishes, rolls back on error.
+        """
+        local = self._local
+        if getattr(local, "conn", None) is not None:
+            local.depth += 1
+            try:
+                yield local.conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self.acquire()
+        local.conn = conn
+        local.depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            local.conn = None
+            local.depth = 0
+            self.release(conn)
+
+    def checkpoint(self, mode="PASSIVE"):
+        with self.session() as conn:
+            return checkpoint(conn, mode)
+
+    def restore(self, source):
+        """
+        Replaces the whole database with the database file `source`.
+
+        Goes through SQLite's backup API on a pooled connection, so the
+        pages land in the WAL like any other write and every open
+        connection sees the restored data. Copying over the open file
+        would leave the old -wal / -shm behind and corrupt it.
+
+        A backup from an older version is migrated in memory first, so
+        the live database never holds a schema the app does not know,
+        and a backup that cannot be migrated leaves it untouched.
+        """
+        src = sqlite3.connect(f"file:{Path(source).resolve()}?mode=ro", uri=True)
+        try:
+            ok = src.execute("PRAGMA quick_check;").fetchone()[0] == "ok"
+            has_clients = src.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clients'"
+            ).fetchone()
+            if not (ok and has_clients):
+                raise sqlite3.DatabaseError(f"{Path(source).name} is not a Molintas database")
+
+            staged = sqlite3.connect(":memory:")
+            try:
+                src.backup(staged)
+                migrate(staged)
+                with self.session() as conn:
+                    staged.backup(conn)
+            finally:
+                staged.close()
+        finally:
+            src.close()
+
+        # Fold it into the .db file now, as close_all() would
+        try:
+            self.checkpoint("TRUNCATE")
+        except sqlite3.OperationalError as e:
+            print("CHECKPOINT SKIPPED:", e)
+
+    def close_all(self, checkpoint_mode=CHECKPOINT_ON_CLOSE):
+        if checkpoint_mode:
+            try:
+                self.checkpoint(checkpoint_mode)
+            except sqlite3.OperationalError as e:
+                # Another workstation may still be reading; the next
+                # autocheckpoint will catch up.
+                print("CHECKPOINT SKIPPED:", e)
+
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            conn.close_for_real()
+
+
+_pool = ConnectionPool(DB_PATH)
+
+
+def get_pool():
+    return _pool
+
+
 def get_db_conn():
-    conn = sqlite3.connect(DB_PATH, timeout=5)
-    conn.row_factory = sqlite3.Row
+    # Borrowed from the pool, conn.close() hands it back
+    return _pool.acquire()
+
 
-    # Allow SQLite to wait if database is busy
-    conn.execute("PRAGMA busy_timeout = 5000;")
+def db_session():
+    """
+    Preferred way to talk to the database:
+
+        with db_session() as conn:
+            conn.execute(...)
+    """
+    return _pool.session()
+
+
+def checkpoint_db(mode="PASSIVE"):
+    return _pool.checkpoint(mode)
+
+
+def close_db():
+    _pool.close_all()
+
+
+def restore_db(source):
+    _pool.restore(source)
 
-    return conn
 
 def hash_password(password):
     # Same hashing logic as your Tkinter app
@@ -28,15 +306,11 @@ def check_login(username, password):
     Checks username and password against the database.
     Returns: (True, role) or (False, None)
     """
-    conn = get_db_conn()
-    cur = conn.cursor()
-
-    cur.execute(
-        "SELECT password_hash, role FROM users WHERE username = ?",
-        (username,)
-    )
-    row = cur.fetchone()
-    conn.close()
+    with db_session() as conn:
+        row = conn.execute(
+            "SELECT password_hash, role FROM users WHERE username = ?",
+            (username,)
+        ).fetchone()
 
     if not row:
         return False, None
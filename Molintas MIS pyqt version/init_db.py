@@ -6,16 +6,29 @@ import sqlite3
 import hashlib
 from pathlib import Path
 
+from db import apply_pragmas
+from migrations import migrate
+
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "molintas_full.db"
 
+# Also the fallback when a row is missing (see settings_service.py)
+DEFAULT_SETTINGS = {
+    "RES_RATE": 37,          # household/apartment rate per cubic meter
+    "COM_RATE": 50,          # commercial rate per cubic meter
+    "PRICE_PER_DRUM": 7      # truck salok price
+}
+
 
 def hash_password(password):
     return hashlib.sha256(password.encode("utf-8")).hexdigest()
 
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
+def create_tables(conn):
+    """
+    The base schema (version 0) and default rows. migrate() takes it
+    from there.
+    """
     cur = conn.cursor()
 
     # =========================
@@ -130,19 +143,23 @@ def init_db():
     # =========================
     # DEFAULT SETTINGS (₱ PER m³)
     # =========================
-    default_settings = {
-        "RES_RATE": 37,          # household/apartment rate per cubic meter
-        "COM_RATE": 50,          # commercial rate per cubic meter
-        "PRICE_PER_DRUM": 7      # truck salok price
-    }
-
-    for key, value in default_settings.items():
+    for key, value in DEFAULT_SETTINGS.items():
         cur.execute(
             "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
             (key, value)
         )
 
     conn.commit()
+
+
+def init_db(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    apply_pragmas(conn)
+    create_tables(conn)
+
+    # Indexes and later schema changes
+    migrate(conn)
+
     conn.close()
     print("✅ Database rebuilt successfully.")
 
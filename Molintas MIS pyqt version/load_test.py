@@ -0,0 +1,210 @@
+# load_test.py
+# Replays a day of counter work against a scratch database and reports
+# p50 / p95 / p99 latency per operation
+#
+# The day is a shuffled mix of OPERATIONS (usage entries, payments,
+# saloks, list / summary / dashboard / report refreshes), run back to
+# back through the core services with the audit log on, the way the
+# pages run them. Exits 1 when an operation's p95 is over its budget,
+# so a slower build shows up before it reaches the office.
+#
+# Never writes to molintas_full.db:
+#   python load_test.py                               (datagen volumes)
+#   python load_test.py --households 20000 --years 5 --operations 5000
+#   python load_test.py --source molintas_full.db     (replays on a copy)
+
+import argparse
+import math
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import db
+import summary
+from audit import shutdown_audit
+from core import BillingService, ClientService, ReportService, ServiceError, TruckService
+from core.clients import BILLABLE_SQL
+from datagen import add_volume_arguments, generate, volumes
+from migrations import migrate
+from periods import REPORT_MODES, period_range
+from rates import RateSchedule
+
+# name: (share of the day's operations, p95 budget in ms)
+OPERATIONS = {
+    "add usage": (30, 25),
+    "record payment": (25, 25),
+    "add salok": (20, 25),
+    "truck payment": (5, 25),
+    "billing list": (8, 50),
+    "truck summary": (5, 25),
+    "dashboard": (5, 100),
+    "report": (2, 500),
+}
+
+# Rows the page models read per batch (pages.table_model.BATCH_SIZE)
+PAGE_ROWS = 200
+
+
+def copy_database(source, path):
+    # SQLite's backup API: a consistent copy even with a live WAL, and
+    # the source is opened read-only
+    src = sqlite3.connect(f"file:{Path(source).resolve()}?mode=ro", uri=True)
+    dst = sqlite3.connect(path)
+    src.backup(dst)
+    src.close()
+    migrate(dst)
+    dst.close()
+
+
+class CounterDay:
+    """
+    The operations of OPERATIONS as callables over the app's services,
+    drawing clients, trucks and amounts from `rng`.
+    """
+
+    def __init__(self, rng, schedule):
+        self.rng = rng
+        self.clients = ClientService()
+        self.billing = BillingService(rates=schedule)
+        self.trucks = TruckService(rates=schedule)
+        self.reports = ReportService()
+
+        with db.db_session() as conn:
+            self.billable = [r[0] for r in conn.execute(
+                "SELECT id FROM clients WHERE type <> 'truck' "
+                "AND billing_type IS NOT NULL AND status = 'Active'"
+            )]
+            self.truck_ids = [r[0] for r in conn.execute(
+                "SELECT id FROM clients WHERE type = 'truck'"
+            )]
+
+    def add_usage(self):
+        self.billing.add_usage(self.rng.choice(self.billable), round(self.rng.uniform(5, 40), 2))
+
+    def record_payment(self):
+        client_id = self.rng.choice(self.billable)
+        bill = self.clients.get(client_id)["bill"]
+        if bill > 0:
+            self.billing.record_payment(client_id, min(bill, self.rng.randint(100, 300000)))
+
+    def add_salok(self):
+        self.trucks.add_salok(self.rng.choice(self.truck_ids), self.rng.randint(2, 12))
+
+    def truck_payment(self):
+        self.trucks.record_payment(self.rng.choice(self.truck_ids), self.rng.randint(1000, 200000))
+
+    def billing_list(self):
+        with db.db_session() as conn:
+            conn.execute(f"{BILLABLE_SQL} LIMIT ? OFFSET 0", (PAGE_ROWS,)).fetchall()
+
+    def truck_summary(self):
+        truck_id = self.rng.choice(self.truck_ids)
+        today, _ = period_range("today")
+        self.trucks.balance(truck_id)
+        sql, params = self.trucks.logs_query(today, today, truck_id)
+        with db.db_session() as conn:
+            conn.execute(f"{sql} LIMIT ? OFFSET 0", [*params, PAGE_ROWS]).fetchall()
+
+    def dashboard(self):
+        summary.get_dashboard_summary()
+
+    def report(self):
+        self.reports.build(self.rng.choice(list(REPORT_MODES)))
+
+    def run(self, name):
+        return getattr(self, name.replace(" ", "_"))()
+
+
+def percentile(ordered, q):
+    # Nearest rank
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def replay(path, operations, seed):
+    """
+    Runs `operations` operations on the database at `path`.
+    Returns {name: [milliseconds, ...]}.
+    """
+    # Point the app's pool (summary, audit log) at the scratch database
+    db.DB_PATH = path
+    db._pool = db.ConnectionPool(path)
+
+    with db.db_session() as conn:
+        schedule = RateSchedule.load(conn)
+
+    rng = random.Random(seed)
+    day = CounterDay(rng, schedule)
+
+    names = list(OPERATIONS)
+    plan = rng.choices(names, weights=[OPERATIONS[n][0] for n in names], k=operations)
+
+    latencies = {name: [] for name in names}
+    for name in plan:
+        started = time.perf_counter()
+        try:
+            day.run(name)
+        except ServiceError:
+            pass            # refused requests are timed too
+        latencies[name].append((time.perf_counter() - started) * 1000)
+
+    shutdown_audit()
+    db.close_db()
+    return latencies
+
+
+def print_report(latencies):
+    """
+    Prints one line per operation. Returns the operations over budget.
+    """
+    over = []
+    print(f"{'operation':<16} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  budget")
+    for name, times in latencies.items():
+        if not times:
+            continue
+        times.sort()
+        p95 = percentile(times, 0.95)
+        budget = OPERATIONS[name][1]
+        status = "ok" if p95 <= budget else "OVER"
+        if status == "OVER":
+            over.append(name)
+        print(
+            f"{name:<16} {len(times):>6} "
+            f"{percentile(times, 0.50):8.2f} {p95:8.2f} {percentile(times, 0.99):8.2f} "
+            f"{times[-1]:8.2f}  {budget} ms {status}"
+        )
+    return over
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a day of counter work and report latencies.")
+    parser.add_argument("--source", help="replay on a copy of this database instead of generated data")
+    parser.add_argument("--operations", type=int, default=2000)
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "load.db"
+
+        started = time.perf_counter()
+        if args.source:
+            copy_database(args.source, path)
+        else:
+            generate(path, **volumes(args))
+        print(f"Prepared {path.stat().st_size / 1e6:.1f} MB database in {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        latencies = replay(path, args.operations, args.seed)
+        print(f"Replayed {args.operations} operations in {time.perf_counter() - started:.1f} s")
+        print()
+
+    over = print_report(latencies)
+    if over:
+        print(f"\np95 over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
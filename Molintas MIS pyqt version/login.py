@@ -5,11 +5,13 @@ from PyQt6.QtWidgets import (
     QWidget, QLabel, QLineEdit,
     QPushButton, QVBoxLayout, QMessageBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
+import time
 
 from dashboard import DashboardWindow
 from db import check_login
 from audit import log_action
+from startup_timing import timed, record, print_report
 
 
 
@@ -59,7 +61,9 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Login Failed", "Please enter username and password")
             return
 
-        success, role = check_login(username, password)
+        self.login_started = time.perf_counter()
+        with timed("check login"):
+            success, role = check_login(username, password)
 
         if success:
             self.open_dashboard(username, role)
@@ -68,7 +72,15 @@ class LoginWindow(QWidget):
             QMessageBox.critical(self, "Login Failed", "Invalid username or password")
 
     def open_dashboard(self, username, role):
-        self.dashboard = DashboardWindow(username, role, self)
-        self.dashboard.show()
+        with timed("dashboard window"):
+            self.dashboard = DashboardWindow(username, role, self)
+            self.dashboard.show()
         self.hide()
         log_action(username, "Logged in")
+
+        # Report once the dashboard has actually been painted
+        QTimer.singleShot(0, self.report_login_time)
+
+    def report_login_time(self):
+        record("login -> dashboard", self.login_started)
+        print_report("login -> dashboard")
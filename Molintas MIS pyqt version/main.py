@@ -2,21 +2,47 @@
 # This is the entry point of the application
 # It only starts the app and shows the login window
 
+import startup_timing     # first, so its clock covers the imports below
 import sys
-from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWidgets import QApplication, QMessageBox
 from login import LoginWindow
+from db import close_db, db_session
+from migrations import migrate, MigrationError
+from audit import shutdown_audit
 
 
 def main():
+    startup_timing.record("imports", startup_timing.STARTED)
+
     # Every PyQt app needs exactly ONE QApplication
     app = QApplication(sys.argv)
 
+    # Bring older databases up to the current schema
+    # (a no-op when the database is already current)
+    try:
+        with startup_timing.timed("migrations"), db_session() as conn:
+            migrate(conn)
+    except MigrationError as e:
+        QMessageBox.critical(
+            None,
+            "Database Upgrade Failed",
+            f"{e}\n\nNo changes were made. Please contact the administrator."
+        )
+        sys.exit(1)
+
     # Start with the login window
-    login_window = LoginWindow()
-    login_window.show()
+    with startup_timing.timed("login window"):
+        login_window = LoginWindow()
+        login_window.show()
+    startup_timing.print_report("startup")
 
     # Keep the app running
-    sys.exit(app.exec())
+    exit_code = app.exec()
+
+    # Write queued audit entries, then release pooled connections
+    shutdown_audit()
+    close_db()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,1085 @@
+# migrations.py
+# Versioned schema changes on top of init_db
+# The current version is stored in PRAGMA user_version
+#
+# Usage:
+#   python migrations.py            -> show version, apply pending steps
+#   python migrations.py --status   -> only show version
+
+import sys
+
+
+class MigrationError(Exception):
+    pass
+
+
+# =========================
+# Step helpers
+# =========================
+def table_version_triggers(table):
+    """
+    Bumps table_versions.version for `table` on every insert, update
+    and delete, so caches can tell if anything changed with one read.
+    """
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1
+            WHERE name = '{table}';
+        END
+        """
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def truck_balance_triggers(table, amount, activity, key="truck"):
+    """
+    Keeps truck_balances in step with `table` (truck_saloks or
+    truck_payments). `amount` is the SQL for the row's money value with
+    a {row} placeholder for NEW / OLD. `key` is the truck column, the
+    same in both tables (truck_id since migration 7).
+    """
+    column = "charges" if table == "truck_saloks" else "payments"
+    add = amount.format(row="NEW")
+    sub = amount.format(row="OLD")
+    act = activity.format(row="NEW")
+
+    upsert_new = f"""
+            INSERT OR IGNORE INTO truck_balances ({key}) VALUES (NEW.{key});
+            UPDATE truck_balances
+            SET {column} = {column} + {add},
+                last_activity = MAX(COALESCE(last_activity, ''), {act})
+            WHERE {key} = NEW.{key};
+    """
+    remove_old = f"""
+            UPDATE truck_balances
+            SET {column} = {column} - {sub}
+            WHERE {key} = OLD.{key};
+    """
+
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_balance_insert
+        AFTER INSERT ON {table}
+        BEGIN {upsert_new} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_balance_delete
+        AFTER DELETE ON {table}
+        BEGIN {remove_old} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_balance_update
+        AFTER UPDATE ON {table}
+        BEGIN {remove_old} {upsert_new} END
+        """,
+    ]
+
+
+def rollup_statements(updates, row, sign):
+    """
+    SQL that adds (sign "+") or subtracts (sign "-") one row's amounts
+    to the daily rollups. `updates` is a list of
+    (rollup table, {key column: SQL}, {amount column: SQL}) with {row}
+    placeholders for NEW / OLD.
+    """
+    statements = []
+    for table, keys, amounts in updates:
+        columns = ", ".join(keys)
+        values = ", ".join(v.format(row=row) for v in keys.values())
+        where = " AND ".join(f"{k} = {v.format(row=row)}" for k, v in keys.items())
+        sets = ", ".join(
+            f"{k} = {k} {sign} ({v.format(row=row)})" for k, v in amounts.items()
+        )
+        statements.append(f"""
+            INSERT OR IGNORE INTO {table} ({columns}) VALUES ({values});
+            UPDATE {table} SET {sets} WHERE {where};
+        """)
+    return "".join(statements)
+
+
+def rollup_triggers(table, updates):
+    """
+    Keeps the daily rollups in step with inserts, deletes and updates
+    on `table` (see rollup_statements for `updates`).
+    """
+    add_new = rollup_statements(updates, "NEW", "+")
+    remove_old = rollup_statements(updates, "OLD", "-")
+
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_insert
+        AFTER INSERT ON {table}
+        BEGIN {add_new} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_delete
+        AFTER DELETE ON {table}
+        BEGIN {remove_old} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_update
+        AFTER UPDATE ON {table}
+        BEGIN {remove_old} {add_new} END
+        """,
+    ]
+
+
+def client_id_indexes():
+    """
+    Indexes from migrations 1 and 6, on the client id columns of
+    migration 7. Recreated whenever those tables are rebuilt.
+    """
+    return [
+        "CREATE INDEX idx_truck_saloks_truck_date "
+        "ON truck_saloks (truck_id, date, time)",
+        "CREATE INDEX idx_truck_saloks_date "
+        "ON truck_saloks (date, time)",
+        "CREATE INDEX idx_payments_client_date "
+        "ON payments (client_id, date)",
+        "CREATE INDEX idx_payments_date "
+        "ON payments (date)",
+        "CREATE INDEX idx_truck_payments_truck_date "
+        "ON truck_payments (truck_id, date)",
+        "CREATE INDEX idx_truck_payments_date "
+        "ON truck_payments (date)",
+        "CREATE INDEX idx_clients_type_status "
+        "ON clients (type, status, payment_status)",
+        "CREATE INDEX idx_clients_date "
+        "ON clients (date)",
+        "CREATE INDEX idx_usage_events_created_at "
+        "ON usage_events (created_at)",
+        "CREATE INDEX idx_usage_events_client_created_at "
+        "ON usage_events (client_id, created_at)",
+    ]
+
+
+def client_id_triggers():
+    """
+    Triggers from migrations 2, 3, 5 and 6, on the client id columns
+    of migration 7.
+    """
+    return [
+        *table_version_triggers("clients"),
+        *table_version_triggers("payments"),
+        *table_version_triggers("truck_saloks"),
+        *truck_balance_triggers(
+            "truck_saloks", "{row}.drums * {row}.price",
+            "{row}.date || ' ' || {row}.time", key="truck_id"
+        ),
+        *truck_balance_triggers(
+            "truck_payments", "{row}.amount", "{row}.date", key="truck_id"
+        ),
+        *rollup_triggers("truck_saloks", [
+            ("daily_totals", {"date": "{row}.date"},
+             {"truck_charges": "{row}.drums * {row}.price"}),
+            ("daily_truck_totals", {"date": "{row}.date", "truck_id": "{row}.truck_id"},
+             {"charges": "{row}.drums * {row}.price"}),
+        ]),
+        *rollup_triggers("truck_payments", [
+            ("daily_totals", {"date": "{row}.date"},
+             {"truck_payments": "{row}.amount"}),
+            ("daily_truck_totals", {"date": "{row}.date", "truck_id": "{row}.truck_id"},
+             {"payments": "{row}.amount"}),
+        ]),
+        *rollup_triggers("payments", [
+            ("daily_totals", {"date": "{row}.date"},
+             {"collections": "{row}.amount"}),
+            ("daily_client_type_totals",
+             {"date": "{row}.date",
+              "type": "(SELECT type FROM clients WHERE id = {row}.client_id)"},
+             {"collections": "{row}.amount"}),
+        ]),
+        """
+        CREATE TRIGGER trg_usage_events_no_update
+        BEFORE UPDATE ON usage_events
+        BEGIN SELECT RAISE(ABORT, 'usage_events is append-only'); END
+        """,
+        """
+        CREATE TRIGGER trg_usage_events_no_delete
+        BEFORE DELETE ON usage_events
+        BEGIN SELECT RAISE(ABORT, 'usage_events is append-only'); END
+        """,
+        f"""
+        CREATE TRIGGER trg_usage_events_rollup_insert
+        AFTER INSERT ON usage_events
+        BEGIN {rollup_statements([
+            ("daily_totals", {"date": "date({row}.created_at)"},
+             {"usage_added": "{row}.usage", "billing_added": "{row}.charge"}),
+            ("daily_client_type_totals",
+             {"date": "date({row}.created_at)",
+              "type": "(SELECT type FROM clients WHERE id = {row}.client_id)"},
+             {"usage_added": "{row}.usage", "billing_added": "{row}.charge"}),
+        ], "NEW", "+")} END
+        """,
+    ]
+
+
+def client_type_triggers():
+    """
+    The payments and usage_events rollup triggers of migration 11:
+    daily_client_type_totals keyed by the client_type stored on the
+    row instead of the client's type at the time the trigger runs.
+    """
+    return [
+        *rollup_triggers("payments", [
+            ("daily_totals", {"date": "{row}.date"},
+             {"collections": "{row}.amount"}),
+            ("daily_client_type_totals",
+             {"date": "{row}.date", "type": "{row}.client_type"},
+             {"collections": "{row}.amount"}),
+        ]),
+        f"""
+        CREATE TRIGGER trg_usage_events_rollup_insert
+        AFTER INSERT ON usage_events
+        BEGIN {rollup_statements([
+            ("daily_totals", {"date": "date({row}.created_at)"},
+             {"usage_added": "{row}.usage", "billing_added": "{row}.charge"}),
+            ("daily_client_type_totals",
+             {"date": "date({row}.created_at)", "type": "{row}.client_type"},
+             {"usage_added": "{row}.usage", "billing_added": "{row}.charge"}),
+        ], "NEW", "+")} END
+        """,
+    ]
+
+
+def cents(column):
+    """
+    SQL that turns a REAL peso column into INTEGER centavos. Rounding to
+    6 places first drops float noise (12.285 * 100 = 1228.4999...).
+    """
+    return f"CAST(ROUND(ROUND(COALESCE({column}, 0) * 100, 6)) AS INTEGER)"
+
+
+# =========================
+# Data steps
+# =========================
+# Backfills written for the schema of the migration that runs them.
+# They are copies, not calls into truck_ledger / rollups / usage_ledger,
+# so changing those modules never changes what an old migration does.
+
+def truck_balances_backfill(key):
+    """
+    Recomputes truck_balances from truck_saloks and truck_payments,
+    keyed by `key` (truck until migration 7, truck_id after).
+    """
+    return [
+        "DELETE FROM truck_balances",
+        f"""
+        INSERT INTO truck_balances ({key}, charges, payments, last_activity)
+        SELECT {key}, SUM(charges), SUM(payments), MAX(activity)
+        FROM (
+            SELECT {key}, drums * price AS charges, 0 AS payments,
+                   date || ' ' || time AS activity
+            FROM truck_saloks
+            UNION ALL
+            SELECT {key}, 0, amount, date
+            FROM truck_payments
+        )
+        GROUP BY {key}
+        """,
+    ]
+
+
+def rollups_backfill(truck_key, usage, payment_types):
+    """
+    Recomputes the three daily rollups. `usage` is SQL for one row per
+    billing (date, type, usage, bill), `payment_types` SQL for one row
+    per payment (date, type, amount).
+    """
+    return [
+        "DELETE FROM daily_totals",
+        "DELETE FROM daily_truck_totals",
+        "DELETE FROM daily_client_type_totals",
+        f"""
+        INSERT INTO daily_truck_totals (date, {truck_key}, charges, payments)
+        SELECT date, {truck_key}, SUM(charges), SUM(payments)
+        FROM (
+            SELECT date, {truck_key}, drums * price AS charges, 0 AS payments
+            FROM truck_saloks
+            UNION ALL
+            SELECT date, {truck_key}, 0, amount
+            FROM truck_payments
+        )
+        GROUP BY date, {truck_key}
+        """,
+        f"""
+        INSERT INTO daily_client_type_totals
+            (date, type, usage_added, billing_added, collections)
+        SELECT date, type, SUM(usage), SUM(bill), SUM(collections)
+        FROM (
+            SELECT date, type, usage, bill, 0 AS collections
+            FROM ({usage})
+            WHERE type IS NOT NULL
+            UNION ALL
+            SELECT date, type, 0, 0, amount
+            FROM ({payment_types})
+        )
+        GROUP BY date, type
+        """,
+        f"""
+        INSERT INTO daily_totals
+            (date, truck_charges, truck_payments,
+             usage_added, billing_added, collections)
+        SELECT date, SUM(truck_charges), SUM(truck_payments),
+               SUM(usage_added), SUM(billing_added), SUM(collections)
+        FROM (
+            SELECT date, SUM(charges) AS truck_charges,
+                   SUM(payments) AS truck_payments,
+                   0 AS usage_added, 0 AS billing_added, 0 AS collections
+            FROM daily_truck_totals
+            GROUP BY date
+            UNION ALL
+            SELECT date, 0, 0, SUM(usage), SUM(bill), 0
+            FROM ({usage})
+            GROUP BY date
+            UNION ALL
+            SELECT date, 0, 0, 0, 0, SUM(amount)
+            FROM payments
+            GROUP BY date
+        )
+        GROUP BY date
+        """,
+    ]
+
+
+# Before migration 6: each client's running total on its last billing
+# date stands in for its usage history
+CLIENT_TOTALS_USAGE = """
+    SELECT date, type, usage, bill
+    FROM clients
+    WHERE date IS NOT NULL
+"""
+
+# Migration 6: usage_events keyed by client name
+NAME_KEYED_EVENTS_USAGE = """
+    SELECT date(e.created_at) AS date, c.type,
+           e.usage AS usage, e.charge AS bill
+    FROM usage_events e
+    LEFT JOIN clients c ON c.name = e.client
+"""
+
+NAME_KEYED_PAYMENT_TYPES = """
+    SELECT p.date, c.type, p.amount
+    FROM payments p
+    JOIN clients c ON c.name = p.client
+"""
+
+# Migrations 7 and 8: keyed by client id
+ID_KEYED_EVENTS_USAGE = """
+    SELECT date(e.created_at) AS date, c.type,
+           e.usage AS usage, e.charge AS bill
+    FROM usage_events e
+    LEFT JOIN clients c ON c.id = e.client_id
+"""
+
+ID_KEYED_PAYMENT_TYPES = """
+    SELECT p.date, c.type, p.amount
+    FROM payments p
+    JOIN clients c ON c.id = p.client_id
+"""
+
+# clients.usage / bill / date recomputed from usage_events and payments
+# (migrations 7 and 8)
+CLIENTS_BACKFILL = """
+    UPDATE clients
+    SET usage = COALESCE((
+            SELECT SUM(e.usage) FROM usage_events e WHERE e.client_id = clients.id
+        ), 0),
+        bill = COALESCE((
+            SELECT SUM(e.charge) FROM usage_events e WHERE e.client_id = clients.id
+        ), 0) - COALESCE((
+            SELECT SUM(p.amount) FROM payments p WHERE p.client_id = clients.id
+        ), 0),
+        date = (
+            SELECT MAX(date(e.created_at)) FROM usage_events e WHERE e.client_id = clients.id
+        )
+    WHERE type <> 'truck'
+"""
+
+
+def seed_usage_events(conn):
+    """
+    Migration 6: one opening event per client that was billed before
+    usage_events existed: its running usage, and everything it was ever
+    billed (current bill plus payments), on its last billing date.
+    Written for the name-keyed tables of that version.
+    """
+    conn.execute("""
+        INSERT INTO usage_events (client, usage, rate, charge, created_at, note)
+        SELECT c.name,
+               c.usage,
+               CASE WHEN c.usage > 0
+                    THEN (c.bill + COALESCE(p.paid, 0)) / c.usage
+                    ELSE 0 END,
+               c.bill + COALESCE(p.paid, 0),
+               c.date || ' 00:00:00',
+               ?
+        FROM clients c
+        LEFT JOIN (
+            SELECT client, SUM(amount) AS paid
+            FROM payments
+            GROUP BY client
+        ) p ON p.client = c.name
+        WHERE c.type <> 'truck'
+        AND c.date IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM usage_events e WHERE e.client = c.name)
+    """, ("Opening balance",))
+
+
+def drop_triggers(conn):
+    # Triggers name columns that migration 7 replaces
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    ).fetchall()]
+    for name in names:
+        conn.execute(f"DROP TRIGGER {name}")
+
+
+def add_missing_clients(conn):
+    """
+    Rows that still name a deleted client get an Inactive client back,
+    so every row has a client id to point at. Their usage and bill are
+    filled in from usage_events by CLIENTS_BACKFILL at the end of
+    migration 7.
+
+    A deleted household's charges may be gone while its payments are
+    not, which would bring it back owing a negative bill. It gets an
+    opening event for what it paid beyond its remaining charges (as in
+    seed_usage_events), dated on its first payment, so it comes back
+    with a bill of zero.
+    """
+    conn.execute("""
+        INSERT INTO usage_events (client, usage, rate, charge, created_at, note)
+        SELECT p.client, 0, 0,
+               p.paid - COALESCE(e.charged, 0),
+               p.first_paid || ' 00:00:00',
+               ?
+        FROM (
+            SELECT client, SUM(amount) AS paid, MIN(date) AS first_paid
+            FROM payments
+            GROUP BY client
+        ) p
+        LEFT JOIN (
+            SELECT client, SUM(charge) AS charged
+            FROM usage_events
+            GROUP BY client
+        ) e ON e.client = p.client
+        WHERE p.client NOT IN (SELECT name FROM clients)
+        AND p.paid > COALESCE(e.charged, 0)
+    """, ("Opening balance",))
+    conn.execute("""
+        INSERT OR IGNORE INTO clients (name, type, status)
+        SELECT truck, 'truck', 'Inactive' FROM truck_saloks
+        UNION
+        SELECT truck, 'truck', 'Inactive' FROM truck_payments
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO clients (name, type, status)
+        SELECT client, 'household', 'Inactive' FROM payments
+        UNION
+        SELECT client, 'household', 'Inactive' FROM usage_events
+    """)
+
+
+def replace_table(table, columns, select):
+    """
+    Steps that create `table`_new with `columns` and fill it from
+    `select`. The old table is dropped and the new one renamed later,
+    once every table has been copied.
+    """
+    return [
+        f"CREATE TABLE {table}_new ({columns})",
+        f"INSERT INTO {table}_new {select}",
+    ]
+
+
+# =========================
+# Migration list
+# =========================
+# (version, description, steps) — append only, never renumber or edit
+# a step that has shipped. A step is either an SQL string or a
+# function taking the connection (for data fixes that need Python).
+# Data steps are frozen SQL for the schema of their own version (see
+# Data steps above), never calls into the live modules.
+MIGRATIONS = [
+    (1, "Indexes for page filters and sorting", [
+        # TrucksPage.load_logs / update_summary, ReportsPage.truck_report
+        "CREATE INDEX IF NOT EXISTS idx_truck_saloks_truck_date "
+        "ON truck_saloks (truck, date, time)",
+        "CREATE INDEX IF NOT EXISTS idx_truck_saloks_date "
+        "ON truck_saloks (date, time)",
+
+        # BillingPage.load_payment_history, dashboard + report collections
+        "CREATE INDEX IF NOT EXISTS idx_payments_client_date "
+        "ON payments (client, date)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_date "
+        "ON payments (date)",
+
+        # TrucksPage.update_summary, ReportsPage.truck_report
+        "CREATE INDEX IF NOT EXISTS idx_truck_payments_truck_date "
+        "ON truck_payments (truck, date)",
+        "CREATE INDEX IF NOT EXISTS idx_truck_payments_date "
+        "ON truck_payments (date)",
+
+        # ClientsPage / BillingPage lists, dashboard counters, billing reports
+        "CREATE INDEX IF NOT EXISTS idx_clients_type_status "
+        "ON clients (type, status, payment_status)",
+        "CREATE INDEX IF NOT EXISTS idx_clients_date "
+        "ON clients (date)",
+
+        # AuditLogsPage.load_logs
+        "CREATE INDEX IF NOT EXISTS idx_logs_datetime "
+        "ON logs (datetime)",
+    ]),
+
+    (2, "Change counters for cached dashboard summary", [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO table_versions (name) "
+        "VALUES ('clients'), ('payments'), ('truck_saloks')",
+        *table_version_triggers("clients"),
+        *table_version_triggers("payments"),
+        *table_version_triggers("truck_saloks"),
+    ]),
+
+    (3, "Running balances per truck", [
+        """
+        CREATE TABLE IF NOT EXISTS truck_balances (
+            truck TEXT PRIMARY KEY,
+            charges REAL NOT NULL DEFAULT 0,
+            payments REAL NOT NULL DEFAULT 0,
+            last_activity TEXT             -- latest salok / payment
+        )
+        """,
+        *truck_balance_triggers(
+            "truck_saloks", "{row}.drums * {row}.price",
+            "{row}.date || ' ' || {row}.time"
+        ),
+        *truck_balance_triggers(
+            "truck_payments", "{row}.amount", "{row}.date"
+        ),
+        *truck_balances_backfill("truck"),
+    ]),
+
+    (4, "Index for the audit log user filter", [
+        # AuditLogsPage keyset paging with a user selected
+        "CREATE INDEX IF NOT EXISTS idx_logs_username_datetime "
+        "ON logs (username, datetime)",
+    ]),
+
+    (5, "Daily rollups for reports", [
+        """
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            date TEXT PRIMARY KEY,
+            truck_charges REAL NOT NULL DEFAULT 0,
+            truck_payments REAL NOT NULL DEFAULT 0,
+            usage_added REAL NOT NULL DEFAULT 0,
+            billing_added REAL NOT NULL DEFAULT 0,
+            collections REAL NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS daily_truck_totals (
+            date TEXT NOT NULL,
+            truck TEXT NOT NULL,
+            charges REAL NOT NULL DEFAULT 0,
+            payments REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, truck)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS daily_client_type_totals (
+            date TEXT NOT NULL,
+            type TEXT NOT NULL,
+            usage_added REAL NOT NULL DEFAULT 0,
+            billing_added REAL NOT NULL DEFAULT 0,
+            collections REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, type)
+        )
+        """,
+        *rollup_triggers("truck_saloks", [
+            ("daily_totals", {"date": "{row}.date"},
+             {"truck_charges": "{row}.drums * {row}.price"}),
+            ("daily_truck_totals", {"date": "{row}.date", "truck": "{row}.truck"},
+             {"charges": "{row}.drums * {row}.price"}),
+        ]),
+        *rollup_triggers("truck_payments", [
+            ("daily_totals", {"date": "{row}.date"},
+             {"truck_payments": "{row}.amount"}),
+            ("daily_truck_totals", {"date": "{row}.date", "truck": "{row}.truck"},
+             {"payments": "{row}.amount"}),
+        ]),
+        # A payment whose client no longer exists has no type; it still
+        # counts in daily_totals
+        *rollup_triggers("payments", [
+            ("daily_totals", {"date": "{row}.date"},
+             {"collections": "{row}.amount"}),
+            ("daily_client_type_totals",
+             {"date": "{row}.date",
+              "type": "(SELECT type FROM clients WHERE name = {row}.client)"},
+             {"collections": "{row}.amount"}),
+        ]),
+        # BillingPage.add_usage raises usage and bill and stamps the date
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_clients_rollup_usage
+        AFTER UPDATE OF usage, bill ON clients
+        WHEN NEW.usage <> OLD.usage AND NEW.date IS NOT NULL
+        BEGIN {rollup_statements([
+            ("daily_totals", {"date": "NEW.date"},
+             {"usage_added": "NEW.usage - OLD.usage",
+              "billing_added": "NEW.bill - OLD.bill"}),
+            ("daily_client_type_totals", {"date": "NEW.date", "type": "NEW.type"},
+             {"usage_added": "NEW.usage - OLD.usage",
+              "billing_added": "NEW.bill - OLD.bill"}),
+        ], "NEW", "+")} END
+        """,
+        *rollups_backfill("truck", CLIENT_TOTALS_USAGE, NAME_KEYED_PAYMENT_TYPES),
+    ]),
+
+    (6, "Append-only usage events", [
+        """
+        CREATE TABLE IF NOT EXISTS usage_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client TEXT NOT NULL,
+            usage REAL NOT NULL,           -- m³
+            rate REAL NOT NULL,            -- ₱ per m³
+            charge REAL NOT NULL,
+            created_at TEXT NOT NULL,      -- YYYY-MM-DD HH:MM:SS
+            note TEXT,
+            FOREIGN KEY (client) REFERENCES clients(name)
+        )
+        """,
+        # Period reports, per-client history
+        "CREATE INDEX IF NOT EXISTS idx_usage_events_created_at "
+        "ON usage_events (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_usage_events_client_created_at "
+        "ON usage_events (client, created_at)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_usage_events_no_update
+        BEFORE UPDATE ON usage_events
+        BEGIN SELECT RAISE(ABORT, 'usage_events is append-only'); END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_usage_events_no_delete
+        BEFORE DELETE ON usage_events
+        BEGIN SELECT RAISE(ABORT, 'usage_events is append-only'); END
+        """,
+        # Rollups now follow the events instead of clients.usage / bill
+        "DROP TRIGGER IF EXISTS trg_clients_rollup_usage",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_usage_events_rollup_insert
+        AFTER INSERT ON usage_events
+        BEGIN {rollup_statements([
+            ("daily_totals", {"date": "date({row}.created_at)"},
+             {"usage_added": "{row}.usage", "billing_added": "{row}.charge"}),
+            ("daily_client_type_totals",
+             {"date": "date({row}.created_at)",
+              "type": "(SELECT type FROM clients WHERE name = {row}.client)"},
+             {"usage_added": "{row}.usage", "billing_added": "{row}.charge"}),
+        ], "NEW", "+")} END
+        """,
+        seed_usage_events,
+        *rollups_backfill("truck", NAME_KEYED_EVENTS_USAGE, NAME_KEYED_PAYMENT_TYPES),
+    ]),
+
+    # Rows point at clients by id instead of name. Clients deleted while
+    # their rows stayed behind come back Inactive, at a bill of zero
+    # (see add_missing_clients).
+    (7, "Integer client ids", [
+        drop_triggers,
+        add_missing_clients,
+
+        *replace_table("clients", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            type TEXT NOT NULL,
+            billing_type TEXT,
+            usage REAL DEFAULT 0,
+            bill REAL DEFAULT 0,
+            date TEXT,
+            status TEXT DEFAULT 'Active',
+            payment_status TEXT DEFAULT 'Unpaid',
+            address TEXT,
+            contact TEXT
+        """, """
+            SELECT rowid, name, type, billing_type, usage, bill, date,
+                   status, payment_status, address, contact
+            FROM clients
+            ORDER BY rowid
+        """),
+        *replace_table("payments", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER NOT NULL REFERENCES clients(id),
+            amount REAL NOT NULL,
+            date TEXT NOT NULL,
+            note TEXT
+        """, """
+            SELECT p.id, c.id, p.amount, p.date, p.note
+            FROM payments p
+            JOIN clients_new c ON c.name = p.client
+        """),
+        *replace_table("truck_saloks", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            truck_id INTEGER NOT NULL REFERENCES clients(id),
+            drums INTEGER NOT NULL,
+            price REAL NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL
+        """, """
+            SELECT s.id, c.id, s.drums, s.price, s.date, s.time
+            FROM truck_saloks s
+            JOIN clients_new c ON c.name = s.truck
+        """),
+        *replace_table("truck_payments", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            truck_id INTEGER NOT NULL REFERENCES clients(id),
+            amount REAL NOT NULL,
+            date TEXT NOT NULL,
+            note TEXT
+        """, """
+            SELECT p.id, c.id, p.amount, p.date, p.note
+            FROM truck_payments p
+            JOIN clients_new c ON c.name = p.truck
+        """),
+        *replace_table("usage_events", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER NOT NULL REFERENCES clients(id),
+            usage REAL NOT NULL,           -- m³
+            rate REAL NOT NULL,            -- ₱ per m³
+            charge REAL NOT NULL,
+            created_at TEXT NOT NULL,      -- YYYY-MM-DD HH:MM:SS
+            note TEXT
+        """, """
+            SELECT e.id, c.id, e.usage, e.rate, e.charge, e.created_at, e.note
+            FROM usage_events e
+            JOIN clients_new c ON c.name = e.client
+        """),
+
+        *[f"DROP TABLE {t}" for t in (
+            "payments", "truck_saloks", "truck_payments", "usage_events",
+            "clients", "truck_balances", "daily_truck_totals"
+        )],
+        *[f"ALTER TABLE {t}_new RENAME TO {t}" for t in (
+            "clients", "payments", "truck_saloks", "truck_payments", "usage_events"
+        )],
+
+        """
+        CREATE TABLE truck_balances (
+            truck_id INTEGER PRIMARY KEY REFERENCES clients(id),
+            charges REAL NOT NULL DEFAULT 0,
+            payments REAL NOT NULL DEFAULT 0,
+            last_activity TEXT             -- latest salok / payment
+        )
+        """,
+        """
+        CREATE TABLE daily_truck_totals (
+            date TEXT NOT NULL,
+            truck_id INTEGER NOT NULL,
+            charges REAL NOT NULL DEFAULT 0,
+            payments REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, truck_id)
+        )
+        """,
+
+        *client_id_indexes(),
+        *client_id_triggers(),
+
+        *truck_balances_backfill("truck_id"),
+        *rollups_backfill("truck_id", ID_KEYED_EVENTS_USAGE, ID_KEYED_PAYMENT_TYPES),
+        CLIENTS_BACKFILL,
+    ]),
+
+    # Every money column becomes INTEGER centavos (see money.py)
+    (8, "Money in integer centavos", [
+        drop_triggers,
+
+        *replace_table("clients", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            type TEXT NOT NULL,
+            billing_type TEXT,
+            usage REAL DEFAULT 0,          -- m³
+            bill INTEGER DEFAULT 0,        -- centavos
+            date TEXT,
+            status TEXT DEFAULT 'Active',
+            payment_status TEXT DEFAULT 'Unpaid',
+            address TEXT,
+            contact TEXT
+        """, f"""
+            SELECT id, name, type, billing_type, usage, {cents("bill")}, date,
+                   status, payment_status, address, contact
+            FROM clients
+        """),
+        *replace_table("payments", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER NOT NULL REFERENCES clients(id),
+            amount INTEGER NOT NULL,       -- centavos
+            date TEXT NOT NULL,
+            note TEXT
+        """, f"""
+            SELECT id, client_id, {cents("amount")}, date, note
+            FROM payments
+        """),
+        *replace_table("truck_saloks", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            truck_id INTEGER NOT NULL REFERENCES clients(id),
+            drums INTEGER NOT NULL,
+            price INTEGER NOT NULL,        -- centavos per drum
+            date TEXT NOT NULL,
+            time TEXT NOT NULL
+        """, f"""
+            SELECT id, truck_id, drums, {cents("price")}, date, time
+            FROM truck_saloks
+        """),
+        *replace_table("truck_payments", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            truck_id INTEGER NOT NULL REFERENCES clients(id),
+            amount INTEGER NOT NULL,       -- centavos
+            date TEXT NOT NULL,
+            note TEXT
+        """, f"""
+            SELECT id, truck_id, {cents("amount")}, date, note
+            FROM truck_payments
+        """),
+        *replace_table("usage_events", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER NOT NULL REFERENCES clients(id),
+            usage REAL NOT NULL,           -- m³
+            rate INTEGER NOT NULL,         -- centavos per m³
+            charge INTEGER NOT NULL,       -- centavos
+            created_at TEXT NOT NULL,      -- YYYY-MM-DD HH:MM:SS
+            note TEXT
+        """, f"""
+            SELECT id, client_id, usage, {cents("rate")}, {cents("charge")},
+                   created_at, note
+            FROM usage_events
+        """),
+
+        *[f"DROP TABLE {t}" for t in (
+            "payments", "truck_saloks", "truck_payments", "usage_events",
+            "clients", "truck_balances", "daily_totals",
+            "daily_truck_totals", "daily_client_type_totals"
+        )],
+        *[f"ALTER TABLE {t}_new RENAME TO {t}" for t in (
+            "clients", "payments", "truck_saloks", "truck_payments", "usage_events"
+        )],
+
+        """
+        CREATE TABLE truck_balances (
+            truck_id INTEGER PRIMARY KEY REFERENCES clients(id),
+            charges INTEGER NOT NULL DEFAULT 0,
+            payments INTEGER NOT NULL DEFAULT 0,
+            last_activity TEXT             -- latest salok / payment
+        )
+        """,
+        """
+        CREATE TABLE daily_totals (
+            date TEXT PRIMARY KEY,
+            truck_charges INTEGER NOT NULL DEFAULT 0,
+            truck_payments INTEGER NOT NULL DEFAULT 0,
+            usage_added REAL NOT NULL DEFAULT 0,
+            billing_added INTEGER NOT NULL DEFAULT 0,
+            collections INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE daily_truck_totals (
+            date TEXT NOT NULL,
+            truck_id INTEGER NOT NULL,
+            charges INTEGER NOT NULL DEFAULT 0,
+            payments INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, truck_id)
+        )
+        """,
+        """
+        CREATE TABLE daily_client_type_totals (
+            date TEXT NOT NULL,
+            type TEXT NOT NULL,
+            usage_added REAL NOT NULL DEFAULT 0,
+            billing_added INTEGER NOT NULL DEFAULT 0,
+            collections INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, type)
+        )
+        """,
+
+        *client_id_indexes(),
+        *client_id_triggers(),
+
+        *truck_balances_backfill("truck_id"),
+        *rollups_backfill("truck_id", ID_KEYED_EVENTS_USAGE, ID_KEYED_PAYMENT_TYPES),
+        # Bills are exact now: recompute them from the events, and mark
+        # clients whose payments brought them to zero as Paid (a float
+        # remainder used to leave some Unpaid)
+        CLIENTS_BACKFILL,
+        """
+        UPDATE clients
+        SET payment_status = 'Paid'
+        WHERE bill = 0
+        AND payment_status = 'Unpaid'
+        AND EXISTS (SELECT 1 FROM payments p WHERE p.client_id = clients.id)
+        """,
+    ]),
+
+    # See rates.py. Today's settings values apply from the beginning;
+    # later changes add rows instead of overwriting.
+    (9, "Effective-dated rates", [
+        """
+        CREATE TABLE IF NOT EXISTS rate_schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL,             -- RES_RATE | COM_RATE | PRICE_PER_DRUM
+            effective_from TEXT NOT NULL,  -- YYYY-MM-DD HH:MM:SS
+            rate INTEGER NOT NULL,         -- centavos per m³ / drum
+            created_at TEXT,
+            UNIQUE (key, effective_from)
+        )
+        """,
+        f"""
+        INSERT OR IGNORE INTO rate_schedule (key, effective_from, rate)
+        SELECT key, '0001-01-01 00:00:00', {cents("value")}
+        FROM settings
+        WHERE key IN ('RES_RATE', 'COM_RATE', 'PRICE_PER_DRUM')
+        """,
+    ]),
+
+    # Receipt / bank / e-wallet reference of a payment, so an imported
+    # file can be posted again without paying anything twice
+    # (core/payments.py). Payments entered by hand have none.
+    (10, "Payment references", [
+        "ALTER TABLE payments ADD COLUMN reference TEXT",
+        "ALTER TABLE truck_payments ADD COLUMN reference TEXT",
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_reference
+        ON payments(reference) WHERE reference IS NOT NULL
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_truck_payments_reference
+        ON truck_payments(reference) WHERE reference IS NOT NULL
+        """,
+    ]),
+
+    # The client's type when the event / payment was recorded, so
+    # daily_client_type_totals can be rebuilt and checked the way the
+    # triggers fill it, and a payment deleted after the client changed
+    # type comes off the type it went on. Rows from before this
+    # migration get the type the client has now.
+    (11, "Client type on usage events and payments", [
+        "ALTER TABLE usage_events ADD COLUMN client_type TEXT",
+        "ALTER TABLE payments ADD COLUMN client_type TEXT",
+
+        "DROP TRIGGER trg_usage_events_no_update",
+        "DROP TRIGGER trg_usage_events_rollup_insert",
+        "DROP TRIGGER trg_payments_rollup_insert",
+        "DROP TRIGGER trg_payments_rollup_delete",
+        "DROP TRIGGER trg_payments_rollup_update",
+        """
+        UPDATE usage_events
+        SET client_type = (SELECT type FROM clients WHERE id = usage_events.client_id)
+        """,
+        """
+        UPDATE payments
+        SET client_type = (SELECT type FROM clients WHERE id = payments.client_id)
+        """,
+        """
+        CREATE TRIGGER trg_usage_events_no_update
+        BEFORE UPDATE ON usage_events
+        BEGIN SELECT RAISE(ABORT, 'usage_events is append-only'); END
+        """,
+        *client_type_triggers(),
+    ]),
+]
+
+
+def check_order(migrations=MIGRATIONS):
+    expected = 1
+    for number, description, steps in migrations:
+        if number != expected:
+            raise MigrationError(
+                f"Migration {number} ({description}) is out of order, "
+                f"expected version {expected}"
+            )
+        expected += 1
+
+
+LATEST_VERSION = len(MIGRATIONS)
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def is_current(conn):
+    return get_version(conn) >= LATEST_VERSION
+
+
+def apply_migration(conn, number, description, steps):
+    """
+    Runs one migration in its own write transaction.
+    Either every step and the version bump land, or none do.
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another workstation may have migrated while we waited
+        if get_version(conn) >= number:
+            conn.rollback()
+            return False
+
+        for step in steps:
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+
+        conn.execute(f"PRAGMA user_version = {number}")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise MigrationError(
+            f"Migration {number} ({description}) failed: {e}"
+        ) from e
+
+    return True
+
+
+def migrate(conn):
+    """
+    Applies every migration newer than the database's user_version.
+    Costs a single PRAGMA read when the schema is already current.
+    Returns the list of versions applied.
+    """
+    if is_current(conn):
+        return []
+
+    check_order()
+
+    version = get_version(conn)
+    applied = []
+
+    for number, description, steps in MIGRATIONS:
+        if number <= version:
+            continue
+        if apply_migration(conn, number, description, steps):
+            applied.append(number)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from db import db_session, DB_PATH
+
+    with db_session() as conn:
+        print(f"{DB_PATH.name}: schema version {get_version(conn)} "
+              f"(latest {LATEST_VERSION})")
+
+        if "--status" not in sys.argv:
+            for number in migrate(conn):
+                print(f"Applied migration {number}")
@@ -0,0 +1,58 @@
+# money.py
+# Money helpers: amounts are integer centavos (₱1.00 = 100)
+#
+# Since migration 8 every money column (bills, payments, prices, rates,
+# charges and the ledgers / rollups built from them) is an INTEGER
+# number of centavos, so SUMs are exact and "bill == 0" really means
+# paid. Convert only at the edges:
+#   to_cents()  what the user typed, or a ₱ value from settings
+#   charge()    quantity x rate, rounded once to the centavo
+#   fmt()       centavos -> "₱1234.50" for labels and reports
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENTS = 100
+
+# Usage (m³) is REAL and drifts a little when added one row at a time;
+# the ledger / rollup checks allow this much. Money is integer centavos
+# and compares exactly.
+TOLERANCE = 0.005
+
+
+def to_cents(pesos):
+    """
+    Returns a peso amount ("12.5", 12.5, 37) as int centavos, rounded
+    half up. Raises ValueError for anything that is not a number.
+    """
+    try:
+        value = Decimal(str(pesos).strip())
+    except InvalidOperation:
+        raise ValueError(f"not an amount: {pesos!r}") from None
+
+    if not value.is_finite():
+        raise ValueError(f"not an amount: {pesos!r}")
+
+    return int((value * CENTS).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def charge(quantity, rate_cents):
+    """
+    quantity (m³, drums) times a per-unit rate in centavos, rounded
+    half up to whole centavos.
+    """
+    return int((Decimal(str(quantity)) * rate_cents).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def to_pesos(cents):
+    # Exact, for exports that want a number rather than text
+    return Decimal(cents or 0) / CENTS
+
+
+def fmt(cents, symbol="₱"):
+    """
+    1234 -> "₱12.34". None (an empty SUM) shows as zero.
+    """
+    cents = int(cents or 0)
+    sign = "-" if cents < 0 else ""
+    pesos, rest = divmod(abs(cents), CENTS)
+    return f"{sign}{symbol}{pesos}.{rest:02d}"
@@ -1,19 +1,95 @@
 # pages/audit_logs.py
 # Audit Logs Viewer (ADMIN ONLY)
+# Filtered by date window / user / action and paged with keyset queries,
+# so opening the page costs the same however big the logs table gets
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel,
-    QTableWidget, QTableWidgetItem,
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QTableView, QComboBox, QDateEdit, QLineEdit,
     QPushButton
 )
-from PyQt6.QtCore import Qt
-from db import get_db_conn
+from PyQt6.QtCore import Qt, QDate, QModelIndex
+from db import db_session
+from audit import flush_audit, log_filters
+from core import ExportService
+from pages.exporting import export_to_file
+from pages.table_model import SqlTableModel
+
+# Default window when the page opens
+DEFAULT_DAYS = 30
+
+ALL_USERS = "All Users"
+
+
+# =====================================================
+# Keyset-paged model
+# =====================================================
+class AuditLogModel(SqlTableModel):
+    """
+    Newest first. Each batch continues from the last row loaded
+    (datetime, id) instead of using OFFSET, so page 500 is as cheap
+    as page 1.
+    """
+
+    def __init__(self, columns, parent=None):
+        super().__init__(columns, parent)
+        self._filters = ("1 = 1", [])
+        self._start = ""
+        self._end = ""
+
+    def set_filters(self, start, end, user=None, action=None):
+        """
+        start / end: 'YYYY-MM-DD HH:MM:SS' bounds, both inclusive.
+        user / action: see audit.log_filters.
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._start = start
+        self._end = end
+        self._filters = log_filters(user, action)
+        self._has_more = True
+        self.endResetModel()
+
+        self.fetchMore(QModelIndex())
+
+    def fetch_batch(self):
+        if not self._has_more:
+            return []
+
+        where, params = self._filters
+        end = self._end
+        after_last = ""
+        keyset = []
+
+        if self._rows:
+            last = self._rows[-1]
+            # Start the index range at the last row we showed
+            end = last["datetime"]
+            after_last = "AND (datetime < ? OR id < ?)"
+            keyset = [last["datetime"], last["id"]]
+
+        with db_session() as conn:
+            batch = conn.execute(f"""
+                SELECT id, datetime, username, action, note
+                FROM logs
+                WHERE datetime BETWEEN ? AND ?
+                AND {where}
+                {after_last}
+                ORDER BY datetime DESC, id DESC
+                LIMIT ?
+            """, [self._start, end, *params, *keyset, self.batch_size]).fetchall()
+
+        if len(batch) < self.batch_size:
+            self._has_more = False
+        return batch
 
 
 class AuditLogsPage(QWidget):
     def __init__(self):
         super().__init__()
 
+        self.exports = ExportService()
+
         layout = QVBoxLayout(self)
 
         # =========================
@@ -23,20 +99,59 @@ class AuditLogsPage(QWidget):
         title.setStyleSheet("font-size: 18px; font-weight: bold;")
         layout.addWidget(title)
 
+        # =========================
+        # Filters
+        # =========================
+        filter_layout = QHBoxLayout()
+
+        filter_layout.addWidget(QLabel("From:"))
+        self.from_date = QDateEdit()
+        self.from_date.setCalendarPopup(True)
+        self.from_date.setDate(QDate.currentDate().addDays(-DEFAULT_DAYS))
+        filter_layout.addWidget(self.from_date)
+
+        filter_layout.addWidget(QLabel("To:"))
+        self.to_date = QDateEdit()
+        self.to_date.setCalendarPopup(True)
+        self.to_date.setDate(QDate.currentDate())
+        filter_layout.addWidget(self.to_date)
+
+        filter_layout.addWidget(QLabel("User:"))
+        self.user_combo = QComboBox()
+        self.user_combo.setEditable(True)
+        filter_layout.addWidget(self.user_combo)
+
+        filter_layout.addWidget(QLabel("Action:"))
+        self.action_input = QLineEdit()
+        self.action_input.setPlaceholderText("contains...")
+        self.action_input.returnPressed.connect(self.load_logs)
+        filter_layout.addWidget(self.action_input)
+
+        apply_btn = QPushButton("Apply Filter")
+        apply_btn.clicked.connect(self.load_logs)
+        filter_layout.addWidget(apply_btn)
+
+        self.export_btn = QPushButton("Export...")
+        self.export_btn.clicked.connect(self.export_logs)
+        filter_layout.addWidget(self.export_btn)
+
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
         # =========================
         # Table
         # =========================
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels([
-            "Date & Time",
-            "Username",
-            "Action",
-            "Note"
-        ])
-
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table = QTableView()
+        self.model = AuditLogModel([
+            ("Date & Time", "datetime"),
+            ("Username", "username"),
+            ("Action", "action"),
+            ("Note", "note")
+        ], self.table)
+        self.table.setModel(self.model)
+
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table.horizontalHeader().setStretchLastSection(True)
 
         layout.addWidget(self.table)
@@ -48,27 +163,51 @@ class AuditLogsPage(QWidget):
         refresh_btn.clicked.connect(self.load_logs)
         layout.addWidget(refresh_btn)
 
+        self.load_users()
         self.load_logs()
 
+    # -------------------------------------------------
+    # User filter choices
+    # -------------------------------------------------
+    def load_users(self):
+        # From the small users table, not a DISTINCT over all logs
+        with db_session() as conn:
+            rows = conn.execute(
+                "SELECT username FROM users ORDER BY username"
+            ).fetchall()
+
+        self.user_combo.clear()
+        self.user_combo.addItem(ALL_USERS)
+        self.user_combo.addItem("SYSTEM")
+        for r in rows:
+            self.user_combo.addItem(r["username"])
+
     # -------------------------------------------------
     # Load logs from database
     # -------------------------------------------------
+    def filters(self):
+        """
+        (start, end, user, action) for the current filter choices.
+        """
+        start = self.from_date.date().toString("yyyy-MM-dd") + " 00:00:00"
+        end = self.to_date.date().toString("yyyy-MM-dd") + " 23:59:59"
+
+        user = self.user_combo.currentText().strip()
+        if user == ALL_USERS:
+            user = None
+
+        return start, end, user, self.action_input.text().strip()
+
     def load_logs(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT datetime, username, action, note
-            FROM logs
-            ORDER BY datetime DESC
-        """)
-        rows = cur.fetchall()
-        conn.close()
-
-        self.table.setRowCount(len(rows))
-
-        for r, log in enumerate(rows):
-            self.table.setItem(r, 0, QTableWidgetItem(log["datetime"]))
-            self.table.setItem(r, 1, QTableWidgetItem(log["username"]))
-            self.table.setItem(r, 2, QTableWidgetItem(log["action"]))
-            self.table.setItem(r, 3, QTableWidgetItem(log["note"] or ""))
+        # Show entries still waiting in the audit queue too
+        flush_audit()
+
+        # Rows are read a batch at a time as the table scrolls
+        self.model.set_filters(*self.filters())
+
+    # -------------------------------------------------
+    # Export the filtered logs (CSV / XLSX)
+    # -------------------------------------------------
+    def export_logs(self):
+        flush_audit()
+        export_to_file(self, self.export_btn, "Audit Logs", self.exports.export_logs, *self.filters())
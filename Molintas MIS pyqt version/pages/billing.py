@@ -2,21 +2,30 @@
 # Client Billing page
 # Handles residential and commercial billing only (trucks excluded)
 
+import math
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QTableWidget, QTableWidgetItem, QTextEdit,
-    QLineEdit, QPushButton, QMessageBox, QGroupBox
+    QTableView, QTextEdit,
+    QLineEdit, QPushButton, QMessageBox, QGroupBox,
+    QFileDialog
 )
 from PyQt6.QtCore import Qt
-from datetime import datetime
-from db import get_db_conn
-from audit import log_action
+from core import BillingService, ClientService, PaymentService, ServiceError
+from core.clients import BILLABLE_SQL
+from pages.table_model import SqlTableModel
+from money import fmt, to_cents
+from settings_service import get_settings
 
 
 class BillingPage(QWidget):
     def __init__(self):
         super().__init__()
 
+        self.clients = ClientService()
+        self.billing = BillingService()
+        self.payments = PaymentService()
+
         main_layout = QVBoxLayout(self)
         
         # =========================
@@ -29,22 +38,22 @@ class BillingPage(QWidget):
         # =========================
         # Clients table
         # =========================
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "Name",
-            "Type",
-            "Billing Type",
-            "Usage (m³)",
-            "Bill (₱)",
-            "Status",
-            "Payment Status"
-        ])
-
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.table.itemSelectionChanged.connect(self.show_details)
+        self.table = QTableView()
+        self.model = SqlTableModel([
+            ("Name", "name"),
+            ("Type", "type"),
+            ("Billing Type", lambda c: c["billing_type"] or "N/A"),
+            ("Usage (m³)", "usage"),
+            ("Bill (₱)", lambda c: fmt(c["bill"])),
+            ("Status", "status"),
+            ("Payment Status", "payment_status")
+        ], self.table)
+        self.table.setModel(self.model)
+
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.table.selectionModel().selectionChanged.connect(lambda *_: self.show_details())
 
         main_layout.addWidget(self.table)
 
@@ -76,6 +85,16 @@ class BillingPage(QWidget):
         add_usage_btn.clicked.connect(self.add_usage)
         usage_layout.addWidget(add_usage_btn)
 
+        import_btn = QPushButton("Import Readings...")
+        import_btn.clicked.connect(self.import_readings)
+        usage_layout.addWidget(import_btn)
+
+        # Follows the Settings page
+        self.rate_label = QLabel()
+        usage_layout.addWidget(self.rate_label)
+        get_settings().changed.connect(self.show_rates)
+        self.show_rates()
+
         usage_layout.addStretch()
         main_layout.addLayout(usage_layout)
 
@@ -94,6 +113,10 @@ class BillingPage(QWidget):
         pay_btn.clicked.connect(self.record_payment)
         payment_layout.addWidget(pay_btn)
 
+        import_payments_btn = QPushButton("Import Payments...")
+        import_payments_btn.clicked.connect(self.import_payments)
+        payment_layout.addWidget(import_payments_btn)
+
         payment_layout.addStretch()
         main_layout.addWidget(payment_group)
 
@@ -124,33 +147,24 @@ class BillingPage(QWidget):
     # Load clients (NON-TRUCK ONLY)
     # -------------------------------------------------
     def load_clients(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT * FROM clients
-            WHERE type IN ('household', 'apartment')
-            AND status = 'Active'
-            ORDER BY name
-
-
-        """)
-        rows = cur.fetchall()
-        conn.close()
-
-        self.table.setRowCount(len(rows))
+        # Keep the selected client selected across the reload
+        selected_id = self.selected_id()
+        selected = self.table.selectionModel().selectedRows()
 
-        for r, c in enumerate(rows):
-            self.table.setItem(r, 0, QTableWidgetItem(c["name"]))
-            self.table.setItem(r, 1, QTableWidgetItem(c["type"]))
+        # Rows are read lazily as the table scrolls
+        self.model.set_query(BILLABLE_SQL)
 
-            billing_display = c["billing_type"] or "N/A"
-            self.table.setItem(r, 2, QTableWidgetItem(billing_display))
+        if selected_id is not None:
+            row = selected[0].row()
+            self.model.ensure_rows(row + 1)
+            if row < self.model.rowCount() and self.model.row_at(row)["id"] == selected_id:
+                self.table.selectRow(row)
 
-            self.table.setItem(r, 3, QTableWidgetItem(str(c["usage"])))
-            self.table.setItem(r, 4, QTableWidgetItem(f"₱{c['bill']:.2f}"))
-            self.table.setItem(r, 5, QTableWidgetItem(c["status"]))
-            self.table.setItem(r, 6, QTableWidgetItem(c["payment_status"]))
+    def selected_id(self):
+        selected = self.table.selectionModel().selectedRows()
+        if not selected:
+            return None
+        return self.model.row_at(selected[0].row())["id"]
 
 
 
@@ -170,14 +184,8 @@ class BillingPage(QWidget):
             self.history.clear()
             return
 
-        row = selected[0].row()
-        name = self.table.item(row, 0).text()
-
-        conn = get_db_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM clients WHERE name = ?", (name,))
-        c = cur.fetchone()
-        conn.close()
+        client_id = self.model.row_at(selected[0].row())["id"]
+        c = self.clients.get(client_id)
 
         if not c:
             return
@@ -187,12 +195,12 @@ class BillingPage(QWidget):
             f"Type: {c['type']}\n"
             f"Billing Type: {c['billing_type'] or 'N/A'}\n"
             f"Usage: {c['usage']} m³\n"
-            f"Bill: ₱{c['bill']:.2f}\n"
+            f"Bill: {fmt(c['bill'])}\n"
             f"Lifecycle Status: {c['status']}\n"
             f"Payment Status: {c['payment_status']}\n"
         )
 
-        self.load_payment_history(name)
+        self.load_payment_history(client_id)
 
     # -------------------------------------------------
     # Add usage and compute bill
@@ -205,63 +213,69 @@ class BillingPage(QWidget):
 
         try:
             usage = float(self.usage_input.text())
-            if usage <= 0:
+            # float() accepts "nan" and "inf"
+            if not (math.isfinite(usage) and usage > 0):
                 raise ValueError
         except ValueError:
             QMessageBox.warning(self, "Invalid Input", "Enter a valid usage amount.")
             return
 
-        row = selected[0].row()
-        name = self.table.item(row, 0).text()
+        client_id = self.model.row_at(selected[0].row())["id"]
 
-        conn = get_db_conn()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT type, usage, bill, billing_type
-            FROM clients
-            WHERE name = ?
-        """, (name,))
-        client = cur.fetchone()
-
-        if not client or client["type"].lower() == "truck" or not client["billing_type"]:
-            conn.close()
-            QMessageBox.warning(
-                self,
-                "Invalid Client",
-                "Truck clients are billed through Truck Salok."
-            )
+        # Charged at the rate in effect now, and audited
+        try:
+            added_bill = self.billing.add_usage(client_id, usage)
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
             return
 
-        added_bill = self.compute_charge(client["billing_type"], usage)
-
-        new_usage = client["usage"] + usage
-        new_bill = client["bill"] + added_bill
+        self.usage_input.clear()
+        self.load_clients()
+        self.show_details()
 
-        bill_date = datetime.now().strftime("%Y-%m-%d")
+        QMessageBox.information(
+            self,
+            "Usage Added",
+            f"Added {usage} m³\nCharge: {fmt(added_bill)}"
+        )
 
-        cur.execute("""
-            UPDATE clients
-            SET usage = ?, bill = ?, date = ?, payment_status = 'Unpaid'
-            WHERE name = ?
-        """, (new_usage, new_bill, bill_date, name))
+    # -------------------------------------------------
+    # Import a month of meter readings (CSV / XLSX)
+    # -------------------------------------------------
+    def import_readings(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Meter Readings", "",
+            "Meter readings (*.csv *.xlsx)"
+        )
+        if not path:
+            return
 
-        conn.commit()
-        conn.close()
+        try:
+            result = self.billing.import_readings(path)
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
+            return
+        except Exception as e:
+            QMessageBox.critical(self, "Import Failed", f"Could not read {path}:\n{e}")
+            return
 
-        log_action(
-            "SYSTEM",
-            "Added usage",
-            f"{name}: +{usage} m³ (₱{added_bill:.2f})"
-        )
+        # All or nothing: a rejected row means nothing was billed
+        if result.errors:
+            QMessageBox.warning(
+                self,
+                "Import Rejected",
+                "Nothing was billed. Fix these rows and import the file again.\n\n"
+                + result.summary()
+            )
+            return
 
-        self.usage_input.clear()
         self.load_clients()
         self.show_details()
 
         QMessageBox.information(
             self,
-            "Usage Added",
-            f"Added {usage} m³\nCharge: ₱{added_bill:.2f}"
+            "Readings Imported",
+            f"{result.summary()}\nTotal billed: {fmt(result.total)}"
         )
 
     # -------------------------------------------------
@@ -274,89 +288,76 @@ class BillingPage(QWidget):
             return
 
         try:
-            amount = float(self.payment_input.text())
+            amount = to_cents(self.payment_input.text())
             if amount <= 0:
                 raise ValueError
         except ValueError:
             QMessageBox.warning(self, "Invalid Input", "Enter a valid payment amount.")
             return
 
-        row = selected[0].row()
-        name = self.table.item(row, 0).text()
+        client_id = self.model.row_at(selected[0].row())["id"]
 
-        conn = get_db_conn()
-        cur = conn.cursor()
+        # Refused if it is more than the current bill
+        try:
+            self.billing.record_payment(client_id, amount)
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
+            return
 
-        cur.execute("SELECT bill FROM clients WHERE name = ?", (name,))
-        client = cur.fetchone()
+        self.payment_input.clear()
+        self.load_clients()
+        self.show_details()
+
+        QMessageBox.information(
+            self,
+            "Payment Recorded",
+            f"Payment of {fmt(amount)} recorded."
+        )
 
-        if not client:
-            conn.close()
+    # -------------------------------------------------
+    # Post a file of client / truck payments (CSV / XLSX)
+    # -------------------------------------------------
+    def import_payments(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Payments", "",
+            "Payments (*.csv *.xlsx)"
+        )
+        if not path:
+            return
+
+        try:
+            result = self.payments.import_payments(path)
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
+            return
+        except Exception as e:
+            QMessageBox.critical(self, "Import Failed", f"Could not read {path}:\n{e}")
             return
 
-        if amount > client["bill"]:
-            conn.close()
+        # All or nothing: a rejected row means nothing was posted
+        if result.errors:
             QMessageBox.warning(
                 self,
-                "Invalid Payment",
-                "Payment cannot exceed the current bill."
+                "Import Rejected",
+                "No payments were posted. Fix these rows and import the file again.\n\n"
+                + result.summary()
             )
             return
 
-        cur.execute("""
-            INSERT INTO payments (client, amount, date, note)
-            VALUES (?, ?, ?, ?)
-        """, (
-            name,
-            amount,
-            datetime.now().strftime("%Y-%m-%d"),
-            "Payment received"
-        ))
-
-        new_bill = client["bill"] - amount
-        payment_status = "Paid" if new_bill == 0 else "Unpaid"
-
-
-        cur.execute("""
-            UPDATE clients
-            SET bill = ?, payment_status = ?
-            WHERE name = ?
-        """, (new_bill, payment_status, name))
-
-        conn.commit()
-        conn.close()
-
-        log_action(
-            "SYSTEM",
-            "Recorded payment",
-            f"{name}: ₱{amount:.2f}"
-        )
-
-        self.payment_input.clear()
         self.load_clients()
         self.show_details()
 
         QMessageBox.information(
             self,
-            "Payment Recorded",
-            f"Payment of ₱{amount:.2f} recorded."
+            "Payments Imported",
+            f"{result.summary()}\nTotal posted: {fmt(result.total)}"
         )
 
     # -------------------------------------------------
     # Load payment history
     # -------------------------------------------------
-    def load_payment_history(self, client_name):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT amount, date, note
-            FROM payments
-            WHERE client = ?
-            ORDER BY date DESC
-        """, (client_name,))
-        rows = cur.fetchall()
-        conn.close()
+    def load_payment_history(self, client_id):
+        rows = self.billing.payment_history(client_id)
 
         if not rows:
             self.history.setText("No payments recorded.")
@@ -364,28 +365,24 @@ class BillingPage(QWidget):
 
         text = ""
         for r in rows:
-            text += f"{r['date']} - ₱{r['amount']:.2f} ({r['note']})\n"
+            text += f"{r['date']} - {fmt(r['amount'])} ({r['note']})\n"
 
         self.history.setText(text)
 
     # -------------------------------------------------
     # Compute billing charge
     # -------------------------------------------------
-    def compute_charge(self, billing_type, usage):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        if billing_type == "Commercial":
-            rate = float(self.get_setting(cur, "COM_RATE", 50))
-        else:
-            rate = float(self.get_setting(cur, "RES_RATE", 37))
-
-        conn.close()
-        return usage * rate
-
-
-
-    def get_setting(self, cursor, key, default):
-        cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-        row = cursor.fetchone()
-        return row["value"] if row else default
+    def compute_charge(self, billing_type, usage, when=None):
+        return self.billing.compute_charge(billing_type, usage, when)
+
+    def get_rate(self, billing_type, when=None):
+        # Centavos per m³ in effect at `when` (default now), from the
+        # cached rate schedule
+        return self.billing.rate_for(billing_type, when)
+
+    def show_rates(self, *_):
+        settings = get_settings()
+        self.rate_label.setText(
+            f"Residential {fmt(settings.res_rate)} / m³   "
+            f"Commercial {fmt(settings.com_rate)} / m³"
+        )
@@ -4,19 +4,23 @@
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QTableWidget, QTableWidgetItem,
+    QTableView,
     QPushButton, QMessageBox, QDialog,
     QLineEdit, QComboBox, QFormLayout, QTabWidget
 )
 from PyQt6.QtCore import Qt
-from db import get_db_conn
-from audit import log_action
+from core import ClientService, ServiceError
+from core.clients import RESIDENTIAL_SQL, TRUCKS_SQL
+from pages.table_model import SqlTableModel
+from money import fmt
 
 
 class ClientsPage(QWidget):
     def __init__(self):
         super().__init__()
 
+        self.clients = ClientService()
+
         main_layout = QVBoxLayout(self)
 
         # =========================
@@ -62,12 +66,12 @@ class ClientsPage(QWidget):
         main_layout.addWidget(self.tabs)
 
         # Residential / Apartment
-        self.res_table = QTableWidget()
+        self.res_table = QTableView()
         self.setup_table(self.res_table)
         self.tabs.addTab(self.res_table, "Household / Apartment")
 
         # Trucks
-        self.truck_table = QTableWidget()
+        self.truck_table = QTableView()
         self.setup_table(self.truck_table)
         self.tabs.addTab(self.truck_table, "Trucks")
 
@@ -77,69 +81,30 @@ class ClientsPage(QWidget):
     # Table setup
     # =========================
     def setup_table(self, table):
-        table.setColumnCount(7)
-        table.setHorizontalHeaderLabels([
-            "Name",
-            "Type",
-            "Billing Type",
-            "Usage (m³)",
-            "Bill (₱)",
-            "Lifecycle",
-            "Payment"
-        ])
-        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        table.setModel(SqlTableModel([
+            ("Name", "name"),
+            ("Type", "type"),
+            ("Billing Type", lambda c: c["billing_type"] or "N/A"),
+            ("Usage (m³)", "usage"),
+            ("Bill (₱)", lambda c: fmt(c["bill"])),
+            ("Lifecycle", "status"),
+            # Payment status — ONLY for non-trucks
+            ("Payment", lambda c: "N/A" if c["type"] == "truck" else c["payment_status"]),
+        ], table))
+        table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
 
     # =========================
     # Load clients
     # =========================
     def load_clients(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
+        # Rows are read lazily as the tables scroll
         # Residential + Apartment
-        cur.execute("""
-            SELECT * FROM clients
-            WHERE type IN ('household', 'apartment')
-            ORDER BY name
-        """)
-        res_rows = cur.fetchall()
-
-        self.res_table.setRowCount(len(res_rows))
-        for r, c in enumerate(res_rows):
-            self.populate_row(self.res_table, r, c)
+        self.res_table.model().set_query(RESIDENTIAL_SQL)
 
         # Trucks
-        cur.execute("""
-            SELECT * FROM clients
-            WHERE type = 'truck'
-            ORDER BY name
-        """)
-        truck_rows = cur.fetchall()
-
-        self.truck_table.setRowCount(len(truck_rows))
-        for r, c in enumerate(truck_rows):
-            self.populate_row(self.truck_table, r, c)
-
-        conn.close()
-
-    def populate_row(self, table, row, c):
-        table.setItem(row, 0, QTableWidgetItem(c["name"]))
-        table.setItem(row, 1, QTableWidgetItem(c["type"]))
-        table.setItem(row, 2, QTableWidgetItem(c["billing_type"] or "N/A"))
-        table.setItem(row, 3, QTableWidgetItem(str(c["usage"])))
-        table.setItem(row, 4, QTableWidgetItem(f"₱{c['bill']:.2f}"))
-
-        # Lifecycle (Active / Inactive)
-        table.setItem(row, 5, QTableWidgetItem(c["status"]))
-
-        # Payment status — ONLY for non-trucks
-        if c["type"] == "truck":
-            table.setItem(row, 6, QTableWidgetItem("N/A"))
-        else:
-            table.setItem(row, 6, QTableWidgetItem(c["payment_status"]))
-
+        self.truck_table.model().set_query(TRUCKS_SQL)
 
     # =========================
     # Helpers
@@ -154,6 +119,12 @@ class ClientsPage(QWidget):
             return None
         return selected[0].row()
 
+    def get_selected_client(self, table):
+        row = self.get_selected_row(table)
+        if row is None:
+            return None
+        return table.model().row_at(row)
+
     # =========================
     # Add client
     # =========================
@@ -162,29 +133,10 @@ class ClientsPage(QWidget):
         if dialog.exec():
             data = dialog.get_data()
 
-            billing_type = None if data["type"] == "truck" else data["billing_type"]
-
-            conn = get_db_conn()
-            cur = conn.cursor()
-
             try:
-                cur.execute("""
-                    INSERT INTO clients
-                    (name, type, usage, bill, date, status, payment_status, address, contact, billing_type)
-                    VALUES (?, ?, 0, 0, NULL, 'Active', 'Unpaid', ?, ?, ?)
-                """, (
-                    data["name"],
-                    data["type"],
-                    data["address"],
-                    data["contact"],
-                    billing_type
-                ))
-                conn.commit()
-                log_action("SYSTEM", "Added client", data["name"])
-            except Exception:
-                QMessageBox.critical(self, "Error", "Client name already exists.")
-            finally:
-                conn.close()
+                self.clients.add(**data)
+            except ServiceError as e:
+                QMessageBox.critical(self, e.title, str(e))
 
             self.load_clients()
 
@@ -193,40 +145,23 @@ class ClientsPage(QWidget):
     # =========================
     def edit_client(self):
         table = self.get_active_table()
-        row = self.get_selected_row(table)
-        if row is None:
+        selected = self.get_selected_client(table)
+        if selected is None:
             return
 
-        name = table.item(row, 0).text()
-
-        conn = get_db_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM clients WHERE name = ?", (name,))
-        client = cur.fetchone()
-        conn.close()
+        client_id = selected["id"]
+        client = self.clients.get(client_id)
 
         dialog = ClientDialog(self, client)
         if dialog.exec():
             data = dialog.get_data()
-            billing_type = None if data["type"] == "truck" else data["billing_type"]
-
-            conn = get_db_conn()
-            cur = conn.cursor()
-            cur.execute("""
-                UPDATE clients
-                SET type=?, billing_type=?, address=?, contact=?
-                WHERE name=?
-            """, (
-                data["type"],
-                billing_type,
-                data["address"],
-                data["contact"],
-                name
-            ))
-            conn.commit()
-            conn.close()
-
-            log_action("SYSTEM", "Edited client", name)
+            del data["name"]    # names cannot be edited
+
+            try:
+                self.clients.update(client_id, **data)
+            except ServiceError as e:
+                QMessageBox.warning(self, e.title, str(e))
+
             self.load_clients()
 
     # =========================
@@ -234,23 +169,21 @@ class ClientsPage(QWidget):
     # =========================
     def delete_client(self):
         table = self.get_active_table()
-        row = self.get_selected_row(table)
-        if row is None:
+        selected = self.get_selected_client(table)
+        if selected is None:
             return
 
-        name = table.item(row, 0).text()
+        client_id = selected["id"]
+        name = selected["name"]
 
         if QMessageBox.question(self, "Confirm", f"Delete '{name}'?") != QMessageBox.StandardButton.Yes:
             return
 
-        conn = get_db_conn()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM clients WHERE name=?", (name,))
-        cur.execute("DELETE FROM payments WHERE client=?", (name,))
-        conn.commit()
-        conn.close()
+        try:
+            self.clients.delete(client_id)
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
 
-        log_action("SYSTEM", "Deleted client", name)
         self.load_clients()
 
     # =========================
@@ -258,21 +191,15 @@ class ClientsPage(QWidget):
     # =========================
     def toggle_status(self):
         table = self.get_active_table()
-        row = self.get_selected_row(table)
-        if row is None:
+        selected = self.get_selected_client(table)
+        if selected is None:
             return
 
-        name = table.item(row, 0).text()
-        current = table.item(row, 5).text()
-        new = "Inactive" if current == "Active" else "Active"
-
-        conn = get_db_conn()
-        cur = conn.cursor()
-        cur.execute("UPDATE clients SET status=? WHERE name=?", (new, name))
-        conn.commit()
-        conn.close()
+        try:
+            self.clients.toggle_status(selected["id"])
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
 
-        log_action("SYSTEM", "Changed client status", f"{name}: {current} → {new}")
         self.load_clients()
 
 
@@ -0,0 +1,40 @@
+# pages/exporting.py
+# Export buttons shared by the pages
+#
+# Asks where to save, runs the core.ExportService call on the query
+# runner (the window stays usable while millions of rows are written)
+# and says when the file is ready.
+
+from pathlib import Path
+
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
+from query_runner import get_runner
+
+EXPORT_FILTERS = "Excel Workbook (*.xlsx);;CSV (*.csv)"
+
+
+def export_to_file(page, button, name, fn, *args):
+    """
+    Asks for a file named like `name` and runs fn(path, *args) off the
+    GUI thread. `button` is disabled until the export is done.
+    """
+    path, chosen = QFileDialog.getSaveFileName(page, f"Export {name}", name, EXPORT_FILTERS)
+    if not path:
+        return
+    if Path(path).suffix.lower() not in (".csv", ".xlsx"):
+        path += ".csv" if chosen.startswith("CSV") else ".xlsx"
+
+    def done(result):
+        button.setEnabled(True)
+        QMessageBox.information(
+            page,
+            "Export Complete",
+            f"{result.rows:,} rows written to {result.path} in {result.seconds:.1f} s"
+        )
+
+    def failed(message):
+        button.setEnabled(True)
+        QMessageBox.warning(page, "Export Failed", f"Could not export {name}:\n{message}")
+
+    button.setEnabled(False)
+    get_runner().submit(f"export {name}", fn, path, *args, on_result=done, on_error=failed)
@@ -0,0 +1,141 @@
+# pages/performance.py
+# Performance page (ADMIN ONLY)
+# Shows what profiling.py has recorded: queries grouped by SQL and
+# GUI slots grouped by name, slowest total first
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QTableWidget, QTableWidgetItem, QPushButton,
+    QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt
+from datetime import datetime
+import profiling
+
+
+class PerformancePage(QWidget):
+    def __init__(self):
+        super().__init__()
+
+        layout = QVBoxLayout(self)
+
+        # =========================
+        # Title
+        # =========================
+        title = QLabel("Performance")
+        title.setStyleSheet("font-size: 18px; font-weight: bold;")
+        layout.addWidget(title)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # =========================
+        # Queries
+        # =========================
+        layout.addWidget(QLabel("Queries"))
+        self.query_table = self.make_table([
+            "SQL", "Count", "Total ms", "Max ms", "Rows", "Called From"
+        ])
+        layout.addWidget(self.query_table, 2)
+
+        # =========================
+        # GUI slots
+        # =========================
+        layout.addWidget(QLabel("GUI Slots"))
+        self.slot_table = self.make_table([
+            "Slot", "Count", "Total ms", "Max ms"
+        ])
+        layout.addWidget(self.slot_table, 1)
+
+        # =========================
+        # Buttons
+        # =========================
+        btn_layout = QHBoxLayout()
+
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+        btn_layout.addWidget(refresh_btn)
+
+        clear_btn = QPushButton("Clear")
+        clear_btn.clicked.connect(self.clear)
+        btn_layout.addWidget(clear_btn)
+
+        save_btn = QPushButton("Save JSON")
+        save_btn.clicked.connect(self.save_json)
+        btn_layout.addWidget(save_btn)
+
+        btn_layout.addStretch()
+        layout.addLayout(btn_layout)
+
+        self.refresh()
+
+    def make_table(self, headers):
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    # -------------------------------------------------
+    # Fill tables from the profiler
+    # -------------------------------------------------
+    def refresh(self):
+        if not profiling.enabled():
+            self.status_label.setText(
+                "Profiling is off. Start the app with MOLINTAS_PROFILE=1 to record timings."
+            )
+        else:
+            self.status_label.setText("Profiling is on.")
+
+        summary = profiling.summary()
+
+        self.fill(self.query_table, [
+            [q["sql"], q["count"], q["total_ms"], q["max_ms"], q["rows"], ", ".join(q["contexts"])]
+            for q in summary["queries"]
+        ])
+        self.fill(self.slot_table, [
+            [s["slot"], s["count"], s["total_ms"], s["max_ms"]]
+            for s in summary["slots"]
+        ])
+
+    def fill(self, table, rows):
+        table.setRowCount(len(rows))
+
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                text = f"{value:.1f}" if isinstance(value, float) else str(value)
+                item = QTableWidgetItem(text)
+                if c == 0:
+                    item.setToolTip(text)
+                else:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(r, c, item)
+
+        table.resizeColumnsToContents()
+        # Long SQL is in the tooltip
+        table.setColumnWidth(0, min(table.columnWidth(0), 500))
+
+    def clear(self):
+        profiling.clear()
+        self.refresh()
+
+    # -------------------------------------------------
+    # Save everything recorded
+    # -------------------------------------------------
+    def save_json(self):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Profile",
+            f"molintas_profile_{timestamp}.json",
+            "JSON Files (*.json)"
+        )
+        if not path:
+            return
+
+        try:
+            profiling.dump_json(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Save Failed", str(e))
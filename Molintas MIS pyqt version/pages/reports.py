@@ -4,15 +4,13 @@
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QTextEdit, QPushButton, QFileDialog, QMessageBox
+    QTextEdit, QPushButton, QFileDialog, QMessageBox, QInputDialog
 )
 from PyQt6.QtCore import Qt
-from datetime import date, timedelta
-from db import get_db_conn
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from audit import log_action
+from core import ExportService, ReportService
+from core.exports import TABLES
+from pages.exporting import export_to_file
+from query_runner import get_runner
 import os
 
 
@@ -20,6 +18,9 @@ class ReportsPage(QWidget):
     def __init__(self):
         super().__init__()
 
+        self.reports = ReportService()
+        self.exports = ExportService()
+
         self.mode = "daily"
         self.current_report_text = ""
         self.current_report_title = ""
@@ -57,11 +58,15 @@ class ReportsPage(QWidget):
         pdf_btn = QPushButton("Export to PDF")
         pdf_btn.clicked.connect(self.export_pdf)
 
+        self.export_btn = QPushButton("Export Data...")
+        self.export_btn.clicked.connect(self.export_data)
+
         refresh_btn = QPushButton("Refresh")
         refresh_btn.clicked.connect(self.load_reports)
 
         btn_layout.addWidget(gen_btn)
         btn_layout.addWidget(pdf_btn)
+        btn_layout.addWidget(self.export_btn)
         btn_layout.addWidget(refresh_btn)
 
         main_layout.addLayout(btn_layout)
@@ -107,173 +112,27 @@ class ReportsPage(QWidget):
     # Load report
     # =========================
     def load_reports(self):
-        if self.mode == "daily":
-            d = date.today().strftime("%Y-%m-%d")
-            text = self.truck_report(d, d, "DAILY")
-            text += "\n" + "=" * 50 + "\n\n"
-            text += self.billing_daily_report(d)
-
-        elif self.mode == "weekly":
-            s, e = self.get_week_range()
-            text = self.truck_report(s, e, "WEEKLY")
-            text += "\n" + "=" * 50 + "\n\n"
-            text += self.billing_weekly_report(s, e)
-
-        elif self.mode == "monthly":
-            s, e = self.get_month_range()
-            text = self.truck_report(s, e, "MONTHLY")
-            text += "\n" + "=" * 50 + "\n\n"
-            text += self.billing_monthly_report(s, e)
-
-        elif self.mode == "quarterly":
-            s, e = self.get_quarter_range()
-            text = self.truck_report(s, e, "QUARTERLY")
-            text += "\n" + "=" * 50 + "\n\n"
-            text += self.billing_quarterly_report(s, e)
-
-        else:
-            s, e = self.get_year_range()
-            text = self.truck_report(s, e, "ANNUAL")
-            text += "\n" + "=" * 50 + "\n\n"
-            text += self.billing_annual_report(s, e)
-
+        # Built on a worker thread; a newer click replaces an older one
+        self.report_box.setText("Loading report...")
+        get_runner().submit(
+            "reports",
+            self.build_report,
+            self.mode,
+            on_result=self.show_report,
+            on_error=self.show_report_error
+        )
+
+    def show_report(self, text):
         self.current_report_text = text
         self.report_box.setText(text)
 
-    # =========================
-    # Truck billing report (PER-TRUCK)
-    # =========================
-    def truck_report(self, start_date, end_date, label):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        # Overall totals
-        cur.execute("""
-            SELECT SUM(drums * price) AS charges
-            FROM truck_saloks
-            WHERE date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        total_charges = cur.fetchone()["charges"] or 0
-
-        cur.execute("""
-            SELECT SUM(amount) AS payments
-            FROM truck_payments
-            WHERE date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        total_payments = cur.fetchone()["payments"] or 0
-
-        # Per-truck breakdown
-        cur.execute("""
-            SELECT
-                t.truck,
-                SUM(t.drums * t.price) AS charges,
-                COALESCE(SUM(p.amount), 0) AS payments
-            FROM truck_saloks t
-            LEFT JOIN truck_payments p
-                ON t.truck = p.truck
-                AND p.date BETWEEN ? AND ?
-            WHERE t.date BETWEEN ? AND ?
-            GROUP BY t.truck
-            ORDER BY t.truck
-        """, (start_date, end_date, start_date, end_date))
-
-        rows = cur.fetchall()
-        conn.close()
-
-        text = f"🚚 TRUCK BILLING - {label} REPORT\n"
-        text += f"({start_date} to {end_date})\n"
-        text += "-" * 50 + "\n"
-
-        if total_charges == 0 and total_payments == 0:
-            return text + "No truck transactions for this period.\n"
-
-        text += f"Total Charges: ₱{total_charges:.2f}\n"
-        text += f"Total Payments: ₱{total_payments:.2f}\n"
-        text += f"Outstanding Balance: ₱{(total_charges - total_payments):.2f}\n\n"
-
-        text += "Per Truck Breakdown:\n"
-        for r in rows:
-            bal = (r["charges"] or 0) - (r["payments"] or 0)
-            text += (
-                f"- {r['truck']}: "
-                f"Charges ₱{r['charges']:.2f}, "
-                f"Payments ₱{r['payments']:.2f}, "
-                f"Balance ₱{bal:.2f}\n"
-            )
-
-        return text
-
-    # =========================
-    # Client billing reports (UNCHANGED)
-    # =========================
-    def billing_daily_report(self, d):
-        return self._billing_range("DAILY", d, d)
-
-    def billing_weekly_report(self, s, e):
-        return self._billing_range("WEEKLY", s, e)
-
-    def billing_monthly_report(self, s, e):
-        return self._billing_range("MONTHLY", s, e)
-
-    def billing_quarterly_report(self, s, e):
-        return self._billing_range("QUARTERLY", s, e)
-
-    def billing_annual_report(self, s, e):
-        return self._billing_range("ANNUAL", s, e)
-
-    def _billing_range(self, label, start_date, end_date):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT SUM(usage) AS usage, SUM(bill) AS bill
-            FROM clients
-            WHERE date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        b = cur.fetchone()
-
-        cur.execute("""
-            SELECT SUM(amount) AS paid
-            FROM payments
-            WHERE date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        p = cur.fetchone()
-
-        conn.close()
-
-        text = f"💧 CLIENT BILLING - {label} REPORT\n"
-        text += f"({start_date} to {end_date})\n"
-        text += "-" * 50 + "\n"
-        text += f"Usage Added: {b['usage'] or 0} m³\n"
-        text += f"Billing Added: ₱{b['bill'] or 0:.2f}\n"
-        text += f"Payments Collected: ₱{p['paid'] or 0:.2f}\n"
-
-        return text
+    def show_report_error(self, message):
+        self.current_report_text = ""
+        self.report_box.setText(f"Could not load report:\n{message}")
 
-    # =========================
-    # Date helpers
-    # =========================
-    def get_week_range(self):
-        t = date.today()
-        s = t - timedelta(days=t.weekday())
-        return s.strftime("%Y-%m-%d"), (s + timedelta(days=6)).strftime("%Y-%m-%d")
-
-    def get_month_range(self):
-        t = date.today()
-        s = t.replace(day=1)
-        e = (s.replace(month=s.month % 12 + 1, day=1) - timedelta(days=1))
-        return s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")
-
-    def get_quarter_range(self):
-        t = date.today()
-        q = (t.month - 1) // 3
-        s = date(t.year, q * 3 + 1, 1)
-        e = (date(t.year, q * 3 + 4, 1) - timedelta(days=1))
-        return s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")
-
-    def get_year_range(self):
-        y = date.today().year
-        return f"{y}-01-01", f"{y}-12-31"
+    def build_report(self, mode):
+        # Runs off the GUI thread: database + text only, no widgets
+        return self.reports.build(mode)
 
     # =========================
     # Export / logging
@@ -292,6 +151,11 @@ class ReportsPage(QWidget):
         if not path.endswith(".pdf"):
             path += ".pdf"
 
+        # reportlab is slow to import; only exporting needs it
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.units import inch
+
         c = canvas.Canvas(path, pagesize=A4)
         w, h = A4
         y = h - inch
@@ -310,3 +174,15 @@ class ReportsPage(QWidget):
             y -= 14
 
         c.save()
+
+    def export_data(self):
+        # A whole table to CSV / XLSX; audit logs are exported from the
+        # (admin only) Audit Logs page
+        tables = {t.title: name for name, t in TABLES.items() if name != "logs"}
+        title, ok = QInputDialog.getItem(
+            self, "Export Data", "Table:", list(tables), 0, False
+        )
+        if not ok:
+            return
+
+        export_to_file(self, self.export_btn, title, self.exports.export_table, tables[title])
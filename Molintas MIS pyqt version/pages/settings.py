@@ -6,12 +6,15 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton,
     QMessageBox, QTableWidget, QTableWidgetItem,
-    QFileDialog
+    QFileDialog, QDateEdit
 )
-from PyQt6.QtCore import Qt
-from db import get_db_conn, DB_PATH
-from audit import log_action
-import shutil
+from PyQt6.QtCore import Qt, QDate
+from db import db_session, restore_db
+from audit import log_action, flush_audit
+from settings_service import get_settings
+from money import fmt
+from rates import EPOCH, RATE_KEYS
+import sqlite3
 import os
 from datetime import datetime
 
@@ -49,6 +52,13 @@ class SettingsPage(QWidget):
         self.value_input = QLineEdit()
         edit_layout.addWidget(self.value_input)
 
+        # Rates only; earlier charges keep the rate they were made at
+        edit_layout.addWidget(QLabel("Effective From:"))
+        self.effective_date = QDateEdit()
+        self.effective_date.setCalendarPopup(True)
+        self.effective_date.setDate(QDate.currentDate())
+        edit_layout.addWidget(self.effective_date)
+
         save_btn = QPushButton("Save")
         save_btn.clicked.connect(self.save_setting)
         edit_layout.addWidget(save_btn)
@@ -56,7 +66,18 @@ class SettingsPage(QWidget):
         edit_layout.addStretch()
         main_layout.addLayout(edit_layout)
 
+        # =========================
+        # Rate history (selected rate)
+        # =========================
+        self.history_table = QTableWidget()
+        self.history_table.setColumnCount(2)
+        self.history_table.setHorizontalHeaderLabels(["Effective From", "Rate (₱)"])
+        self.history_table.horizontalHeader().setStretchLastSection(True)
+        self.history_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        main_layout.addWidget(self.history_table)
+
         self.table.itemSelectionChanged.connect(self.load_selected_value)
+        get_settings().changed.connect(self.load_settings)
 
         self.load_settings()
 
@@ -79,22 +100,28 @@ class SettingsPage(QWidget):
     # -------------------------------------------------
     # Load settings from database
     # -------------------------------------------------
-    def load_settings(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("SELECT key, value FROM settings ORDER BY key")
-        rows = cur.fetchall()
-        conn.close()
+    def load_settings(self, *_):
+        selected = self.selected_key()
+        rows = sorted(get_settings().values().items())
 
         self.table.setRowCount(len(rows))
 
-        for r, s in enumerate(rows):
-            self.table.setItem(r, 0, QTableWidgetItem(str(s["key"])))
-            self.table.setItem(r, 1, QTableWidgetItem(str(s["value"])))
+        for r, (key, value) in enumerate(rows):
+            self.table.setItem(r, 0, QTableWidgetItem(str(key)))
+            self.table.setItem(r, 1, QTableWidgetItem(str(value)))
 
         self.table.resizeColumnsToContents()
 
+        # Keep the same setting selected (and its history shown)
+        for r, (key, _) in enumerate(rows):
+            if key == selected:
+                self.table.selectRow(r)
+        self.load_history(selected)
+
+    def selected_key(self):
+        selected = self.table.selectedItems()
+        return selected[0].text() if selected else None
+
     # -------------------------------------------------
     # Load selected value into input
     # -------------------------------------------------
@@ -104,6 +131,20 @@ class SettingsPage(QWidget):
             return
 
         self.value_input.setText(selected[1].text())
+        self.load_history(selected[0].text())
+
+    def load_history(self, key):
+        rows = get_settings().history(key) if key in RATE_KEYS else []
+        rows.reverse()
+
+        self.history_table.setRowCount(len(rows))
+
+        for r, (effective_from, rate) in enumerate(rows):
+            start = "Always" if effective_from == EPOCH else effective_from
+            self.history_table.setItem(r, 0, QTableWidgetItem(start))
+            self.history_table.setItem(r, 1, QTableWidgetItem(fmt(rate, symbol="")))
+
+        self.history_table.resizeColumnsToContents()
 
     # -------------------------------------------------
     # Save updated setting value (NUMERIC SAFE)
@@ -122,26 +163,25 @@ class SettingsPage(QWidget):
             QMessageBox.warning(self, "Invalid Value", "Value must be a number.")
             return
 
-        conn = get_db_conn()
-        cur = conn.cursor()
+        # Today means from now on; another date from its midnight
+        effective_from = None
+        if self.effective_date.date() != QDate.currentDate():
+            effective_from = self.effective_date.date().toString("yyyy-MM-dd") + " 00:00:00"
 
-        cur.execute("""
-            UPDATE settings
-            SET value = ?
-            WHERE key = ?
-        """, (value, key))
+        # Writes, reloads the cache and tells the open pages
+        # (this table included, through `changed`)
+        effective_from = get_settings().set(key, value, effective_from)
 
-        conn.commit()
-        conn.close()
-
-        log_action("SYSTEM", "Updated setting", f"{key} = {value}")
-
-        self.load_settings()
+        if effective_from:
+            log_action("SYSTEM", "Updated setting", f"{key} = {value} from {effective_from}")
+        else:
+            log_action("SYSTEM", "Updated setting", f"{key} = {value}")
 
         QMessageBox.information(
             self,
             "Settings Updated",
-            f"{key} updated successfully."
+            f"{key} updated successfully"
+            + (f" (effective {effective_from})." if effective_from else ".")
         )
 
     # -------------------------------------------------
@@ -162,7 +202,12 @@ class SettingsPage(QWidget):
             return
 
         try:
-            shutil.copy(DB_PATH, file_path)
+            # In WAL mode recent changes may still sit in the -wal file,
+            # so copy through SQLite instead of copying the .db file
+            backup = sqlite3.connect(file_path)
+            with db_session() as conn:
+                conn.backup(backup)
+            backup.close()
             QMessageBox.information(
                 self,
                 "Backup Successful",
@@ -197,7 +242,11 @@ class SettingsPage(QWidget):
             return
 
         try:
-            shutil.copy(file_path, DB_PATH)
+            # Through the live connections, never a file copy over the
+            # open WAL database
+            flush_audit()
+            restore_db(file_path)
+            get_settings().invalidate()
             QMessageBox.information(
                 self,
                 "Restore Successful",
@@ -0,0 +1,133 @@
+# pages/table_model.py
+# Shared lazy table model for the page tables
+#
+# QTableWidget needs a QTableWidgetItem for every cell up front.
+# This model keeps the plain sqlite rows instead, reads them in batches
+# as the view scrolls (canFetchMore / fetchMore), and formats cells
+# only when Qt asks to paint them.
+#
+# Each batch is its own LIMIT / OFFSET query in its own db_session, so
+# no connection or read transaction is held between scrolls (an open
+# cursor would pin the WAL and keep checkpoints, restore and
+# close_all waiting for as long as the table sat half-scrolled).
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from db import db_session
+
+BATCH_SIZE = 200
+
+
+class SqlTableModel(QAbstractTableModel):
+    """
+    columns: list of (header, value) where value is a column name or a
+    function taking the sqlite3.Row and returning the text to show.
+    """
+
+    def __init__(self, columns, parent=None, batch_size=BATCH_SIZE):
+        super().__init__(parent)
+        self.columns = columns
+        self.batch_size = batch_size
+        self._rows = []
+        self._query = None          # (sql, params)
+        self._has_more = False
+
+    # -------------------------------------------------
+    # Loading
+    # -------------------------------------------------
+    def set_query(self, sql, params=()):
+        """
+        Replaces the contents with the result of `sql`, which must have
+        an ORDER BY (batches are read with LIMIT / OFFSET after it).
+        Only the first batch is read now; the rest follows on scroll.
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._query = (sql, list(params))
+        self._has_more = True
+        self.endResetModel()
+
+        self.fetchMore(QModelIndex())
+
+    def fetch_batch(self):
+        """
+        Returns the next list of rows, or an empty list when done.
+        Subclasses can page differently (see AuditLogModel).
+        """
+        if not self._has_more:
+            return []
+
+        sql, params = self._query
+        with db_session() as conn:
+            batch = conn.execute(
+                f"{sql} LIMIT ? OFFSET ?",
+                [*params, self.batch_size, len(self._rows)]
+            ).fetchall()
+
+        if len(batch) < self.batch_size:
+            self._has_more = False
+        return batch
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+
+        batch = self.fetch_batch()
+        if not batch:
+            return
+
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self._rows.extend(batch)
+        self.endInsertRows()
+
+    def ensure_rows(self, count):
+        # Pull batches until `count` rows are loaded (or data runs out)
+        while len(self._rows) < count and self.canFetchMore():
+            self.fetchMore()
+
+    def clear(self):
+        self.beginResetModel()
+        self._has_more = False
+        self._rows = []
+        self.endResetModel()
+
+    # -------------------------------------------------
+    # Access helpers
+    # -------------------------------------------------
+    def row_at(self, row):
+        return self._rows[row]
+
+    def loaded_rows(self):
+        return self._rows
+
+    # -------------------------------------------------
+    # Qt model interface
+    # -------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        row = self._rows[index.row()]
+        value = self.columns[index.column()][1]
+
+        if callable(value):
+            return value(row)
+
+        v = row[value]
+        return "" if v is None else str(v)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][0]
+        return super().headerData(section, orientation, role)
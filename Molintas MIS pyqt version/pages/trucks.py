@@ -5,20 +5,26 @@
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QTableWidget, QTableWidgetItem,
+    QTableView,
     QLineEdit, QPushButton, QMessageBox,
     QComboBox, QDateEdit
 )
 from PyQt6.QtCore import Qt, QDate
-from datetime import datetime
-from db import get_db_conn
-from audit import log_action
+from core import ClientService, ExportService, ServiceError, TruckService
+from pages.exporting import export_to_file
+from pages.table_model import SqlTableModel
+from money import fmt, to_cents
+from settings_service import get_settings
 
 
 class TrucksPage(QWidget):
     def __init__(self):
         super().__init__()
 
+        self.clients = ClientService()
+        self.trucks = TruckService()
+        self.exports = ExportService()
+
         main_layout = QVBoxLayout(self)
 
         # =========================
@@ -43,6 +49,12 @@ class TrucksPage(QWidget):
         self.drums_input.setPlaceholderText("Enter number of drums")
         input_layout.addWidget(self.drums_input)
 
+        # Follows the Settings page
+        self.price_label = QLabel()
+        input_layout.addWidget(self.price_label)
+        get_settings().changed.connect(self.show_price)
+        self.show_price()
+
         add_btn = QPushButton("Add Salok")
         add_btn.clicked.connect(self.add_salok)
         input_layout.addWidget(add_btn)
@@ -79,6 +91,10 @@ class TrucksPage(QWidget):
         clear_btn.clicked.connect(self.clear_filters)
         filter_layout.addWidget(clear_btn)
 
+        self.export_btn = QPushButton("Export View...")
+        self.export_btn.clicked.connect(self.export_view)
+        filter_layout.addWidget(self.export_btn)
+
         filter_layout.addStretch()
         main_layout.addLayout(filter_layout)
 
@@ -109,126 +125,85 @@ class TrucksPage(QWidget):
         # =========================
         # Truck salok table
         # =========================
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "Truck",
-            "Drums",
-            "Price / Drum",
-            "Total (₱)",
-            "Date",
-            "Time"
-        ])
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table = QTableView()
+        self.model = SqlTableModel([
+            ("Truck", "truck"),
+            ("Drums", "drums"),
+            ("Price / Drum", lambda t: fmt(t["price"])),
+            ("Total (₱)", lambda t: fmt(t["drums"] * t["price"])),
+            ("Date", "date"),
+            ("Time", "time")
+        ], self.table)
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         main_layout.addWidget(self.table)
 
         self.load_trucks()
         self.load_logs()
         self.update_summary()
 
+    # -------------------------------------------------
+    # Current price per drum
+    # -------------------------------------------------
+    def show_price(self, *_):
+        self.price_label.setText(f"× {fmt(self.trucks.price_at())} / drum")
+
     # -------------------------------------------------
     # Load truck clients
     # -------------------------------------------------
     def load_trucks(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT name FROM clients
-            WHERE LOWER(type) = 'truck'
-            ORDER BY name
-        """)
-        rows = cur.fetchall()
-        conn.close()
+        rows = self.clients.trucks()
 
         self.truck_combo.clear()
         self.truck_combo.addItem("All Trucks")
         for r in rows:
-            self.truck_combo.addItem(r["name"])
+            self.truck_combo.addItem(r["name"], r["id"])
 
     # -------------------------------------------------
     # Load truck salok logs (FILTERED)
     # -------------------------------------------------
-    def load_logs(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        query = """
-            SELECT truck, drums, price, date, time
-            FROM truck_saloks
-            WHERE date BETWEEN ? AND ?
-        """
-        params = [
+    def logs_query(self):
+        return self.trucks.logs_query(
             self.from_date.date().toString("yyyy-MM-dd"),
-            self.to_date.date().toString("yyyy-MM-dd")
-        ]
-
-        if self.truck_combo.currentText() != "All Trucks":
-            query += " AND truck = ?"
-            params.append(self.truck_combo.currentText())
-
-        query += " ORDER BY date DESC, time DESC"
-
-        cur.execute(query, params)
-        rows = cur.fetchall()
-        conn.close()
+            self.to_date.date().toString("yyyy-MM-dd"),
+            self.truck_combo.currentData()
+        )
 
-        self.table.setRowCount(len(rows))
+    def load_logs(self):
+        # Rows are read lazily as the table scrolls
+        self.model.set_query(*self.logs_query())
 
-        for r, t in enumerate(rows):
-            total = t["drums"] * t["price"]
-            self.table.setItem(r, 0, QTableWidgetItem(t["truck"]))
-            self.table.setItem(r, 1, QTableWidgetItem(str(t["drums"])))
-            self.table.setItem(r, 2, QTableWidgetItem(f"₱{t['price']:.2f}"))
-            self.table.setItem(r, 3, QTableWidgetItem(f"₱{total:.2f}"))
-            self.table.setItem(r, 4, QTableWidgetItem(t["date"]))
-            self.table.setItem(r, 5, QTableWidgetItem(t["time"]))
+    def export_view(self):
+        # Every row of the current filter, not just the rows scrolled to
+        export_to_file(self, self.export_btn, "Saloks", self.exports.export_saloks, *self.logs_query())
 
     # -------------------------------------------------
     # Update truck summary
     # -------------------------------------------------
     def update_summary(self):
-        truck = self.truck_combo.currentText()
+        truck_id = self.truck_combo.currentData()
 
-        if not truck or truck == "All Trucks":
+        if truck_id is None:
             self.summary_label.setText("")
             return
 
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT SUM(drums * price) AS total
-            FROM truck_saloks
-            WHERE truck = ?
-        """, (truck,))
-        charges = cur.fetchone()["total"] or 0
-
-        cur.execute("""
-            SELECT SUM(amount) AS total
-            FROM truck_payments
-            WHERE truck = ?
-        """, (truck,))
-        payments = cur.fetchone()["total"] or 0
-
-        conn.close()
-
-        balance = charges - payments
+        # Maintained by triggers, one row per truck
+        charges, payments, balance = self.trucks.balance(truck_id)
 
         self.summary_label.setText(
-            f"Total Charges: ₱{charges:.2f}   |   "
-            f"Payments: ₱{payments:.2f}   |   "
-            f"Outstanding Balance: ₱{balance:.2f}"
+            f"Total Charges: {fmt(charges)}   |   "
+            f"Payments: {fmt(payments)}   |   "
+            f"Outstanding Balance: {fmt(balance)}"
         )
 
     # -------------------------------------------------
     # Add truck salok
     # -------------------------------------------------
     def add_salok(self):
-        truck = self.truck_combo.currentText()
+        truck_id = self.truck_combo.currentData()
 
-        if truck in ("", "All Trucks"):
+        if truck_id is None:
             QMessageBox.warning(self, "Select Truck", "Please select a truck.")
             return
 
@@ -240,34 +215,12 @@ class TrucksPage(QWidget):
             QMessageBox.warning(self, "Invalid Input", "Enter a valid number of drums.")
             return
 
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("SELECT value FROM settings WHERE key = 'PRICE_PER_DRUM'")
-        row = cur.fetchone()
-        price = float(row["value"]) if row else 0
-
-        now = datetime.now()
-
-        cur.execute("""
-            INSERT INTO truck_saloks (truck, drums, price, date, time)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            truck,
-            drums,
-            price,
-            now.strftime("%Y-%m-%d"),
-            now.strftime("%H:%M:%S")
-        ))
-
-        conn.commit()
-        conn.close()
-
-        log_action(
-            "SYSTEM",
-            "Added truck salok",
-            f"{truck}: {drums} drums (₱{drums * price:.2f})"
-        )
+        # At the price in effect now, and audited
+        try:
+            self.trucks.add_salok(truck_id, drums)
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
+            return
 
         self.drums_input.clear()
         self.load_logs()
@@ -277,41 +230,25 @@ class TrucksPage(QWidget):
     # Record truck payment
     # -------------------------------------------------
     def record_payment(self):
-        truck = self.truck_combo.currentText()
+        truck_id = self.truck_combo.currentData()
 
-        if truck in ("", "All Trucks"):
+        if truck_id is None:
             QMessageBox.warning(self, "Select Truck", "Please select a truck first.")
             return
 
         try:
-            amount = float(self.payment_input.text())
+            amount = to_cents(self.payment_input.text())
             if amount <= 0:
                 raise ValueError
         except ValueError:
             QMessageBox.warning(self, "Invalid Input", "Enter a valid payment amount.")
             return
 
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            INSERT INTO truck_payments (truck, amount, date, note)
-            VALUES (?, ?, ?, ?)
-        """, (
-            truck,
-            amount,
-            datetime.now().strftime("%Y-%m-%d"),
-            "Truck payment"
-        ))
-
-        conn.commit()
-        conn.close()
-
-        log_action(
-            "SYSTEM",
-            "Recorded truck payment",
-            f"{truck}: ₱{amount:.2f}"
-        )
+        try:
+            self.trucks.record_payment(truck_id, amount)
+        except ServiceError as e:
+            QMessageBox.warning(self, e.title, str(e))
+            return
 
         self.payment_input.clear()
         self.update_summary()
@@ -8,7 +8,7 @@ from PyQt6.QtWidgets import (
     QLineEdit, QPushButton, QMessageBox, QComboBox
 )
 from PyQt6.QtCore import Qt
-from db import get_db_conn
+from db import db_session
 import hashlib
 from audit import log_action
 
@@ -83,16 +83,12 @@ class UsersPage(QWidget):
     # Load users from database
     # -------------------------------------------------
     def load_users(self):
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT username, role
-            FROM users
-            ORDER BY username
-        """)
-        rows = cur.fetchall()
-        conn.close()
+        with db_session() as conn:
+            rows = conn.execute("""
+                SELECT username, role
+                FROM users
+                ORDER BY username
+            """).fetchall()
 
         self.table.setRowCount(len(rows))
 
@@ -114,22 +110,16 @@ class UsersPage(QWidget):
 
         password_hash = hashlib.sha256(password.encode()).hexdigest()
 
-        conn = get_db_conn()
-        cur = conn.cursor()
-
         try:
-            cur.execute("""
-                INSERT INTO users (username, password_hash, role)
-                VALUES (?, ?, ?)
-            """, (username, password_hash, role))
-            conn.commit()
+            with db_session() as conn:
+                conn.execute("""
+                    INSERT INTO users (username, password_hash, role)
+                    VALUES (?, ?, ?)
+                """, (username, password_hash, role))
         except Exception:
             QMessageBox.warning(self, "Error", "Username already exists.")
-            conn.close()
             return
 
-        conn.close()
-
         # ✅ LOG AFTER SUCCESSFUL ADD
         self.username_input.clear()
         self.password_input.clear()
@@ -150,17 +140,12 @@ class UsersPage(QWidget):
         default_password = "1234"
         password_hash = hashlib.sha256(default_password.encode()).hexdigest()
 
-        conn = get_db_conn()
-        cur = conn.cursor()
-
-        cur.execute("""
-            UPDATE users
-            SET password_hash = ?
-            WHERE username = ?
-        """, (password_hash, username))
-
-        conn.commit()
-        conn.close()
+        with db_session() as conn:
+            conn.execute("""
+                UPDATE users
+                SET password_hash = ?
+                WHERE username = ?
+            """, (password_hash, username))
 
         # ✅ LOG AFTER SUCCESSFUL RESET
         log_action("SYSTEM", "Reset user password", username)
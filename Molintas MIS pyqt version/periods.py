@@ -0,0 +1,65 @@
+# periods.py
+# Date ranges for reports and dashboard cards
+#
+# Dates are stored as 'YYYY-MM-DD' text, so a period is filtered with
+#   WHERE date BETWEEN ? AND ?
+# which can use the date indexes, instead of strftime() on every row.
+
+from datetime import date, timedelta
+
+PERIODS = ("today", "week", "month", "quarter", "year")
+
+# ReportsPage modes use their own names
+REPORT_MODES = {
+    "daily": "today",
+    "weekly": "week",
+    "monthly": "month",
+    "quarterly": "quarter",
+    "annual": "year",
+}
+
+
+def _fmt(d):
+    return d.strftime("%Y-%m-%d")
+
+
+def _month_end(year, month):
+    if month == 12:
+        return date(year, 12, 31)
+    return date(year, month + 1, 1) - timedelta(days=1)
+
+
+def period_dates(period, today=None):
+    """
+    Returns (start, end) as date objects, both inclusive.
+    """
+    t = today or date.today()
+    period = REPORT_MODES.get(period, period)
+
+    if period == "today":
+        return t, t
+
+    if period == "week":
+        s = t - timedelta(days=t.weekday())
+        return s, s + timedelta(days=6)
+
+    if period == "month":
+        return t.replace(day=1), _month_end(t.year, t.month)
+
+    if period == "quarter":
+        first_month = (t.month - 1) // 3 * 3 + 1
+        return date(t.year, first_month, 1), _month_end(t.year, first_month + 2)
+
+    if period == "year":
+        return date(t.year, 1, 1), date(t.year, 12, 31)
+
+    raise ValueError(f"Unknown period: {period}")
+
+
+def period_range(period, today=None):
+    """
+    Returns (start, end) as 'YYYY-MM-DD' strings, ready to bind to
+    BETWEEN ? AND ?.
+    """
+    s, e = period_dates(period, today)
+    return _fmt(s), _fmt(e)
@@ -0,0 +1,221 @@
+# profiling.py
+# Opt-in timing of database queries and GUI slots
+#
+# Off unless the app is started with MOLINTAS_PROFILE=1. Then:
+#   - every pooled connection is a db.TracingConnection, which records
+#     each statement's SQL, rows returned and wall time (execute plus
+#     fetching the rows)
+#   - slot(fn) wraps GUI callbacks (sidebar clicks, query results
+#     arriving) and records how long each one held the GUI thread
+#
+# Queries are tagged with the slot or runner channel they ran under, so
+# a slow Reports page shows up either as the report query (on the
+# "runner reports" channel) or as ReportsPage.show_report rendering it.
+#
+# summary() and dump_json() feed the admin Performance page.
+# MOLINTAS_PROFILE_FILE=path also writes the JSON when the app exits.
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Oldest records are dropped past this
+MAX_RECORDS = 10000
+
+_enabled = os.environ.get("MOLINTAS_PROFILE", "0") not in ("", "0")
+
+_lock = threading.Lock()
+_queries = deque(maxlen=MAX_RECORDS)
+_slots = deque(maxlen=MAX_RECORDS)
+_local = threading.local()
+
+
+def enabled():
+    return _enabled
+
+
+# =========================
+# Context (what triggered a query)
+# =========================
+@contextmanager
+def context(name):
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def current_context():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+# =========================
+# Queries
+# =========================
+class TracingCursor(sqlite3.Cursor):
+    """
+    Cursor that adds one record per execute / executemany and keeps
+    adding the rows and time spent fetching to it.
+    """
+
+    _record = None
+
+    def _start(self, sql, started):
+        record = {
+            "sql": " ".join(sql.split()),
+            "rows": 0,
+            "ms": (time.perf_counter() - started) * 1000,
+            "context": current_context(),
+            "thread": threading.current_thread().name,
+            "at": time.time()
+        }
+        with _lock:
+            _queries.append(record)
+        self._record = record
+
+    def _fetched(self, rows, started):
+        if self._record is None:
+            return
+        with _lock:
+            self._record["rows"] += rows
+            self._record["ms"] += (time.perf_counter() - started) * 1000
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._start(sql, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._start(sql, started)
+            self._record["rows"] = self.rowcount
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, started)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), started)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(0, started)
+            raise
+        self._fetched(1, started)
+        return row
+
+
+# =========================
+# GUI slots
+# =========================
+def slot(fn, name=None):
+    """
+    Returns `fn` wrapped to record its run time under `name`
+    (default: its qualified name, e.g. ReportsPage.show_report).
+    Returns `fn` itself when profiling is off.
+    """
+    if not _enabled:
+        return fn
+
+    name = name or getattr(fn, "__qualname__", repr(fn))
+
+    @wraps(fn)
+    def timed_slot(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with context(name):
+                return fn(*args, **kwargs)
+        finally:
+            with _lock:
+                _slots.append({
+                    "slot": name,
+                    "ms": (time.perf_counter() - started) * 1000,
+                    "at": time.time()
+                })
+
+    return timed_slot
+
+
+# =========================
+# Reporting
+# =========================
+def _group(records, key):
+    groups = {}
+    for r in records:
+        g = groups.setdefault(r[key], {key: r[key], "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        g["count"] += 1
+        g["total_ms"] += r["ms"]
+        g["max_ms"] = max(g["max_ms"], r["ms"])
+        if "rows" in r:
+            g["rows"] = g.get("rows", 0) + r["rows"]
+            g.setdefault("contexts", set()).add(r["context"] or "-")
+    return sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+
+
+def summary():
+    """
+    Queries grouped by SQL and slots grouped by name, slowest total first.
+    """
+    queries, slots = records()
+
+    grouped = _group(queries, "sql")
+    for g in grouped:
+        g["contexts"] = sorted(g["contexts"])
+
+    return {
+        "queries": grouped,
+        "slots": _group(slots, "slot")
+    }
+
+
+def records():
+    with _lock:
+        return [dict(r) for r in _queries], [dict(r) for r in _slots]
+
+
+def dump_json(path):
+    queries, slots = records()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "queries": queries,
+            "slots": slots,
+            "summary": summary()
+        }, f, indent=2)
+
+
+def clear():
+    with _lock:
+        _queries.clear()
+        _slots.clear()
+
+
+if _enabled and os.environ.get("MOLINTAS_PROFILE_FILE"):
+    atexit.register(dump_json, os.environ["MOLINTAS_PROFILE_FILE"])
@@ -0,0 +1,146 @@
+# query_runner.py
+# Runs database work off the GUI thread
+#
+#   runner = get_runner()
+#   runner.submit("reports", build_text, mode, on_result=self.show_text)
+#
+# The function runs on a worker thread inside db_session(), so any
+# db_session() it opens shares that worker's connection. The result is
+# delivered back on the GUI thread. A newer submit on the same channel
+# supersedes the older one: if it has not started it is skipped, if it
+# is running its query is interrupted, and its result is dropped.
+
+import threading
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from db import db_session
+import profiling
+
+# Worker threads; the db pool keeps one idle connection per thread
+MAX_THREADS = 2
+
+
+class _JobSignals(QObject):
+    # channel, generation, result, error message
+    done = pyqtSignal(str, int, object, object)
+
+
+class _QueryJob(QRunnable):
+    def __init__(self, runner, channel, generation, fn, args):
+        super().__init__()
+        self.runner = runner
+        self.channel = channel
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.signals = _JobSignals()
+
+    def run(self):
+        if self.runner.is_stale(self.channel, self.generation):
+            self.signals.done.emit(self.channel, self.generation, None, None)
+            return
+
+        result = None
+        error = None
+        try:
+            with db_session() as conn, profiling.context(f"runner {self.channel}"):
+                self.runner._set_running(self.channel, self.generation, conn)
+                try:
+                    result = self.fn(*self.args)
+                finally:
+                    self.runner._set_running(self.channel, self.generation, None)
+        except Exception as e:
+            if not self.runner.is_stale(self.channel, self.generation):
+                traceback.print_exc()
+            error = str(e)
+
+        self.signals.done.emit(self.channel, self.generation, result, error)
+
+
+class QueryRunner(QObject):
+    # channel, is_loading — pages use it to show a loading state
+    loading = pyqtSignal(str, bool)
+
+    def __init__(self, parent=None, max_threads=MAX_THREADS):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+
+        self._lock = threading.Lock()
+        self._generation = {}       # channel -> latest generation
+        self._running = {}          # channel -> (generation, connection)
+        self._jobs = {}             # (channel, generation) -> (job, on_result, on_error)
+
+    def submit(self, channel, fn, *args, on_result=None, on_error=None):
+        with self._lock:
+            generation = self._generation.get(channel, 0) + 1
+            self._generation[channel] = generation
+
+            # Stop the superseded query instead of letting it finish
+            # (under the lock, so the connection cannot have been
+            # handed to another job in between)
+            running = self._running.get(channel)
+            if running is not None:
+                running[1].interrupt()
+
+        job = _QueryJob(self, channel, generation, fn, args)
+        job.signals.done.connect(self._deliver)
+        self._jobs[(channel, generation)] = (job, on_result, on_error)
+
+        self.loading.emit(channel, True)
+        self.pool.start(job)
+        return generation
+
+    def cancel(self, channel):
+        """
+        Drops whatever is pending on `channel`.
+        """
+        self.submit(channel, _noop)
+
+    def is_stale(self, channel, generation):
+        with self._lock:
+            return self._generation.get(channel) != generation
+
+    def _set_running(self, channel, generation, conn):
+        with self._lock:
+            if conn is None:
+                current = self._running.get(channel)
+                if current is not None and current[0] == generation:
+                    del self._running[channel]
+            else:
+                self._running[channel] = (generation, conn)
+
+    def _deliver(self, channel, generation, result, error):
+        _, on_result, on_error = self._jobs.pop((channel, generation))
+
+        if self.is_stale(channel, generation):
+            return
+
+        self.loading.emit(channel, False)
+
+        if error is not None:
+            if on_error is not None:
+                profiling.slot(on_error)(error)
+            return
+
+        if on_result is not None:
+            profiling.slot(on_result)(result)
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+
+def _noop():
+    return None
+
+
+_runner = None
+
+
+def get_runner():
+    # Created on first use, after QApplication exists
+    global _runner
+    if _runner is None:
+        _runner = QueryRunner()
+    return _runner
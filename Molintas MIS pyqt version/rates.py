@@ -0,0 +1,109 @@
+# rates.py
+# Effective-dated rates (rate_schedule table)
+#
+# Every change to RES_RATE, COM_RATE or PRICE_PER_DRUM adds a row
+# (key, effective_from, rate in centavos) instead of overwriting the
+# old value, so the rate that applied at any moment can be looked up:
+#
+#   schedule = RateSchedule.load(conn)
+#   schedule.rate_at("RES_RATE", "2025-03-01 08:00:00")   -> 3700
+#
+# RateSchedule keeps each key's rows as a sorted list of start times
+# and finds the right one with bisect; settings_service holds one and
+# reloads it after every change. rate_at() below is the single-query
+# version for code without the cache.
+
+from bisect import bisect_right
+from datetime import datetime
+
+from init_db import DEFAULT_SETTINGS
+from money import to_cents
+
+# Rates without a known start (the settings values at migration 9)
+EPOCH = "0001-01-01 00:00:00"
+
+RATE_KEYS = ("RES_RATE", "COM_RATE", "PRICE_PER_DRUM")
+
+SCHEDULE_SQL = """
+    SELECT key, effective_from, rate
+    FROM rate_schedule
+    ORDER BY key, effective_from
+"""
+
+# Served by the UNIQUE (key, effective_from) index
+RATE_AT_SQL = """
+    SELECT rate
+    FROM rate_schedule
+    WHERE key = ? AND effective_from <= ?
+    ORDER BY effective_from DESC
+    LIMIT 1
+"""
+
+
+def rate_key(billing_type):
+    # Which rate a client's billing type is charged at
+    return "COM_RATE" if billing_type == "Commercial" else "RES_RATE"
+
+
+def now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def default_rate(key):
+    return to_cents(DEFAULT_SETTINGS[key])
+
+
+class RateSchedule:
+    def __init__(self, rows):
+        # key -> ([effective_from, ...], [rate, ...]), both sorted by time
+        self._intervals = {}
+        for key, effective_from, rate in sorted(tuple(r) for r in rows):
+            starts, rates = self._intervals.setdefault(key, ([], []))
+            starts.append(effective_from)
+            rates.append(rate)
+
+    @classmethod
+    def load(cls, conn):
+        return cls(conn.execute(SCHEDULE_SQL).fetchall())
+
+    def rate_at(self, key, when=None):
+        """
+        Rate in centavos for `key` at `when` ('YYYY-MM-DD HH:MM:SS',
+        default now). Before the first row, or for a key with no rows,
+        the earliest known rate / the default applies.
+        """
+        starts, rates = self._intervals.get(key, ((), ()))
+        if not rates:
+            return default_rate(key)
+
+        i = bisect_right(starts, when or now()) - 1
+        return rates[max(i, 0)]
+
+    def history(self, key):
+        """
+        [(effective_from, rate), ...] for `key`, oldest first.
+        """
+        starts, rates = self._intervals.get(key, ((), ()))
+        return list(zip(starts, rates))
+
+
+def rate_at(conn, key, when=None):
+    row = conn.execute(RATE_AT_SQL, (key, when or now())).fetchone()
+    return row[0] if row else default_rate(key)
+
+
+def add_rate(conn, key, rate, effective_from=None):
+    """
+    Schedules `rate` (centavos) for `key` from `effective_from` on
+    (default now). Entering a second rate for the same moment replaces
+    the first. Returns the effective_from used.
+    """
+    effective_from = effective_from or now()
+    conn.execute("""
+        INSERT INTO rate_schedule (key, effective_from, rate, created_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (key, effective_from) DO UPDATE SET
+            rate = excluded.rate,
+            created_at = excluded.created_at
+    """, (key, effective_from, rate, now()))
+    return effective_from
@@ -0,0 +1,260 @@
+# rollups.py
+# Daily totals for the reports (daily_totals, daily_truck_totals,
+# daily_client_type_totals)
+#
+# The tables are kept up to date by triggers on truck_saloks,
+# truck_payments, payments and usage_events (see migrations.py), so an
+# annual report sums at most 366 rows instead of every transaction.
+#
+#   daily_totals              one row per date
+#   daily_truck_totals        one row per date and truck
+#   daily_client_type_totals  one row per date and client type
+#
+# Usage added / billing added come from usage_events (see
+# usage_ledger.py). Per type, events and payments count under the
+# client_type stored on the row when it was recorded, as the triggers
+# do, not under the client's type now.
+#
+# Usage:
+#   python rollups.py --verify     -> compare rollups with raw tables
+#   python rollups.py --backfill   -> recompute rollups from scratch
+
+import sys
+
+from money import TOLERANCE
+
+ROLLUP_TABLES = ["daily_totals", "daily_truck_totals", "daily_client_type_totals"]
+
+# Truck charges and payments per date and truck from the raw tables
+RAW_TRUCK_SQL = """
+    SELECT date, truck_id,
+           SUM(charges) AS charges,
+           SUM(payments) AS payments
+    FROM (
+        SELECT date, truck_id, drums * price AS charges, 0 AS payments
+        FROM truck_saloks
+        UNION ALL
+        SELECT date, truck_id, 0, amount
+        FROM truck_payments
+    )
+    GROUP BY date, truck_id
+"""
+
+# Collections per date from the raw payments table
+RAW_COLLECTIONS_SQL = """
+    SELECT date, SUM(amount) AS collections
+    FROM payments
+    GROUP BY date
+"""
+
+
+# Usage and billing per event (date, type, usage, bill)
+USAGE_EVENTS_SQL = """
+    SELECT date(created_at) AS date, client_type AS type,
+           usage, charge AS bill
+    FROM usage_events
+"""
+
+# Usage, billing and collections per date and client type from the
+# raw tables
+RAW_CLIENT_TYPE_SQL = f"""
+    SELECT date, type,
+           SUM(usage) AS usage_added,
+           SUM(bill) AS billing_added,
+           SUM(collections) AS collections
+    FROM (
+        SELECT date, type, usage, bill, 0 AS collections
+        FROM ({USAGE_EVENTS_SQL})
+        UNION ALL
+        SELECT date, client_type, 0, 0, amount
+        FROM payments
+    )
+    WHERE type IS NOT NULL
+    GROUP BY date, type
+"""
+
+
+def rebuild_rollups(conn):
+    for table in ROLLUP_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+
+    conn.execute(f"""
+        INSERT INTO daily_truck_totals (date, truck_id, charges, payments)
+        {RAW_TRUCK_SQL}
+    """)
+
+    conn.execute(f"""
+        INSERT INTO daily_client_type_totals
+            (date, type, usage_added, billing_added, collections)
+        {RAW_CLIENT_TYPE_SQL}
+    """)
+
+    conn.execute(f"""
+        INSERT INTO daily_totals
+            (date, truck_charges, truck_payments,
+             usage_added, billing_added, collections)
+        SELECT date, SUM(truck_charges), SUM(truck_payments),
+               SUM(usage_added), SUM(billing_added), SUM(collections)
+        FROM (
+            SELECT date, SUM(charges) AS truck_charges,
+                   SUM(payments) AS truck_payments,
+                   0 AS usage_added, 0 AS billing_added, 0 AS collections
+            FROM daily_truck_totals
+            GROUP BY date
+            UNION ALL
+            SELECT date, 0, 0, SUM(usage), SUM(bill), 0
+            FROM ({USAGE_EVENTS_SQL})
+            GROUP BY date
+            UNION ALL
+            SELECT date, 0, 0, 0, 0, collections
+            FROM ({RAW_COLLECTIONS_SQL})
+        )
+        GROUP BY date
+    """)
+
+
+def verify_rollups(conn):
+    """
+    Checks the rollups against the raw rows (truck charges / payments,
+    collections, usage / billing, per client type).
+    Returns a list of (what, key, rollup_values, raw_values) for every
+    mismatch.
+    """
+    def rows(sql, values=2):
+        return {
+            tuple(r[:-values]): tuple(v or 0 for v in r[-values:])
+            for r in conn.execute(sql)
+        }
+
+    checks = [
+        ("per truck",
+         rows("SELECT date, truck_id, charges, payments FROM daily_truck_totals"),
+         rows(RAW_TRUCK_SQL)),
+        ("daily trucks",
+         rows("SELECT date, truck_charges, truck_payments FROM daily_totals"),
+         rows(f"""
+             SELECT date, SUM(charges), SUM(payments)
+             FROM ({RAW_TRUCK_SQL})
+             GROUP BY date
+         """)),
+        ("collections",
+         rows("SELECT date, 0, collections FROM daily_totals"),
+         rows(f"SELECT date, 0, collections FROM ({RAW_COLLECTIONS_SQL})")),
+        ("usage / billing",
+         rows("SELECT date, usage_added, billing_added FROM daily_totals"),
+         rows(f"""
+             SELECT date, SUM(usage), SUM(bill)
+             FROM ({USAGE_EVENTS_SQL})
+             GROUP BY date
+         """)),
+        ("per client type",
+         rows("""
+             SELECT date, type, usage_added, billing_added, collections
+             FROM daily_client_type_totals
+         """, 3),
+         rows(RAW_CLIENT_TYPE_SQL, 3)),
+    ]
+
+    mismatches = []
+    for what, rollup, raw in checks:
+        for key in sorted(set(rollup) | set(raw)):
+            r = rollup.get(key)
+            w = raw.get(key)
+            zero = (0,) * len(r or w)
+            r, w = r or zero, w or zero
+            if any(abs(a - b) > TOLERANCE for a, b in zip(r, w)):
+                mismatches.append((what, key, r, w))
+
+    return mismatches
+
+
+# =========================
+# Report queries
+# =========================
+# All take (start_date, end_date), 'YYYY-MM-DD', inclusive
+PERIOD_TOTALS_SQL = """
+    SELECT COALESCE(SUM(truck_charges), 0) AS truck_charges,
+           COALESCE(SUM(truck_payments), 0) AS truck_payments,
+           COALESCE(SUM(usage_added), 0) AS usage_added,
+           COALESCE(SUM(billing_added), 0) AS billing_added,
+           COALESCE(SUM(collections), 0) AS collections
+    FROM daily_totals
+    WHERE date BETWEEN ? AND ?
+"""
+
+TRUCK_TOTALS_SQL = """
+    SELECT COALESCE(c.name, 'Deleted truck #' || t.truck_id) AS truck,
+           t.charges,
+           t.payments
+    FROM (
+        SELECT truck_id,
+               SUM(charges) AS charges,
+               SUM(payments) AS payments
+        FROM daily_truck_totals
+        WHERE date BETWEEN ? AND ?
+        GROUP BY truck_id
+        HAVING SUM(charges) <> 0 OR SUM(payments) <> 0
+    ) t
+    LEFT JOIN clients c ON c.id = t.truck_id
+    ORDER BY truck
+"""
+
+CLIENT_TYPE_TOTALS_SQL = """
+    SELECT type,
+           SUM(usage_added) AS usage_added,
+           SUM(billing_added) AS billing_added,
+           SUM(collections) AS collections
+    FROM daily_client_type_totals
+    WHERE date BETWEEN ? AND ?
+    GROUP BY type
+    ORDER BY type
+"""
+
+
+def get_period_totals(conn, start_date, end_date):
+    """
+    Returns one row of truck_charges, truck_payments, usage_added,
+    billing_added and collections between start_date and end_date
+    ('YYYY-MM-DD', inclusive).
+    """
+    return conn.execute(PERIOD_TOTALS_SQL, (start_date, end_date)).fetchone()
+
+
+def get_truck_totals(conn, start_date, end_date):
+    """
+    Same rows as truck_ledger.get_truck_totals (truck, charges,
+    payments), read from the daily rollup.
+    """
+    return conn.execute(TRUCK_TOTALS_SQL, (start_date, end_date)).fetchall()
+
+
+def get_client_type_totals(conn, start_date, end_date):
+    """
+    Returns rows of (type, usage_added, billing_added, collections).
+    Each amount counts under the client's type when it was recorded.
+    """
+    return conn.execute(CLIENT_TYPE_TOTALS_SQL, (start_date, end_date)).fetchall()
+
+
+if __name__ == "__main__":
+    from db import db_session
+    from migrations import migrate
+
+    with db_session() as conn:
+        # The rollup tables arrive with migration 5
+        migrate(conn)
+
+        if "--backfill" in sys.argv:
+            rebuild_rollups(conn)
+            print("Daily rollups rebuilt.")
+
+        mismatches = verify_rollups(conn)
+
+    if not mismatches:
+        print("Daily rollups match the raw tables.")
+        sys.exit(0)
+
+    for what, key, rollup, raw in mismatches:
+        print(f"{what} {' '.join(map(str, key))}: {rollup} (raw {raw})")
+    print("Run with --backfill to fix.")
+    sys.exit(1)
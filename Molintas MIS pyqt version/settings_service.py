@@ -0,0 +1,127 @@
+# settings_service.py
+# In-process cache of the settings table and the rate schedule
+#
+#   settings = get_settings()
+#   settings.res_rate                    -> centavos per m³, now
+#   settings.rate_at("RES_RATE", when)   -> centavos per m³ at `when`
+#   settings.changed.connect(self.on_settings_changed)
+#
+# Both tables are read once, on first use. Charges then read rates from
+# memory instead of querying on every usage entry or salok.
+# set() writes through to the database, reloads the cache and emits
+# `changed`, so open pages pick the new value up at once. Another
+# workstation sees the change after it restarts or calls invalidate().
+
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from db import db_session
+from init_db import DEFAULT_SETTINGS
+from money import to_cents, to_pesos
+from rates import RATE_KEYS, RateSchedule, add_rate, rate_at, rate_key
+
+
+class SettingsService(QObject):
+    # key that changed, or "" after invalidate()
+    changed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._values = None         # key -> value as stored (₱)
+        self._schedule = None       # rates.RateSchedule
+
+    def _load(self):
+        with db_session() as conn:
+            rows = conn.execute("SELECT key, value FROM settings").fetchall()
+            schedule = RateSchedule.load(conn)
+        return {**DEFAULT_SETTINGS, **{r[0]: r[1] for r in rows}}, schedule
+
+    def _cached(self):
+        with self._lock:
+            if self._values is None:
+                self._values, self._schedule = self._load()
+            return self._values, self._schedule
+
+    def values(self):
+        """
+        Every setting in ₱; rates show the one in effect now.
+        """
+        values, schedule = self._cached()
+        return {
+            **values,
+            **{k: float(to_pesos(schedule.rate_at(k))) for k in RATE_KEYS}
+        }
+
+    def value(self, key):
+        return self.values()[key]
+
+    # -------------------------------------------------
+    # Typed accessors (centavos)
+    # -------------------------------------------------
+    def rate_at(self, key, when=None):
+        # when: 'YYYY-MM-DD HH:MM:SS', default now
+        return self._cached()[1].rate_at(key, when)
+
+    def history(self, key):
+        return self._cached()[1].history(key)
+
+    @property
+    def res_rate(self):
+        return self.rate_at("RES_RATE")
+
+    @property
+    def com_rate(self):
+        return self.rate_at("COM_RATE")
+
+    @property
+    def price_per_drum(self):
+        return self.rate_at("PRICE_PER_DRUM")
+
+    def rate_for(self, billing_type, when=None):
+        return self.rate_at(rate_key(billing_type), when)
+
+    # -------------------------------------------------
+    # Changes
+    # -------------------------------------------------
+    def set(self, key, value, effective_from=None):
+        """
+        Saves a setting. Rates are added to the schedule from
+        `effective_from` (default now) and keep their history.
+        Returns the effective_from used (None for other settings).
+        """
+        with db_session() as conn:
+            if key in RATE_KEYS:
+                effective_from = add_rate(conn, key, to_cents(value), effective_from)
+                # The settings row keeps the rate in effect now
+                value = float(to_pesos(rate_at(conn, key)))
+            else:
+                effective_from = None
+
+            # A default that was never stored gets its row here
+            conn.execute("""
+                INSERT INTO settings (key, value) VALUES (?, ?)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value
+            """, (key, value))
+
+        with self._lock:
+            self._values = None
+        self.changed.emit(key)
+        return effective_from
+
+    def invalidate(self):
+        # Next read goes back to the database (e.g. after a restore)
+        with self._lock:
+            self._values = None
+        self.changed.emit("")
+
+
+_settings = None
+
+
+def get_settings():
+    # Created on first use, like query_runner.get_runner
+    global _settings
+    if _settings is None:
+        _settings = SettingsService()
+    return _settings
@@ -0,0 +1,52 @@
+# startup_timing.py
+# Startup timing report
+#
+#   with timed("page Clients"):
+#       page = ClientsPage()
+#   print_report("login -> dashboard")
+#
+# Import this module first in main.py: STARTED is taken at import time,
+# so record("imports", STARTED) covers loading the rest of the app.
+# Set MOLINTAS_STARTUP_TIMING=0 to keep the report off the console.
+
+import os
+import time
+from contextlib import contextmanager
+
+STARTED = time.perf_counter()
+
+_timings = []       # (label, milliseconds) since the last report
+
+
+def enabled():
+    return os.environ.get("MOLINTAS_STARTUP_TIMING", "1") != "0"
+
+
+def record(label, started):
+    _timings.append((label, (time.perf_counter() - started) * 1000))
+
+
+@contextmanager
+def timed(label):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(label, started)
+
+
+def report(title):
+    """
+    Returns the steps recorded since the last report as text.
+    """
+    width = max([len(label) for label, _ in _timings] + [len(title)])
+    lines = [title]
+    for label, ms in _timings:
+        lines.append(f"  {label:<{width}} {ms:8.1f} ms")
+    return "\n".join(lines)
+
+
+def print_report(title):
+    if _timings and enabled():
+        print(report(title))
+    _timings.clear()
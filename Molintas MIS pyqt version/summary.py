@@ -0,0 +1,102 @@
+# summary.py
+# Dashboard summary numbers, computed in two queries and cached
+# until clients, payments or truck_saloks change
+
+from db import db_session
+from periods import period_range
+
+# Tables the dashboard cards are computed from.
+# Their change counters (see migrations.table_version_triggers)
+# decide whether the cached snapshot is still good.
+WATCHED_TABLES = ("clients", "payments", "truck_saloks")
+
+# One pass over clients, grouped so the type/status index can serve it
+CLIENT_COUNTS_SQL = """
+    SELECT type, status, payment_status,
+           COUNT(*) AS clients,
+           SUM(bill) AS bill
+    FROM clients
+    GROUP BY type, status, payment_status
+"""
+
+MONEY_SQL = """
+    SELECT
+        (SELECT SUM(charges) FROM truck_balances) AS trucks_money,
+        (SELECT SUM(amount) FROM payments WHERE date = :today) AS today,
+        (SELECT SUM(amount) FROM payments
+         WHERE date BETWEEN :month_start AND :month_end) AS month
+"""
+
+_cache = {"key": None, "snapshot": None}
+
+
+def get_table_versions(conn):
+    rows = conn.execute(
+        f"SELECT name, version FROM table_versions "
+        f"WHERE name IN ({','.join('?' * len(WATCHED_TABLES))})",
+        WATCHED_TABLES
+    ).fetchall()
+    return tuple(sorted((r[0], r[1]) for r in rows))
+
+
+def compute_summary(conn, today):
+    snapshot = {
+        "unpaid": 0,
+        "active": 0,
+        "inactive": 0,
+        "trucks_count": 0,
+        "clients_money": 0,
+    }
+
+    for r in conn.execute(CLIENT_COUNTS_SQL):
+        if r["type"] == "truck":
+            snapshot["trucks_count"] += r["clients"]
+            continue
+
+        if r["type"] not in ("household", "apartment"):
+            continue
+
+        if r["status"] == "Inactive":
+            snapshot["inactive"] += r["clients"]
+        elif r["status"] == "Active":
+            snapshot["active"] += r["clients"]
+            if r["payment_status"] == "Unpaid":
+                snapshot["unpaid"] += r["clients"]
+                snapshot["clients_money"] += r["bill"] or 0
+
+    month_start, month_end = period_range("month")
+    money = conn.execute(MONEY_SQL, {
+        "today": today,
+        "month_start": month_start,
+        "month_end": month_end,
+    }).fetchone()
+    snapshot["trucks_money"] = money["trucks_money"] or 0
+    snapshot["today"] = money["today"] or 0
+    snapshot["month"] = money["month"] or 0
+
+    return snapshot
+
+
+def get_dashboard_summary():
+    """
+    Returns a dict keyed like DashboardSummaryPage.cards.
+    When nothing has been written since the last call (and the day has
+    not changed) the cached snapshot comes back without re-querying.
+    """
+    today, _ = period_range("today")
+
+    with db_session() as conn:
+        key = (today, get_table_versions(conn))
+        if _cache["key"] == key:
+            return dict(_cache["snapshot"])
+
+        snapshot = compute_summary(conn, today)
+
+    _cache["key"] = key
+    _cache["snapshot"] = snapshot
+    return dict(snapshot)
+
+
+def invalidate_summary():
+    _cache["key"] = None
+    _cache["snapshot"] = None
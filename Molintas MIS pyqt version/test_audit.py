@@ -1,5 +1,81 @@
-from audit import log_action
+# test_audit.py
+# Checks that an audit entry reaches the logs table, and that an entry
+# SQLite refuses does not stop the ones after it
+#
+# Runs against a scratch database (never molintas_full.db):
+#   python test_audit.py     (or run with pytest)
 
-log_action("test_user", "Test audit log", "Step 8A test")
+import tempfile
+import threading
+from pathlib import Path
 
-print("Audit log test complete.")
+import db
+from audit import AuditWriter, flush_audit, log_action
+from init_db import init_db
+
+
+def test_log_action_is_written():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "audit.db"
+        init_db(path)
+
+        live = db._pool
+        db._pool = db.ConnectionPool(path)
+        try:
+            log_action("test_user", "Test audit log", "Step 8A test")
+            flush_audit()
+
+            with db.db_session() as conn:
+                row = conn.execute(
+                    "SELECT username, action, note FROM logs ORDER BY id DESC LIMIT 1"
+                ).fetchone()
+        finally:
+            db._pool.close_all()
+            db._pool = live
+
+    assert tuple(row) == ("test_user", "Test audit log", "Step 8A test")
+
+
+def test_bad_entry_does_not_stop_the_log():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "audit.db"
+        init_db(path)
+
+        live = db._pool
+        db._pool = db.ConnectionPool(path)
+        # Long interval: only the explicit flushes below write
+        writer = AuditWriter(interval=60)
+        try:
+            writer.log("test_user", "Before", "good")
+            # sqlite3 cannot bind an arbitrary object
+            writer.log("test_user", "Bad", object())
+            writer.log("test_user", "Same batch", "good")
+            first = writer.flush()
+
+            # A writer thread that died is started again
+            dead = threading.Thread(target=lambda: None)
+            dead.start()
+            dead.join()
+            writer._thread = dead
+
+            writer.log("test_user", "After", "good")
+            second = writer.flush()
+            alive = writer._thread is not dead and writer._thread.is_alive()
+
+            with db.db_session() as conn:
+                actions = [r[0] for r in conn.execute("SELECT action FROM logs ORDER BY id")]
+        finally:
+            writer.stop()
+            db._pool.close_all()
+            db._pool = live
+
+    assert (first, second) == (2, 1)
+    assert actions == ["Before", "Same batch", "After"]
+    assert [entry[1] for entry, _ in writer.rejected] == ["Bad"]
+    assert alive
+
+
+if __name__ == "__main__":
+    test_log_action_is_written()
+    test_bad_entry_does_not_stop_the_log()
+    print("Audit log test complete.")
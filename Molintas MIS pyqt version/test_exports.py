@@ -0,0 +1,136 @@
+# test_exports.py
+# Exports stream every row of a table or a filtered view to CSV / XLSX,
+# a chunk at a time
+#
+# Runs against a scratch database (never molintas_full.db):
+#   python test_exports.py     (or run with pytest)
+
+import csv
+import sqlite3
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+from core import exports, open_services
+from init_db import init_db
+
+
+def build_db(path, saloks):
+    init_db(path)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        INSERT INTO clients (id, name, type, billing_type, usage, bill, status, payment_status)
+        VALUES (1, 'Aquino Water Hauling', 'truck', NULL, 0, 0, 'Active', 'Unpaid'),
+               (2, 'Bautista Water Hauling', 'truck', NULL, 0, 0, 'Active', 'Unpaid')
+    """)
+    conn.executemany("""
+        INSERT INTO truck_saloks (truck_id, drums, price, date, time)
+        VALUES (?, ?, 2550, ?, ?)
+    """, [(1 + i % 2, 1 + i % 5, f"2025-03-{1 + i % 28:02d}", f"08:{i % 60:02d}:00") for i in range(saloks)])
+    conn.commit()
+    conn.close()
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f))
+
+
+def test_saloks_export_every_row():
+    # Small chunks, so the export takes many fetchmany() rounds
+    chunk, exports.CHUNK = exports.CHUNK, 7
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "exports.db", saloks=100)
+        services = open_services(Path(tmp) / "exports.db")
+        try:
+            table = services.exports.export_table(Path(tmp) / "saloks.csv", "saloks")
+            view = services.exports.export_saloks(
+                Path(tmp) / "view.csv",
+                *services.trucks.logs_query("2025-03-01", "2025-03-10", 2)
+            )
+            rows = read_csv(table.path)
+            view_rows = read_csv(view.path)
+        finally:
+            services.pool.close_all()
+            exports.CHUNK = chunk
+
+        leftovers = list(Path(tmp).glob("*.part"))
+
+    assert table.rows == 100 and len(rows) == 101
+    assert rows[0] == [h for h, _ in exports.SALOK_COLUMNS]
+    # Money as peso numbers: 1 drum at ₱25.50
+    assert rows[1][1:4] == ["1", "25.5", "25.5"]
+    assert [r[4] for r in rows[1:]] == sorted(r[4] for r in rows[1:])
+
+    assert view.rows == len(view_rows) - 1 > 0
+    assert {r[0] for r in view_rows[1:]} == {"Bautista Water Hauling"}
+    assert all("2025-03-01" <= r[4] <= "2025-03-10" for r in view_rows[1:])
+    assert leftovers == []
+
+
+def test_xlsx_continues_on_a_new_sheet():
+    from openpyxl import load_workbook
+
+    max_rows, exports.XLSX_MAX_ROWS = exports.XLSX_MAX_ROWS, 31
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "exports.db", saloks=75)
+        services = open_services(Path(tmp) / "exports.db")
+        try:
+            result = services.exports.export_table(Path(tmp) / "saloks.xlsx", "saloks")
+        finally:
+            services.pool.close_all()
+            exports.XLSX_MAX_ROWS = max_rows
+
+        workbook = load_workbook(result.path, read_only=True)
+        sheets = {ws.title: list(ws.iter_rows(values_only=True)) for ws in workbook.worksheets}
+        workbook.close()
+
+    assert result.rows == 75
+    assert list(sheets) == ["Saloks", "Saloks (2)", "Saloks (3)"]
+    assert [len(rows) - 1 for rows in sheets.values()] == [30, 30, 15]
+    assert Decimal(str(sheets["Saloks"][1][2])) == Decimal("25.5")
+
+
+def test_logs_export_binds_its_filters():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "exports.db", saloks=0)
+        conn = sqlite3.connect(Path(tmp) / "exports.db")
+        conn.execute("DELETE FROM logs")
+        conn.executemany("""
+            INSERT INTO logs (username, action, note, datetime)
+            VALUES (?, ?, ?, '2025-03-01 08:00:00')
+        """, [
+            ("admin", "Added usage", "Santos: 100% paid"),
+            ("admin", "Added usage", "Reyes: 100 paid"),
+            ("staff", "Added usage", "Santos: 100% paid"),
+            ("admin", "Recorded payment", "Santos: 100% paid"),
+        ])
+        conn.commit()
+        conn.close()
+
+        services = open_services(Path(tmp) / "exports.db")
+        try:
+            result = services.exports.export_logs(
+                Path(tmp) / "logs.csv", "2025-03-01 00:00:00", "2025-03-01 23:59:59",
+                user="admin", action="usage", text="100%"
+            )
+            # A quote in a filter is only ever a value
+            quoted = services.exports.export_logs(
+                Path(tmp) / "quoted.csv", "2025-03-01 00:00:00", "2025-03-01 23:59:59",
+                user="admin' OR '1' = '1"
+            )
+            rows = read_csv(result.path)
+        finally:
+            services.pool.close_all()
+
+    assert rows[1:] == [["2025-03-01 08:00:00", "admin", "Added usage", "Santos: 100% paid"]]
+    assert quoted.rows == 0
+
+
+if __name__ == "__main__":
+    test_saloks_export_every_row()
+    test_xlsx_continues_on_a_new_sheet()
+    test_logs_export_binds_its_filters()
+    print("Export tests complete.")
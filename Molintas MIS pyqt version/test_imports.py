@@ -0,0 +1,253 @@
+# test_imports.py
+# Bulk imports through the core services: every row applied exactly
+# once, or nothing at all when a row is rejected, and payments never
+# posted twice
+#
+# Runs against a scratch database (never molintas_full.db):
+#   python test_imports.py     (or run with pytest)
+
+import csv
+import math
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import rollups
+import usage_ledger
+from core import ServiceError, open_services
+from init_db import init_db
+
+CLIENTS = [
+    # name, type, billing_type, status
+    ("Santos Household", "household", "Residential", "Active"),
+    ("Reyes Apartment", "apartment", "Commercial", "Active"),
+    ("Garcia Household", "household", "Residential", "Inactive"),
+    ("Aquino Water Hauling", "truck", None, "Active"),
+]
+
+
+def build_db(path):
+    init_db(path)
+    conn = sqlite3.connect(path)
+    conn.executemany("""
+        INSERT INTO clients (name, type, billing_type, usage, bill, status, payment_status)
+        VALUES (?, ?, ?, 0, 0, ?, 'Unpaid')
+    """, CLIENTS)
+    conn.commit()
+    conn.close()
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def counts(services):
+    with services.pool.session() as conn:
+        return conn.execute("SELECT COUNT(*) FROM usage_events").fetchone()[0]
+
+
+def test_readings_are_billed_in_one_go():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "imports.db")
+        services = open_services(Path(tmp) / "imports.db")
+        try:
+            readings = write_csv(Path(tmp) / "readings.csv", ["Client", "Usage", "Date"], [
+                ["santos household", "12.5", ""],
+                ["Reyes Apartment", "10", "2025-03-01"],
+            ])
+            result = services.billing.import_readings(readings)
+
+            with services.pool.session() as conn:
+                bills = dict(conn.execute("SELECT name, bill FROM clients").fetchall())
+                mismatches = usage_ledger.verify_clients(conn) + rollups.verify_rollups(conn)
+        finally:
+            services.pool.close_all()
+
+    assert result.errors == []
+    assert result.applied == 2
+    # Default rates: ₱37.00 residential, ₱50.00 commercial
+    assert bills["Santos Household"] == 46250
+    assert bills["Reyes Apartment"] == 50000
+    assert result.total == 96250
+    assert mismatches == []
+
+
+def test_rejected_readings_bill_nothing():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "imports.db")
+        services = open_services(Path(tmp) / "imports.db")
+        try:
+            readings = write_csv(Path(tmp) / "readings.csv", ["client", "usage"], [
+                ["Santos Household", "5"],
+                ["Nobody", "5"],
+                ["Garcia Household", "5"],
+                ["Aquino Water Hauling", "5"],
+                ["Reyes Apartment", "abc"],
+                ["Santos Household", "2"],
+            ])
+            result = services.billing.import_readings(readings)
+            events = counts(services)
+        finally:
+            services.pool.close_all()
+
+    assert result.applied == 0
+    assert [line for line, _ in result.errors] == [3, 4, 5, 6, 7]
+    assert events == 0
+
+
+def test_readings_need_dashed_dates():
+    # date.fromisoformat() also takes these, SQLite's date() does not
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "imports.db")
+        services = open_services(Path(tmp) / "imports.db")
+        try:
+            rejected = services.billing.import_readings(write_csv(
+                Path(tmp) / "basic.csv", ["client", "usage", "date"], [
+                    ["Santos Household", "10", "20250301"],
+                    ["Reyes Apartment", "10", "2025-W10-1"],
+                ]
+            ))
+            billed = services.billing.import_readings(write_csv(
+                Path(tmp) / "dashed.csv", ["client", "usage", "date"], [
+                    ["Santos Household", "10", "2025-03-01"],
+                ]
+            ))
+
+            with services.pool.session() as conn:
+                days = conn.execute("SELECT date FROM daily_totals").fetchall()
+                types = conn.execute(
+                    "SELECT date, type, usage_added FROM daily_client_type_totals"
+                ).fetchall()
+                mismatches = rollups.verify_rollups(conn)
+        finally:
+            services.pool.close_all()
+
+    assert [line for line, _ in rejected.errors] == [2, 3]
+    assert billed.applied == 1
+    assert [tuple(r) for r in days] == [("2025-03-01",)]
+    assert [tuple(r) for r in types] == [("2025-03-01", "household", 10.0)]
+    assert mismatches == []
+
+
+def test_non_finite_usage_is_refused():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "imports.db")
+        services = open_services(Path(tmp) / "imports.db")
+        refused = []
+        try:
+            for usage in (math.nan, math.inf, -math.inf):
+                try:
+                    services.billing.add_usage(1, usage)
+                except ServiceError:
+                    refused.append(usage)
+            events = counts(services)
+        finally:
+            services.pool.close_all()
+
+    assert len(refused) == 3
+    assert events == 0
+
+
+def test_payments_are_posted_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "imports.db")
+        services = open_services(Path(tmp) / "imports.db")
+        try:
+            services.billing.import_readings(write_csv(
+                Path(tmp) / "readings.csv", ["client", "usage"], [["Santos Household", "10"]]
+            ))
+            payments = write_csv(Path(tmp) / "payments.csv", ["client", "amount", "date", "reference"], [
+                ["Santos Household", "100", "2025-03-01", "GC-1"],
+                ["Aquino Water Hauling", "1,500.50", "", "BANK-7"],
+                ["Santos Household", "270", "", "GC-2"],
+                ["Santos Household", "270", "", "GC-2"],
+            ])
+            first = services.payments.import_payments(payments)
+            again = services.payments.import_payments(payments)
+
+            with services.pool.session() as conn:
+                client = conn.execute(
+                    "SELECT bill, payment_status FROM clients WHERE name = 'Santos Household'"
+                ).fetchone()
+                posted = conn.execute(
+                    "SELECT (SELECT COUNT(*) FROM payments) + (SELECT COUNT(*) FROM truck_payments)"
+                ).fetchone()[0]
+                mismatches = usage_ledger.verify_clients(conn) + rollups.verify_rollups(conn)
+        finally:
+            services.pool.close_all()
+
+    assert (first.applied, len(first.skipped), first.errors) == (3, 1, [])
+    assert (again.applied, len(again.skipped)) == (0, 4)
+    assert first.total == 10000 + 150050 + 27000
+    # ₱370.00 billed, ₱370.00 paid
+    assert tuple(client) == (0, "Paid")
+    assert posted == 3
+    assert mismatches == []
+
+
+def test_payments_need_dashed_dates():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "imports.db")
+        services = open_services(Path(tmp) / "imports.db")
+        try:
+            services.billing.import_readings(write_csv(
+                Path(tmp) / "readings.csv", ["client", "usage"], [["Santos Household", "10"]]
+            ))
+            # A date BETWEEN 'YYYY-MM-DD' bounds would never find these
+            result = services.payments.import_payments(write_csv(
+                Path(tmp) / "payments.csv", ["client", "amount", "date"], [
+                    ["Santos Household", "100", "20250302"],
+                    ["Aquino Water Hauling", "100", "2025-W10-1"],
+                ]
+            ))
+            with services.pool.session() as conn:
+                posted = conn.execute(
+                    "SELECT (SELECT COUNT(*) FROM payments) + (SELECT COUNT(*) FROM truck_payments)"
+                ).fetchone()[0]
+        finally:
+            services.pool.close_all()
+
+    assert result.applied == 0
+    assert [line for line, _ in result.errors] == [2, 3]
+    assert posted == 0
+
+
+def test_payments_cannot_exceed_the_bill():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_db(Path(tmp) / "imports.db")
+        services = open_services(Path(tmp) / "imports.db")
+        try:
+            services.billing.import_readings(write_csv(
+                Path(tmp) / "readings.csv", ["client", "usage"], [["Santos Household", "10"]]
+            ))
+            # Each row fits the ₱370.00 bill, together they do not
+            result = services.payments.import_payments(write_csv(
+                Path(tmp) / "payments.csv", ["client", "amount"], [
+                    ["Santos Household", "300"],
+                    ["Santos Household", "100"],
+                    ["Reyes Apartment", "-5"],
+                ]
+            ))
+            with services.pool.session() as conn:
+                posted = conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+        finally:
+            services.pool.close_all()
+
+    assert result.applied == 0
+    assert [line for line, _ in result.errors] == [3, 4]
+    assert posted == 0
+
+
+if __name__ == "__main__":
+    test_readings_are_billed_in_one_go()
+    test_rejected_readings_bill_nothing()
+    test_readings_need_dashed_dates()
+    test_non_finite_usage_is_refused()
+    test_payments_are_posted_once()
+    test_payments_need_dashed_dates()
+    test_payments_cannot_exceed_the_bill()
+    print("Import tests complete.")
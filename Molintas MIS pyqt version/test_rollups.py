@@ -0,0 +1,93 @@
+# test_rollups.py
+# Per client type totals stay with the type a client had when the
+# usage or payment was recorded, through a change of type, a rebuild
+# and a deleted payment
+#
+# Runs against a scratch database (never molintas_full.db):
+#   python test_rollups.py     (or run with pytest)
+
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import rollups
+from core import open_services
+from init_db import init_db
+
+DAY = "2025-03-01"
+
+
+def type_totals(conn):
+    return {
+        r[0]: tuple(r[1:]) for r in conn.execute("""
+            SELECT type, usage_added, billing_added, collections
+            FROM daily_client_type_totals
+            WHERE date = ?
+            AND (usage_added <> 0 OR billing_added <> 0 OR collections <> 0)
+        """, (DAY,))
+    }
+
+
+def test_type_totals_survive_a_change_of_type():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rollups.db"
+        init_db(path)
+        services = open_services(path)
+        try:
+            client_id = services.clients.add("Santos Household", "household", "Residential")
+            charge = services.billing.add_usage(client_id, 10, when=f"{DAY} 08:00:00")
+            services.billing.record_payment(client_id, charge // 2, when=f"{DAY} 09:00:00")
+
+            # The same client, billed as an apartment from now on
+            services.clients.update(client_id, "apartment", "Commercial")
+            later = services.billing.add_usage(client_id, 4, when=f"{DAY} 10:00:00")
+
+            with services.pool.session() as conn:
+                by_trigger = type_totals(conn)
+                changed = rollups.verify_rollups(conn)
+                rollups.rebuild_rollups(conn)
+                rebuilt = type_totals(conn)
+
+            # The payment leaves the household column, not the apartment one
+            services.clients.delete(client_id)
+            with services.pool.session() as conn:
+                deleted = type_totals(conn)
+                after_delete = rollups.verify_rollups(conn)
+        finally:
+            services.pool.close_all()
+
+    assert by_trigger == {
+        "household": (10, charge, charge // 2),
+        "apartment": (4, later, 0),
+    }
+    assert changed == [] and rebuilt == by_trigger
+    assert deleted == {"household": (10, charge, 0), "apartment": (4, later, 0)}
+    assert after_delete == []
+
+
+def test_verify_checks_the_type_totals():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rollups.db"
+        init_db(path)
+        services = open_services(path)
+        try:
+            client_id = services.clients.add("Reyes Apartment", "apartment", "Commercial")
+            services.billing.add_usage(client_id, 10, when=f"{DAY} 08:00:00")
+        finally:
+            services.pool.close_all()
+
+        conn = sqlite3.connect(path)
+        conn.execute("UPDATE daily_client_type_totals SET type = 'household'")
+        mismatches = rollups.verify_rollups(conn)
+        conn.close()
+
+    assert {(what, key) for what, key, _, _ in mismatches} == {
+        ("per client type", (DAY, "apartment")),
+        ("per client type", (DAY, "household")),
+    }
+
+
+if __name__ == "__main__":
+    test_type_totals_survive_a_change_of_type()
+    test_verify_checks_the_type_totals()
+    print("Rollup tests complete.")
@@ -0,0 +1,155 @@
+# test_truck_report.py
+# Regression test for the per-truck report totals
+#
+# The old report LEFT JOINed truck_saloks to truck_payments on truck,
+# so every salok was counted once per payment. This checks the sums
+# against totals computed in Python on a scratch database, and that the
+# query plan reads each table once, through its date index, without
+# joining the two.
+#
+#   python test_truck_report.py     (or run with pytest)
+
+import random
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import rollups
+from check_query_plans import full_scans
+from init_db import init_db
+from truck_ledger import RANGE_TOTALS_SQL, get_truck_totals
+
+START = "2025-03-01"
+END = "2025-03-31"
+
+
+def build_db(path, rows, seed=1):
+    """
+    Fills a fresh database with `rows` saloks and `rows` payments spread
+    over 20 trucks and 90 days (some outside START..END), plus one truck
+    that only has payments. Returns the expected
+    {truck: [charges, payments]} in centavos for START..END.
+    """
+    init_db(path)
+    rng = random.Random(seed)
+    first = date(2025, 2, 1)
+    trucks = [f"Truck {i:02d}" for i in range(20)]
+    expected = {}
+
+    def day():
+        return (first + timedelta(days=rng.randrange(90))).strftime("%Y-%m-%d")
+
+    saloks = []
+    for _ in range(rows):
+        truck = rng.choice(trucks)
+        drums = rng.randint(1, 10)
+        price = rng.choice([500, 700, 750])
+        d = day()
+        saloks.append((truck, drums, price, d))
+        if START <= d <= END:
+            expected.setdefault(truck, [0, 0])[0] += drums * price
+
+    payments = []
+    for i in range(rows):
+        truck = "Payment Only" if i % 10 == 0 else rng.choice(trucks)
+        amount = rng.randint(1, 50) * 1000
+        d = day()
+        payments.append((truck, amount, d))
+        if START <= d <= END:
+            expected.setdefault(truck, [0, 0])[1] += amount
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO clients (name, type) VALUES (?, 'truck')",
+        [(t,) for t in trucks + ["Payment Only"]]
+    )
+    conn.executemany("""
+        INSERT INTO truck_saloks (truck_id, drums, price, date, time)
+        SELECT id, ?, ?, ?, '08:00:00' FROM clients WHERE name = ?
+    """, [(drums, price, d, truck) for truck, drums, price, d in saloks])
+    conn.executemany("""
+        INSERT INTO truck_payments (truck_id, amount, date)
+        SELECT id, ?, ? FROM clients WHERE name = ?
+    """, [(amount, d, truck) for truck, amount, d in payments])
+    conn.commit()
+    conn.close()
+    return expected
+
+
+def open_db(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def test_truck_totals_match_raw_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "report.db"
+        expected = build_db(path, 2000)
+
+        conn = open_db(path)
+        rows = get_truck_totals(conn, START, END)
+        conn.close()
+
+    got = {r["truck"]: [r["charges"], r["payments"]] for r in rows}
+
+    assert sorted(got) == sorted(expected)
+    assert "Payment Only" in got and got["Payment Only"][0] == 0
+    # Integer centavos: exact
+    for truck, (charges, payments) in expected.items():
+        assert got[truck] == [charges, payments], truck
+
+
+def test_daily_rollup_matches_raw_rows():
+    # init_db installs the rollup triggers, so build_db's inserts
+    # have already been rolled up
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rollup.db"
+        expected = build_db(path, 2000)
+
+        conn = open_db(path)
+        rows = rollups.get_truck_totals(conn, START, END)
+        mismatches = rollups.verify_rollups(conn)
+        conn.close()
+
+    got = {r["truck"]: [r["charges"], r["payments"]] for r in rows}
+
+    assert mismatches == []
+    assert sorted(got) == sorted(expected)
+    # Integer centavos: exact
+    for truck, (charges, payments) in expected.items():
+        assert got[truck] == [charges, payments], truck
+
+
+def test_truck_totals_plan_has_no_fan_out():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "plan.db"
+        build_db(path, 200)
+
+        conn = open_db(path)
+        params = {"start": START, "end": END}
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN " + RANGE_TOTALS_SQL, params
+        ).fetchall()
+        _, bad = full_scans(conn, RANGE_TOTALS_SQL, params)
+        conn.close()
+
+    # Plan rows are (id, parent, _, detail). Each raw table is read
+    # once, through its date index, in its own arm of the UNION ALL
+    # rather than joined to the other
+    saloks = [r for r in plan if " truck_saloks " in f"{r[3]} "]
+    payments = [r for r in plan if " truck_payments " in f"{r[3]} "]
+
+    assert bad == []
+    assert len(saloks) == len(payments) == 1
+    assert saloks[0][3].startswith("SEARCH truck_saloks USING INDEX idx_truck_saloks_date")
+    assert payments[0][3].startswith("SEARCH truck_payments USING INDEX idx_truck_payments_date")
+    assert saloks[0][1] != payments[0][1]
+
+
+if __name__ == "__main__":
+    test_truck_totals_match_raw_rows()
+    test_daily_rollup_matches_raw_rows()
+    test_truck_totals_plan_has_no_fan_out()
+    print("Truck report test complete.")
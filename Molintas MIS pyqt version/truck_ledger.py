@@ -0,0 +1,148 @@
+# truck_ledger.py
+# Running balances per truck (truck_balances table)
+#
+# truck_balances is kept up to date by triggers on truck_saloks and
+# truck_payments (see migrations.py), so the Truck Salok page reads one
+# row instead of summing years of history.
+#
+# Usage:
+#   python truck_ledger.py --verify    -> compare ledger with raw tables
+#   python truck_ledger.py --rebuild   -> recompute ledger from scratch
+
+import sys
+
+from money import fmt
+
+# Charges and payments per truck straight from the raw tables
+RAW_TOTALS_SQL = """
+    SELECT truck_id,
+           SUM(charges) AS charges,
+           SUM(payments) AS payments,
+           MAX(activity) AS last_activity
+    FROM (
+        SELECT truck_id, drums * price AS charges, 0 AS payments,
+               date || ' ' || time AS activity
+        FROM truck_saloks
+        UNION ALL
+        SELECT truck_id, 0, amount, date
+        FROM truck_payments
+    )
+    GROUP BY truck_id
+"""
+
+# Charges and payments per truck for one date range (reports).
+# Each side is summed on its own before the two are combined, so a
+# truck's saloks are never multiplied by its payments, and trucks with
+# payments but no saloks in the range are included. Names are joined
+# on once per truck, after the sums.
+RANGE_TOTALS_SQL = """
+    SELECT COALESCE(c.name, 'Deleted truck #' || t.truck_id) AS truck,
+           t.charges,
+           t.payments
+    FROM (
+        SELECT truck_id,
+               SUM(charges) AS charges,
+               SUM(payments) AS payments
+        FROM (
+            SELECT truck_id, SUM(drums * price) AS charges, 0 AS payments
+            FROM truck_saloks
+            WHERE date BETWEEN :start AND :end
+            GROUP BY truck_id
+            UNION ALL
+            SELECT truck_id, 0, SUM(amount)
+            FROM truck_payments
+            WHERE date BETWEEN :start AND :end
+            GROUP BY truck_id
+        )
+        GROUP BY truck_id
+    ) t
+    LEFT JOIN clients c ON c.id = t.truck_id
+    ORDER BY truck
+"""
+
+
+def rebuild_truck_balances(conn):
+    conn.execute("DELETE FROM truck_balances")
+    conn.execute(f"""
+        INSERT INTO truck_balances (truck_id, charges, payments, last_activity)
+        {RAW_TOTALS_SQL}
+    """)
+
+
+def verify_truck_balances(conn):
+    """
+    Returns a list of (truck_id, ledger_charges, raw_charges,
+    ledger_payments, raw_payments) for every truck that does not match.
+    """
+    raw = {
+        r[0]: (r[1] or 0, r[2] or 0)
+        for r in conn.execute(RAW_TOTALS_SQL)
+    }
+    ledger = {
+        r[0]: (r[1], r[2])
+        for r in conn.execute(
+            "SELECT truck_id, charges, payments FROM truck_balances"
+        )
+    }
+
+    mismatches = []
+    for truck in sorted(set(raw) | set(ledger)):
+        lc, lp = ledger.get(truck, (0, 0))
+        rc, rp = raw.get(truck, (0, 0))
+        if lc != rc or lp != rp:
+            mismatches.append((truck, lc, rc, lp, rp))
+
+    return mismatches
+
+
+def get_truck_balance(conn, truck_id):
+    """
+    Returns (charges, payments, last_activity) for one truck.
+    """
+    row = conn.execute("""
+        SELECT charges, payments, last_activity
+        FROM truck_balances
+        WHERE truck_id = ?
+    """, (truck_id,)).fetchone()
+
+    if not row:
+        return 0, 0, None
+    return row[0], row[1], row[2]
+
+
+def get_truck_totals(conn, start_date, end_date):
+    """
+    Returns rows of (truck, charges, payments) for activity between
+    start_date and end_date ('YYYY-MM-DD', inclusive), ordered by truck.
+    """
+    return conn.execute(
+        RANGE_TOTALS_SQL,
+        {"start": start_date, "end": end_date}
+    ).fetchall()
+
+
+if __name__ == "__main__":
+    from db import db_session
+    from migrations import migrate
+
+    with db_session() as conn:
+        # truck_id arrives with migration 7
+        migrate(conn)
+
+        if "--rebuild" in sys.argv:
+            rebuild_truck_balances(conn)
+            print("truck_balances rebuilt.")
+
+        mismatches = verify_truck_balances(conn)
+
+    if not mismatches:
+        print("truck_balances matches truck_saloks / truck_payments.")
+        sys.exit(0)
+
+    for truck, lc, rc, lp, rp in mismatches:
+        print(
+            f"Truck #{truck}: charges {fmt(lc)} (raw {fmt(rc)}), "
+            f"payments {fmt(lp)} (raw {fmt(rp)})"
+        )
+    print("Run with --rebuild to fix.")
+    sys.exit(1)
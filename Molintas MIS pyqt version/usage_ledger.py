@@ -0,0 +1,201 @@
+# usage_ledger.py
+# Usage history per client (usage_events table)
+#
+# Every "Add Usage" appends one row to usage_events (client id, the
+# client's type at the time, m³, rate, charge, time). Rate and charge
+# are centavos (see money.py).
+# Rows are never updated or deleted (triggers refuse it), so billing
+# reports can be worked out for any period.
+#
+# clients.usage / clients.bill / clients.date are kept as a cached
+# projection of the events for the page lists:
+#   usage = SUM(events.usage)
+#   bill  = SUM(events.charge) - SUM(payments.amount)
+#   date  = date of the latest event
+#
+# Databases from before migration 6 get one "Opening balance" event per
+# billed client, dated on its last billing date (see migrations.py).
+#
+# Usage:
+#   python usage_ledger.py --verify    -> compare clients with events
+#   python usage_ledger.py --rebuild   -> recompute clients from events
+
+import sys
+from datetime import datetime
+
+from money import TOLERANCE, charge as money_charge, fmt
+
+OPENING_NOTE = "Opening balance"
+
+# clients columns recomputed from usage_events and payments
+PROJECTION_SQL = """
+    SELECT c.id, c.name,
+           COALESCE(e.usage, 0) AS usage,
+           COALESCE(e.charges, 0) - COALESCE(p.paid, 0) AS bill,
+           e.last_date AS date
+    FROM clients c
+    LEFT JOIN (
+        SELECT client_id, SUM(usage) AS usage, SUM(charge) AS charges,
+               MAX(date(created_at)) AS last_date
+        FROM usage_events
+        GROUP BY client_id
+    ) e ON e.client_id = c.id
+    LEFT JOIN (
+        SELECT client_id, SUM(amount) AS paid
+        FROM payments
+        GROUP BY client_id
+    ) p ON p.client_id = c.id
+    WHERE c.type <> 'truck'
+"""
+
+# Totals for a period, straight from the events (created_at index)
+PERIOD_SQL = """
+    SELECT COUNT(*) AS events,
+           COALESCE(SUM(usage), 0) AS usage,
+           COALESCE(SUM(charge), 0) AS charges
+    FROM usage_events
+    WHERE created_at BETWEEN ? AND ?
+"""
+
+CLIENT_EVENTS_SQL = """
+    SELECT id, usage, rate, charge, created_at, note
+    FROM usage_events
+    WHERE client_id = ?
+    AND created_at BETWEEN ? AND ?
+    ORDER BY created_at DESC, id DESC
+"""
+
+
+def _bounds(start_date, end_date):
+    # 'YYYY-MM-DD' dates -> created_at range covering both whole days
+    return start_date + " 00:00:00", end_date + " 23:59:59"
+
+
+def record_usage(conn, client_id, usage, rate, note=None, created_at=None):
+    """
+    Appends one usage event and updates the client's cached usage,
+    bill, billing date and payment status. `rate` is centavos per m³;
+    returns the charge in centavos. Call inside the caller's
+    transaction (db_session).
+    """
+    created_at = created_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    charge = money_charge(usage, rate)
+
+    conn.execute("""
+        INSERT INTO usage_events (client_id, client_type, usage, rate, charge, created_at, note)
+        SELECT id, type, ?, ?, ?, ?, ?
+        FROM clients
+        WHERE id = ?
+    """, (usage, rate, charge, created_at, note, client_id))
+
+    conn.execute("""
+        UPDATE clients
+        SET usage = usage + ?, bill = bill + ?, date = ?, payment_status = 'Unpaid'
+        WHERE id = ?
+    """, (usage, charge, created_at[:10], client_id))
+
+    return charge
+
+
+def record_usage_batch(conn, readings, note=None):
+    """
+    record_usage for many readings at once: readings are (client_id,
+    usage, rate, created_at), at most one per client. Two executemany
+    calls instead of two statements per reading. Returns the charges
+    in centavos, in order. Call inside the caller's transaction.
+    """
+    events = [
+        (client_id, usage, rate, money_charge(usage, rate), created_at, note)
+        for client_id, usage, rate, created_at in readings
+    ]
+
+    conn.executemany("""
+        INSERT INTO usage_events (client_id, client_type, usage, rate, charge, created_at, note)
+        SELECT id, type, ?, ?, ?, ?, ?
+        FROM clients
+        WHERE id = ?
+    """, [(*event[1:], event[0]) for event in events])
+
+    # A backdated reading never moves the billing date back
+    conn.executemany("""
+        UPDATE clients
+        SET usage = usage + ?, bill = bill + ?,
+            date = MAX(COALESCE(date, ''), ?), payment_status = 'Unpaid'
+        WHERE id = ?
+    """, [(usage, charge, created_at[:10], client_id)
+          for client_id, usage, _, charge, created_at, _ in events])
+
+    return [e[3] for e in events]
+
+
+def rebuild_clients(conn):
+    rows = conn.execute(PROJECTION_SQL).fetchall()
+    conn.executemany(
+        "UPDATE clients SET usage = ?, bill = ?, date = ? WHERE id = ?",
+        [(usage, bill, date, cid) for cid, name, usage, bill, date in rows]
+    )
+
+
+def verify_clients(conn):
+    """
+    Returns a list of (client, cached_usage, event_usage, cached_bill,
+    event_bill) for every client whose cached values do not match.
+    Bills are centavos and must match exactly.
+    """
+    mismatches = []
+    for r in conn.execute(f"""
+        SELECT c.name, c.usage, x.usage, c.bill, x.bill
+        FROM clients c
+        JOIN ({PROJECTION_SQL}) AS x ON x.id = c.id
+    """):
+        name, cu, eu, cb, eb = r
+        if abs((cu or 0) - eu) > TOLERANCE or (cb or 0) != eb:
+            mismatches.append((name, cu, eu, cb, eb))
+    return mismatches
+
+
+# =========================
+# Period queries
+# =========================
+def get_usage_totals(conn, start_date, end_date):
+    """
+    Returns one row of events, usage (m³) and charges (centavos) recorded
+    between start_date and end_date ('YYYY-MM-DD', inclusive).
+    """
+    return conn.execute(PERIOD_SQL, _bounds(start_date, end_date)).fetchone()
+
+
+def get_client_usage(conn, client_id, start_date, end_date):
+    """
+    Returns one client's usage events in the period, newest first.
+    """
+    return conn.execute(
+        CLIENT_EVENTS_SQL, (client_id, *_bounds(start_date, end_date))
+    ).fetchall()
+
+
+if __name__ == "__main__":
+    from db import db_session
+    from migrations import migrate
+
+    with db_session() as conn:
+        # usage_events arrives with migration 6
+        migrate(conn)
+
+        if "--rebuild" in sys.argv:
+            rebuild_clients(conn)
+            print("Client usage and bills rebuilt from usage_events.")
+
+        mismatches = verify_clients(conn)
+
+    if not mismatches:
+        print("Client usage and bills match usage_events.")
+        sys.exit(0)
+
+    for name, cu, eu, cb, eb in mismatches:
+        print(
+            f"{name}: usage {cu} (events {eu}), "
+            f"bill {fmt(cb)} (events {fmt(eb)})"
+        )
+    print("Run with --rebuild to fix.")
+    sys.exit(1)